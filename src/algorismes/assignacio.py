@@ -0,0 +1,201 @@
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+from domain.distancies import MatriuDistancies
+from algorismes.millorarRuta import EPSILON, millorarRuta
+from instrumentacio import instrumentacio
+
+ASSIGNACIONS: List[str] = ["sequencial", "hongares"]
+# Nombre màxim de reassignacions de cada motxilla: normalment la ruta deixa de millorar al cap de dues o tres
+ITERACIONS_ASSIGNACIO: int = 5
+
+class Parada:
+    """
+    Recollida d'una comanda en el restaurant assignat. Té les coordenades del restaurant i el compromís de la comanda,
+    de manera que millorarRuta pot ordenar les recollides mantenint els trams de prioritat de la motxilla.
+    """
+
+    __slots__ = ("comanda", "restaurant")
+
+    def __init__(self, comanda: Comanda, restaurant: Restaurant) -> None:
+        self.comanda: Comanda = comanda
+        self.restaurant: Restaurant = restaurant
+
+    @property
+    def coordenades(self) -> Coordenada:
+        return self.restaurant.coordenades
+
+    @property
+    def compromis(self) -> int:
+        return self.comanda.compromis
+
+    def __repr__(self) -> str:
+        return f"Parada(comanda={self.comanda.id}, restaurant={self.restaurant.nom})"
+
+def hongares(costos: np.ndarray) -> np.ndarray:
+    """
+    Assignació de cost mínim amb l'algorisme hongarès (camins augmentants més curts amb potencials), en O(n² m).
+
+    Cada fila s'afegeix amb una cerca de Dijkstra sobre les columnes amb els costos reduïts.
+    El bucle intern sobre les columnes està vectoritzat amb NumPy.
+
+    Args:
+        costos (np.ndarray): Matriu n x m de costos, amb n <= m.
+
+    Returns:
+        np.ndarray: Columna assignada a cada fila (n), totes diferents.
+    """
+    n, m = costos.shape
+    if n > m:
+        raise ValueError(f"L'assignació necessita com a mínim tantes columnes com files, i en té {m} per a {n} files.")
+    # Potencials de les files i les columnes. La columna 0 és fictícia i guarda la fila que s'està afegint.
+    u: np.ndarray = np.zeros(n + 1)
+    v: np.ndarray = np.zeros(m + 1)
+    fila: np.ndarray = np.zeros(m + 1, dtype=np.int64)
+    anterior: np.ndarray = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        fila[0] = i
+        columna: int = 0
+        minim: np.ndarray = np.full(m + 1, np.inf)
+        visitada: np.ndarray = np.zeros(m + 1, dtype=bool)
+        while True:
+            visitada[columna] = True
+            actual: int = fila[columna]
+            lliures: np.ndarray = ~visitada[1:]
+            reduits: np.ndarray = costos[actual - 1] - u[actual] - v[1:]
+            millora: np.ndarray = lliures & (reduits < minim[1:])
+            minim[1:][millora] = reduits[millora]
+            anterior[1:][millora] = columna
+            seguent: int = int(np.argmin(np.where(lliures, minim[1:], np.inf))) + 1
+            delta: float = minim[seguent]
+            u[fila[visitada]] += delta
+            v[visitada] -= delta
+            minim[1:][lliures] -= delta
+            columna = seguent
+            if fila[columna] == 0:
+                break
+        # Es recorre el camí augmentant cap enrere
+        while columna:
+            previa: int = anterior[columna]
+            fila[columna] = fila[previa]
+            columna = previa
+
+    assignacio: np.ndarray = np.empty(n, dtype=np.int64)
+    columnes: np.ndarray = np.nonzero(fila[1:])[0]
+    assignacio[fila[1:][columnes] - 1] = columnes
+    return assignacio
+
+def assignacioSequencial(inici: Coordenada, comandes: List[Comanda], candidats: Dict[int, List[Restaurant]], repetirRestaurants: bool,
+                         matriu: MatriuDistancies) -> List[Optional[Restaurant]]:
+    """
+    Assignació de partida: cada comanda, en ordre, va al restaurant disponible més proper a l'anterior recollida, com fa best_first_search.
+
+    Returns:
+        List[Optional[Restaurant]]: Restaurant de cada comanda, o None si no en queda cap de la seva especialitat.
+    """
+    assignats: List[Optional[Restaurant]] = []
+    ocupats: Dict[int, Set[int]] = {}
+    ubicacio: Coordenada = inici
+    for comanda in comandes:
+        restaurants: List[Restaurant] = candidats.get(comanda.codiEspecialitat, [])
+        if not restaurants:
+            assignats.append(None)
+            continue
+        distancies: np.ndarray = np.array(matriu.distancies(ubicacio, [restaurant.coordenades for restaurant in restaurants]), dtype=np.float64)
+        if not repetirRestaurants:
+            distancies[list(ocupats.get(comanda.codiEspecialitat, ()))] = np.inf
+        columna: int = int(np.argmin(distancies))
+        if not np.isfinite(distancies[columna]):
+            assignats.append(None)
+            continue
+        ocupats.setdefault(comanda.codiEspecialitat, set()).add(columna)
+        assignats.append(restaurants[columna])
+        ubicacio = restaurants[columna].coordenades
+    return assignats
+
+def reassignar(inici: Coordenada, parades: List[Parada], candidats: Dict[int, List[Restaurant]], repetirRestaurants: bool,
+               matriu: MatriuDistancies) -> List[Parada]:
+    """
+    Torna a escollir els restaurants de totes les parades alhora.
+
+    El cost de posar el restaurant r a la parada i és d(parada i - 1, r) + d(r, parada i + 1), amb les parades veïnes actuals.
+    Les comandes de cada especialitat només poden anar a restaurants de la mateixa especialitat, de manera que el problema
+    se separa en una assignació per especialitat. Si els restaurants es poden repetir, cada parada es queda el de cost mínim.
+    Si no, l'assignació es resol amb l'algorisme hongarès sobre les n columnes més barates de cada fila, que sempre
+    contenen una assignació òptima.
+
+    Returns:
+        List[Parada]: Parades en el mateix ordre amb els restaurants nous.
+    """
+    anteriors: List[Coordenada] = [inici] + [parada.coordenades for parada in parades[:-1]]
+    seguents: List[Optional[Coordenada]] = [parada.coordenades for parada in parades[1:]] + [None]
+    grups: Dict[int, List[int]] = {}
+    for posicio, parada in enumerate(parades):
+        grups.setdefault(parada.comanda.codiEspecialitat, []).append(posicio)
+
+    noves: List[Parada] = parades[:]
+    for codi, posicions in grups.items():
+        restaurants: List[Restaurant] = candidats[codi]
+        punts: List[Coordenada] = [restaurant.coordenades for restaurant in restaurants]
+        costos: np.ndarray = np.array([matriu.distancies(anteriors[posicio], punts) + (matriu.distanciesFins(punts, seguents[posicio]) if seguents[posicio] is not None else 0.0)
+                                       for posicio in posicions])
+        if repetirRestaurants:
+            columnes: np.ndarray = np.argmin(costos, axis=1)
+        else:
+            # Només cal considerar les n columnes més barates de cada fila: com a molt n - 1 estan ocupades per les altres files
+            n: int = len(posicions)
+            reduides: np.ndarray = np.unique(np.argpartition(costos, n - 1, axis=1)[:, :n]) if n < len(restaurants) else np.arange(len(restaurants))
+            columnes = reduides[hongares(costos[:, reduides])]
+        for posicio, columna in zip(posicions, columnes.tolist()):
+            noves[posicio] = Parada(parades[posicio].comanda, restaurants[columna])
+    return noves
+
+def longitudRecollida(inici: Coordenada, parades: List[Parada], matriu: MatriuDistancies) -> float:
+    punts: List[Coordenada] = [inici] + [parada.coordenades for parada in parades]
+    return sum(matriu.distancia(origen, desti) for origen, desti in zip(punts, punts[1:]))
+
+def planificarRecollides(inici: Coordenada, comandes: List[Comanda], candidats: Dict[int, List[Restaurant]], repetirRestaurants: bool,
+                         matriu: MatriuDistancies, tempsMillora: float = 0.05, mantenirPrioritat: bool = True,
+                         iteracions: int = ITERACIONS_ASSIGNACIO) -> Tuple[List[Comanda], Dict[Comanda, Restaurant]]:
+    """
+    Escull els restaurants de totes les comandes d'una motxilla alhora i n'ordena les recollides.
+
+    Es parteix de l'assignació seqüencial (el restaurant més proper a l'anterior recollida) i s'alternen dos passos:
+    reassignar tots els restaurants amb el cost d'inserció entre les parades veïnes (reassignar) i tornar a ordenar
+    les recollides amb 2-opt i Or-opt (millorarRuta). Com que les parades veïnes també canvien, el resultat només s'accepta
+    si la ruta de recollida és més curta, de manera que mai és pitjor que l'ordenació de l'assignació seqüencial.
+    Amb mantenirPrioritat, les recollides només es reordenen dins dels trams consecutius amb el mateix compromís.
+
+    Args:
+        inici (Coordenada): Ubicació del repartidor.
+        comandes (List[Comanda]): Comandes de la motxilla, per ordre de prioritat.
+        candidats (Dict[int, List[Restaurant]]): Restaurants disponibles de cada codi d'especialitat.
+        repetirRestaurants (bool): Indica si diverses comandes poden anar al mateix restaurant.
+        matriu (MatriuDistancies): Matriu de distàncies.
+        tempsMillora (float): Temps màxim en segons de cada ordenació de les recollides.
+        mantenirPrioritat (bool): Indica si l'ordenació ha de mantenir l'ordre per compromís.
+        iteracions (int): Nombre màxim de reassignacions.
+
+    Returns:
+        Tuple[List[Comanda], Dict[Comanda, Restaurant]]:
+            - Comandes en l'ordre de recollida, amb les que no tenen cap restaurant disponible al final.
+            - Restaurant assignat a cada comanda.
+    """
+    assignats: List[Optional[Restaurant]] = assignacioSequencial(inici, comandes, candidats, repetirRestaurants, matriu)
+    parades: List[Parada] = [Parada(comanda, restaurant) for comanda, restaurant in zip(comandes, assignats) if restaurant is not None]
+    parades = millorarRuta(inici, parades, matriu.distancia, tempsMillora, mantenirPrioritat)
+    longitud: float = longitudRecollida(inici, parades, matriu)
+    for _ in range(iteracions):
+        noves: List[Parada] = millorarRuta(inici, reassignar(inici, parades, candidats, repetirRestaurants, matriu), matriu.distancia, tempsMillora, mantenirPrioritat)
+        novaLongitud: float = longitudRecollida(inici, noves, matriu)
+        if novaLongitud >= longitud - EPSILON:
+            break
+        parades, longitud = noves, novaLongitud
+    if instrumentacio.actiu:
+        instrumentacio.comptar("paradesAssignades", len(parades))
+
+    ordre: List[Comanda] = [parada.comanda for parada in parades] + [comanda for comanda, restaurant in zip(comandes, assignats) if restaurant is None]
+    return ordre, {parada.comanda: parada.restaurant for parada in parades}
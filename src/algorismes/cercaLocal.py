@@ -0,0 +1,184 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import math, random, time
+
+from domain.comanda import Comanda
+from algorismes.veinatge import VeinatgeIntercanvi
+from algorismes.cotes import TOLERANCIA_GAP, cotaCompromis, valorObjectiu
+from instrumentacio import instrumentacio
+
+# Temps màxim per defecte de cada selecció de comandes, en segons
+TEMPS_MAXIM: float = 0.05
+# Probabilitat inicial d'acceptar un veí pitjor amb la diferència mitjana i temperatura final relativa a la inicial
+ACCEPTACIO_INICIAL: float = 0.5
+REFREDAMENT_FINAL: float = 1e-3
+# Nombre de veïns a l'atzar que s'estimen per fixar la temperatura inicial
+MOSTRA_TEMPERATURA: int = 100
+# Nombre màxim de veïns que la cerca tabú avalua a cada iteració i nombre d'iteracions que un intercanvi queda prohibit
+MIDA_MOSTRA_TABU: int = 200
+DURADA_TABU: int = 7
+
+class ProgresCerca:
+    """
+    Estat d'una cerca amb temps límit, que es passa a la funció de progrés cada vegada que millora la solució i en acabar.
+    """
+
+    def __init__(self, solver: str, iteracio: int, temps: float, fitness: Tuple[float, int], millorFitness: Tuple[float, int], final: bool = False) -> None:
+        self.solver: str = solver
+        self.iteracio: int = iteracio
+        self.temps: float = temps
+        self.fitness: Tuple[float, int] = fitness
+        self.millorFitness: Tuple[float, int] = millorFitness
+        self.final: bool = final
+
+    def __repr__(self) -> str:
+        return f"ProgresCerca(solver={self.solver}, iteracio={self.iteracio}, temps={round(self.temps, 4)}, fitness={self.fitness}, millorFitness={self.millorFitness}, final={self.final})"
+
+def veiAleatori(veinatge: VeinatgeIntercanvi, generador: random.Random) -> Tuple[int, int]:
+    """
+    Tria un intercanvi a l'atzar que pot canviar la motxilla: la primera posició no pot ser més enllà del punt de tall.
+    """
+    n: int = len(veinatge.solucio)
+    i: int = generador.randint(0, min(veinatge.numComandes, n - 2))
+    return i, generador.randint(i + 1, n - 1)
+
+def resultat(comandes: List[Comanda], millorOrdre: List[int], millorFitness: Tuple[float, int]) -> Tuple[List[Comanda], List[Comanda]]:
+    solucio: List[Comanda] = [comandes[k] for k in millorOrdre]
+    return solucio[:millorFitness[1]], solucio[millorFitness[1]:]
+
+def recuitSimulat(comandes: List[Comanda], capacitatMaxima: int, tempsMaxim: float = TEMPS_MAXIM, llavor: Optional[int] = None,
+                  informar: Optional[Callable[[ProgresCerca], None]] = None, iteracionsMaximes: Optional[int] = None,
+                  toleranciaGap: float = TOLERANCIA_GAP) -> Tuple[List[Comanda], List[Comanda]]:
+    """
+    Funció que escull les comandes de la motxilla amb un recuit simulat sobre el veïnatge d'intercanvis del Hill Climbing.
+
+    A cada iteració s'avalua un intercanvi a l'atzar. Si millora la solució s'aplica, i si l'empitjora s'aplica
+    amb probabilitat exp(diferència / temperatura). La temperatura baixa geomètricament amb el temps transcorregut,
+    de manera que el refredament s'adapta al temps disponible. Quan s'acaba el temps es retorna la millor solució trobada.
+    La cerca s'atura abans si el gap de la millor solució respecte a la cota del compromís (cotaCompromis) no supera toleranciaGap.
+
+    Args:
+        comandes (List[Comanda]): Llista de comandes a lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        tempsMaxim (float): Temps màxim en segons.
+        llavor (Optional[int]): Llavor del generador aleatori.
+        informar (Optional[Callable[[ProgresCerca], None]]): Funció que rep el progrés cada vegada que millora la solució i en acabar.
+        iteracionsMaximes (Optional[int]): Nombre màxim d'iteracions. Amb el mateix nombre d'iteracions i la mateixa llavor el resultat és el mateix.
+        toleranciaGap (float): Gap relatiu a partir del qual la cerca s'atura. Amb 0 només s'atura si la solució és òptima.
+
+    Returns:
+        Tuple[List[Comanda], List[Comanda]]:
+            - Llista de comandes programades per lliurar.
+            - Llista de comandes no programades per lliurar.
+    """
+    tempsInici: float = time.perf_counter()
+    veinatge: VeinatgeIntercanvi = VeinatgeIntercanvi(comandes, capacitatMaxima)
+    fitnessActual: Tuple[float, int] = veinatge.fitness()
+    millorFitness: Tuple[float, int] = fitnessActual
+    millorOrdre: List[int] = veinatge.ordre[:]
+    objectiu: float = valorObjectiu(cotaCompromis(comandes, capacitatMaxima), toleranciaGap)
+    if len(comandes) < 2:
+        return resultat(comandes, millorOrdre, millorFitness)
+
+    generador: random.Random = random.Random(llavor)
+    diferencies: List[float] = [abs(veinatge.avaluar(*veiAleatori(veinatge, generador))[0] - fitnessActual[0]) for _ in range(MOSTRA_TEMPERATURA)]
+    diferenciaMitjana: float = sum(diferencies) / len(diferencies) or 1.0
+    temperaturaInicial: float = -diferenciaMitjana / math.log(ACCEPTACIO_INICIAL)
+
+    iteracio: int = 0
+    temps: float = 0.0
+    while (iteracionsMaximes is None or iteracio < iteracionsMaximes) and temps < tempsMaxim and -millorFitness[0] > objectiu:
+        iteracio += 1
+        fraccio: float = temps / tempsMaxim if iteracionsMaximes is None else iteracio / iteracionsMaximes
+        temperatura: float = temperaturaInicial * REFREDAMENT_FINAL ** min(fraccio, 1.0)
+        i, j = veiAleatori(veinatge, generador)
+        fitnessVei: Tuple[float, int] = veinatge.avaluar(i, j)
+        if fitnessVei > fitnessActual or generador.random() < math.exp((fitnessVei[0] - fitnessActual[0]) / temperatura):
+            veinatge.aplicar(i, j)
+            fitnessActual = fitnessVei
+            if fitnessActual > millorFitness:
+                millorFitness, millorOrdre = fitnessActual, veinatge.ordre[:]
+                if informar is not None:
+                    informar(ProgresCerca("recuitSimulat", iteracio, time.perf_counter() - tempsInici, fitnessActual, millorFitness))
+        temps = time.perf_counter() - tempsInici
+
+    if instrumentacio.actiu:
+        instrumentacio.comptar("iteracionsRecuitSimulat", iteracio)
+    if informar is not None:
+        informar(ProgresCerca("recuitSimulat", iteracio, temps, fitnessActual, millorFitness, final=True))
+    return resultat(comandes, millorOrdre, millorFitness)
+
+def cercaTabu(comandes: List[Comanda], capacitatMaxima: int, tempsMaxim: float = TEMPS_MAXIM, llavor: Optional[int] = None,
+              informar: Optional[Callable[[ProgresCerca], None]] = None, iteracionsMaximes: Optional[int] = None,
+              midaMostra: int = MIDA_MOSTRA_TABU, duradaTabu: int = DURADA_TABU, toleranciaGap: float = TOLERANCIA_GAP) -> Tuple[List[Comanda], List[Comanda]]:
+    """
+    Funció que escull les comandes de la motxilla amb una cerca tabú sobre el veïnatge d'intercanvis del Hill Climbing.
+
+    A cada iteració s'aplica el millor intercanvi d'una mostra del veïnatge (o de tot el veïnatge si és més petit que la mostra),
+    encara que empitjori la solució. Les dues comandes intercanviades no es poden tornar a intercanviar entre elles
+    durant duradaTabu iteracions, tret que l'intercanvi millori la millor solució trobada (criteri d'aspiració).
+    Quan s'acaba el temps es retorna la millor solució trobada, o abans si el seu gap no supera toleranciaGap.
+
+    Args:
+        comandes (List[Comanda]): Llista de comandes a lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        tempsMaxim (float): Temps màxim en segons.
+        llavor (Optional[int]): Llavor del generador aleatori de la mostra.
+        informar (Optional[Callable[[ProgresCerca], None]]): Funció que rep el progrés cada vegada que millora la solució i en acabar.
+        iteracionsMaximes (Optional[int]): Nombre màxim d'iteracions.
+        midaMostra (int): Nombre màxim de veïns avaluats a cada iteració.
+        duradaTabu (int): Nombre d'iteracions que un intercanvi queda prohibit.
+        toleranciaGap (float): Gap relatiu respecte a la cota del compromís a partir del qual la cerca s'atura.
+
+    Returns:
+        Tuple[List[Comanda], List[Comanda]]:
+            - Llista de comandes programades per lliurar.
+            - Llista de comandes no programades per lliurar.
+    """
+    tempsInici: float = time.perf_counter()
+    veinatge: VeinatgeIntercanvi = VeinatgeIntercanvi(comandes, capacitatMaxima)
+    fitnessActual: Tuple[float, int] = veinatge.fitness()
+    millorFitness: Tuple[float, int] = fitnessActual
+    millorOrdre: List[int] = veinatge.ordre[:]
+    objectiu: float = valorObjectiu(cotaCompromis(comandes, capacitatMaxima), toleranciaGap)
+    n: int = len(comandes)
+    if n < 2:
+        return resultat(comandes, millorOrdre, millorFitness)
+
+    generador: random.Random = random.Random(llavor)
+    # Iteració fins a la qual cada parell de comandes (per posició a la llista original) no es pot intercanviar
+    tabu: Dict[Tuple[int, int], int] = {}
+    iteracio: int = 0
+    temps: float = 0.0
+    while (iteracionsMaximes is None or iteracio < iteracionsMaximes) and temps < tempsMaxim and -millorFitness[0] > objectiu:
+        iteracio += 1
+        files: int = min(veinatge.numComandes + 1, n - 1)
+        if files * (2 * n - files - 1) // 2 <= midaMostra:
+            candidats: List[Tuple[int, int]] = [(i, j) for i in range(files) for j in range(i + 1, n)]
+        else:
+            candidats = [veiAleatori(veinatge, generador) for _ in range(midaMostra)]
+
+        millorVei: Optional[Tuple[Tuple[float, int], int, int]] = None
+        for i, j in candidats:
+            fitnessVei: Tuple[float, int] = veinatge.avaluar(i, j)
+            parell: Tuple[int, int] = (min(veinatge.ordre[i], veinatge.ordre[j]), max(veinatge.ordre[i], veinatge.ordre[j]))
+            if tabu.get(parell, 0) >= iteracio and fitnessVei <= millorFitness:
+                continue
+            if millorVei is None or fitnessVei > millorVei[0]:
+                millorVei = (fitnessVei, i, j)
+        if millorVei is None:
+            break
+
+        fitnessActual, i, j = millorVei
+        tabu[(min(veinatge.ordre[i], veinatge.ordre[j]), max(veinatge.ordre[i], veinatge.ordre[j]))] = iteracio + duradaTabu
+        veinatge.aplicar(i, j)
+        if fitnessActual > millorFitness:
+            millorFitness, millorOrdre = fitnessActual, veinatge.ordre[:]
+            if informar is not None:
+                informar(ProgresCerca("cercaTabu", iteracio, time.perf_counter() - tempsInici, fitnessActual, millorFitness))
+        temps = time.perf_counter() - tempsInici
+
+    if instrumentacio.actiu:
+        instrumentacio.comptar("iteracionsCercaTabu", iteracio)
+    if informar is not None:
+        informar(ProgresCerca("cercaTabu", iteracio, temps, fitnessActual, millorFitness, final=True))
+    return resultat(comandes, millorOrdre, millorFitness)
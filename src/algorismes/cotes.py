@@ -0,0 +1,106 @@
+from typing import Callable, List
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from algorismes.veinatge import DESCOMPTE
+
+# Tolerància per defecte: els solvers només s'aturen abans d'hora quan la solució és òptima (gap 0)
+TOLERANCIA_GAP: float = 0.0
+# Marge relatiu per als errors d'arrodoniment entre la suma de la cota i les sumes prefix del veïnatge
+MARGE_ARRODONIMENT: float = 1e-9
+
+def cotaCompromis(comandes: List[Comanda], capacitatMaxima: int) -> float:
+    """
+    Cota inferior del compromís descomptat de la millor motxilla, és a dir, cota superior del fitness dels solvers.
+
+    Una motxilla és vàlida si conté totes les comandes o si la comanda que en queda fora no hi cap, per tant el pes de la
+    motxilla és més gran que la capacitat menys el pes més gran. Això dona el nombre mínim de comandes de qualsevol
+    motxilla vàlida (agafant les comandes més pesades). El compromís descomptat d'aquestes comandes és com a mínim el de
+    les comandes amb menys compromís, ordenades per compromís creixent (desigualtat de reordenació). Cost O(n log n).
+
+    Args:
+        comandes (List[Comanda]): Llista de comandes a lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+
+    Returns:
+        float: Cota inferior del compromís descomptat.
+    """
+    if not comandes:
+        return 0.0
+    pesos: np.ndarray = np.sort(np.array([comanda.pes for comanda in comandes], dtype=np.int64))[::-1]
+    compromisos: np.ndarray = np.sort(np.array([comanda.compromis for comanda in comandes], dtype=np.float64))
+    if pesos.sum() <= capacitatMaxima:
+        numComandes: int = len(comandes)
+    else:
+        # Primer k (pot ser 0) amb el pes de les k comandes més pesades per sobre de capacitatMaxima - pes màxim
+        pesAcumulat: np.ndarray = np.concatenate(([0], np.cumsum(pesos)))
+        numComandes = int(np.searchsorted(pesAcumulat, capacitatMaxima - pesos[0], side="right"))
+    return float(sum(compromis * DESCOMPTE ** k for k, compromis in enumerate(compromisos[:numComandes].tolist())))
+
+def valorObjectiu(cota: float, tolerancia: float = TOLERANCIA_GAP) -> float:
+    """
+    Valor a partir del qual una solució és prou bona: el de la cota inferior més la tolerància relativa.
+    Serveix tant per al compromís de la motxilla com per a la longitud d'una ruta.
+
+    Args:
+        cota (float): Cota inferior del valor a minimitzar.
+        tolerancia (float): Gap relatiu acceptat (0.01 és un 1%).
+
+    Returns:
+        float: Valor objectiu.
+    """
+    return cota * (1 + tolerancia + MARGE_ARRODONIMENT)
+
+def gap(valor: float, cota: float) -> float:
+    """
+    Gap relatiu d'un valor a minimitzar respecte a la seva cota inferior.
+
+    Returns:
+        float: (valor - cota) / cota, 0 si el valor no supera la cota.
+    """
+    if valor <= cota:
+        return 0.0
+    return (valor - cota) / cota if cota > 0 else float("inf")
+
+def longitudRuta(inici: Coordenada, punts: List[Coordenada], distancia: Callable[[Coordenada, Coordenada], float]) -> float:
+    """
+    Longitud de la ruta que surt de l'inici i visita els punts en ordre (sense tornar a l'inici).
+    """
+    return sum(distancia(origen, desti) for origen, desti in zip([inici] + punts, punts))
+
+def cotaRuta(inici: Coordenada, punts: List[Coordenada], distancia: Callable[[Coordenada, Coordenada], float]) -> float:
+    """
+    Cota inferior de la longitud de qualsevol ruta que surt de l'inici i visita tots els punts: el pes de l'arbre
+    d'expansió mínima de l'inici i els punts, calculat amb l'algorisme de Prim en O(n²).
+
+    Una ruta és un arbre d'expansió, per tant no pot ser més curta que el mínim. Aquesta cota sempre és com a mínim
+    la de sumar la distància de cada punt al seu veí més proper, que també es podria fer servir. Si la distància no és
+    simètrica (xarxa viària), cada aresta pren el mínim dels dos sentits.
+
+    Args:
+        inici (Coordenada): Coordenada inicial de la ruta.
+        punts (List[Coordenada]): Coordenades que visita la ruta.
+        distancia (Callable[[Coordenada, Coordenada], float]): Funció de distància.
+
+    Returns:
+        float: Cota inferior de la longitud en metres.
+    """
+    nodes: List[Coordenada] = [inici] + punts
+    n: int = len(nodes)
+    if n < 2:
+        return 0.0
+    distancies: np.ndarray = np.array([[distancia(origen, desti) for desti in nodes] for origen in nodes], dtype=np.float64)
+    distancies = np.minimum(distancies, distancies.T)
+
+    dinsArbre: np.ndarray = np.zeros(n, dtype=bool)
+    dinsArbre[0] = True
+    connexio: np.ndarray = distancies[0].copy()
+    connexio[0] = np.inf
+    total: float = 0.0
+    for _ in range(n - 1):
+        seguent: int = int(np.argmin(connexio))
+        total += float(connexio[seguent])
+        dinsArbre[seguent] = True
+        connexio = np.where(dinsArbre, np.inf, np.minimum(connexio, distancies[seguent]))
+    return total
@@ -0,0 +1,132 @@
+from typing import Any, Dict, List, Optional, Tuple
+import heapq, math
+import numpy as np
+
+from domain.comanda import Comanda
+
+# Tipus d'esdeveniment. A un mateix instant es processen en aquest ordre: primer arriben les comandes
+# i es tanquen els viatges, i després es decideix el despatx amb tota la informació d'aquell instant.
+ARRIBADA: int = 0
+RECOLLIDA: int = 1
+LLIURAMENT: int = 2
+FI_VIATGE: int = 3
+DESPATX: int = 4
+NOMS_ESDEVENIMENTS: Dict[int, str] = {ARRIBADA: "arribada", RECOLLIDA: "recollida", LLIURAMENT: "lliurament", FI_VIATGE: "fiViatge", DESPATX: "despatx"}
+
+class CuaEsdeveniments:
+    """
+    Cua d'esdeveniments ordenada per temps en un heap.
+
+    Cada esdeveniment és una tupla (temps, tipus, ordre, dades): els empats de temps es resolen pel tipus
+    i després per l'ordre en què s'han programat, de manera que la simulació és determinista.
+    Les tuples es comparen a C, sense objectes intermedis, per processar centenars de milers d'esdeveniments per segon.
+    """
+
+    def __init__(self) -> None:
+        self.heap: List[Tuple[float, int, int, Any]] = []
+        self.programats: int = 0
+        self.processats: int = 0
+        self.ara: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def programar(self, temps: float, tipus: int, dades: Any = None) -> None:
+        """
+        Afegeix un esdeveniment a la cua.
+
+        Args:
+            temps (float): Instant de l'esdeveniment en minuts. No pot ser anterior a l'instant actual.
+            tipus (int): Tipus d'esdeveniment (ARRIBADA, RECOLLIDA, LLIURAMENT, FI_VIATGE o DESPATX).
+            dades (Any): Dades de l'esdeveniment.
+        """
+        if temps < self.ara:
+            raise ValueError(f"No es pot programar un esdeveniment al minut {temps}, anterior a l'instant actual ({self.ara}).")
+        heapq.heappush(self.heap, (temps, tipus, self.programats, dades))
+        self.programats += 1
+
+    def seguent(self) -> Tuple[float, int, Any]:
+        """
+        Treu l'esdeveniment més proper de la cua i avança l'instant actual fins a ell.
+
+        Returns:
+            Tuple[float, int, Any]: Temps, tipus i dades de l'esdeveniment.
+        """
+        temps, tipus, _, dades = heapq.heappop(self.heap)
+        self.ara = temps
+        self.processats += 1
+        return temps, tipus, dades
+
+class RegistreComanda:
+    """
+    Instants de servei d'una comanda a la simulació per esdeveniments, en minuts des de l'inici.
+    """
+
+    __slots__ = ("comanda", "arribada", "recollida", "lliurament", "repartidor")
+
+    def __init__(self, comanda: Comanda, arribada: float) -> None:
+        self.comanda: Comanda = comanda
+        self.arribada: float = arribada
+        self.recollida: Optional[float] = None
+        self.lliurament: Optional[float] = None
+        self.repartidor: Optional[int] = None
+
+    @property
+    def retard(self) -> float:
+        """
+        Minuts de retard respecte al compromís de la comanda (negatiu si s'ha lliurat abans del límit).
+        """
+        return self.lliurament - self.arribada - self.comanda.compromis
+
+    def __repr__(self) -> str:
+        return f"RegistreComanda(comanda={self.comanda.id}, arribada={round(self.arribada, 2)}, recollida={self.recollida}, lliurament={self.lliurament}, repartidor={self.repartidor})"
+
+def arribadesPoisson(numComandes: int, ritme: Optional[float], llavor: int = 0) -> List[float]:
+    """
+    Instants d'arribada d'un procés de Poisson.
+
+    Args:
+        numComandes (int): Nombre de comandes.
+        ritme (Optional[float]): Comandes per hora. Sense ritme, totes les comandes arriben a l'instant 0.
+        llavor (int): Llavor del generador aleatori.
+
+    Returns:
+        List[float]: Minut d'arribada de cada comanda, en ordre creixent.
+    """
+    if not ritme:
+        return [0.0] * numComandes
+    intervals: np.ndarray = np.random.default_rng(llavor).exponential(60.0 / ritme, numComandes)
+    return np.cumsum(intervals).tolist()
+
+def percentil(valors: List[float], percentatge: float) -> float:
+    """
+    Percentil amb el mètode del rang més proper.
+    """
+    if not valors:
+        return 0.0
+    ordenats: List[float] = sorted(valors)
+    return ordenats[max(0, math.ceil(percentatge / 100 * len(ordenats)) - 1)]
+
+def resumServei(registres: List[RegistreComanda]) -> Dict[str, float]:
+    """
+    Indicadors de qualitat de servei de les comandes lliurades.
+
+    Args:
+        registres (List[RegistreComanda]): Registres de les comandes.
+
+    Returns:
+        Dict[str, float]: Nombre de comandes lliurades i a temps, percentatge a temps, retard mitjà de les que arriben tard,
+            percentil 95 i màxim del retard (0 si arriben a temps) i temps mitjà i màxim des de l'arribada fins al lliurament.
+    """
+    lliurades: List[RegistreComanda] = [registre for registre in registres if registre.lliurament is not None]
+    retards: List[float] = [max(0.0, registre.retard) for registre in lliurades]
+    tard: List[float] = [retard for retard in retards if retard > 0]
+    servei: List[float] = [registre.lliurament - registre.arribada for registre in lliurades]
+    return {"comandes": len(lliurades),
+            "aTemps": len(lliurades) - len(tard),
+            "percentatgeATemps": 100 * (len(lliurades) - len(tard)) / len(lliurades) if lliurades else 0.0,
+            "retardMitja": sum(tard) / len(tard) if tard else 0.0,
+            "retardP95": percentil(retards, 95),
+            "retardMaxim": max(retards, default=0.0),
+            "serveiMitja": sum(servei) / len(servei) if servei else 0.0,
+            "serveiMaxim": max(servei, default=0.0)}
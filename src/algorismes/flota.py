@@ -0,0 +1,98 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+
+# Velocitat mitjana d'un repartidor en km/h, per convertir la distància en temps
+VELOCITAT_REPARTIDOR: float = 15.0
+
+class ResultatRepartidor:
+    """
+    Resultat de la simulació de tots els viatges d'un repartidor de la flota.
+    """
+
+    def __init__(self, numero: int, numComandes: int, viatges: int, distancia: float, rutes: List[Tuple[str, List[Coordenada], str]],
+                 registre: str, temps: float, proces: int, numNoServides: int = 0) -> None:
+        self.numero: int = numero
+        # Comandes lliurades i comandes assignades que no s'han pogut servir (sense restaurant de la seva especialitat)
+        self.numComandes: int = numComandes
+        self.numNoServides: int = numNoServides
+        self.viatges: int = viatges
+        self.distancia: float = distancia
+        # Nom, coordenades i color de cada ruta per dibuixar-la al mapa
+        self.rutes: List[Tuple[str, List[Coordenada], str]] = rutes
+        # Sortida de la simulació, per mostrar-la en ordre encara que els repartidors s'executin en paral·lel
+        self.registre: str = registre
+        self.temps: float = temps
+        self.proces: int = proces
+
+    def durada(self, velocitat: float = VELOCITAT_REPARTIDOR) -> float:
+        """
+        Temps en minuts que el repartidor tarda a fer tots els viatges.
+
+        Args:
+            velocitat (float): Velocitat del repartidor en km/h.
+
+        Returns:
+            float: Durada en minuts.
+        """
+        return self.distancia / (velocitat * 1000 / 60)
+
+    def __repr__(self) -> str:
+        return f"ResultatRepartidor(numero={self.numero}, numComandes={self.numComandes}, numNoServides={self.numNoServides}, viatges={self.viatges}, distancia={round(self.distancia, 2)}, temps={round(self.temps, 4)}, proces={self.proces})"
+
+def repartirRestaurants(restaurants: List[Restaurant], numRepartidors: int) -> List[List[Restaurant]]:
+    """
+    Reparteix els restaurants entre els repartidors, alternant dins de cada especialitat.
+
+    Només cal quan els restaurants no es poden repetir: cada restaurant queda assignat a un sol repartidor
+    i els repartidors en paral·lel no es poden disputar el mateix restaurant.
+
+    Args:
+        restaurants (List[Restaurant]): Llista de restaurants.
+        numRepartidors (int): Nombre de repartidors.
+
+    Returns:
+        List[List[Restaurant]]: Restaurants de cada repartidor.
+    """
+    repartiment: List[List[Restaurant]] = [[] for _ in range(numRepartidors)]
+    comptadors: Dict[int, int] = {}
+    for restaurant in restaurants:
+        posicio: int = comptadors.get(restaurant.codiEspecialitat, 0)
+        repartiment[posicio % numRepartidors].append(restaurant)
+        comptadors[restaurant.codiEspecialitat] = posicio + 1
+    return repartiment
+
+def repartirComandes(comandes: List[Comanda], numRepartidors: int, restaurants: Optional[List[List[Restaurant]]] = None) -> List[List[Comanda]]:
+    """
+    Reparteix les comandes entre els repartidors.
+
+    Les comandes es recorren per compromís i cadascuna s'assigna al repartidor amb menys pes assignat,
+    de manera que tots tenen una càrrega semblant i una part de les comandes urgents.
+    Si es donen els restaurants de cada repartidor, una comanda només s'assigna a repartidors
+    que tinguin algun restaurant de la seva especialitat.
+
+    Args:
+        comandes (List[Comanda]): Llista de comandes pendents.
+        numRepartidors (int): Nombre de repartidors.
+        restaurants (Optional[List[List[Restaurant]]]): Restaurants de cada repartidor.
+
+    Returns:
+        List[List[Comanda]]: Comandes de cada repartidor, ordenades per compromís.
+    """
+    repartiment: List[List[Comanda]] = [[] for _ in range(numRepartidors)]
+    pesos: List[int] = [0] * numRepartidors
+    especialitats: Optional[List[Set[int]]] = None
+    if restaurants is not None:
+        especialitats = [{restaurant.codiEspecialitat for restaurant in llista} for llista in restaurants]
+
+    for comanda in sorted(comandes, key=lambda comanda: comanda.compromis):
+        candidats: List[int] = list(range(numRepartidors))
+        if especialitats is not None:
+            candidats = [k for k in candidats if comanda.codiEspecialitat in especialitats[k]] or candidats
+        # En cas d'empat, el repartidor amb el número més baix
+        repartidor: int = min(candidats, key=lambda k: pesos[k])
+        repartiment[repartidor].append(comanda)
+        pesos[repartidor] += comanda.pes
+    return repartiment
@@ -0,0 +1,121 @@
+from typing import Callable, List, Optional, Tuple
+import time
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from algorismes.cotes import longitudRuta
+
+# Millora mínima (en metres) perquè un moviment s'apliqui, evita cicles per errors d'arrodoniment
+EPSILON: float = 1e-7
+# Longitud màxima dels segments que mou l'Or-opt
+MIDA_OR_OPT: int = 3
+
+def millorarRuta(inici: Coordenada, comandes: List[Comanda], distancia: Callable[[Coordenada, Coordenada], float],
+                 tempsMaxim: float = 0.05, mantenirPrioritat: bool = True, longitudObjectiu: Optional[float] = None) -> List[Comanda]:
+    """
+    Funció que millora l'ordre de lliurament d'una motxilla amb moviments 2-opt i Or-opt.
+
+    La ruta comença a la coordenada d'inici i acaba a l'última comanda (no torna a l'origen).
+    Cada moviment s'avalua només amb les arestes que canvien i s'aplica la primera millora trobada,
+    fins que no n'hi ha cap més, s'esgota el temps o la ruta ja no és més llarga que longitudObjectiu.
+
+    Args:
+        inici (Coordenada): Coordenada inicial de la ruta.
+        comandes (List[Comanda]): Ordre de lliurament inicial.
+        distancia (Callable[[Coordenada, Coordenada], float]): Funció de distància, idealment amb les distàncies precalculades.
+        tempsMaxim (float): Temps màxim en segons.
+        mantenirPrioritat (bool): Si s'activa, les comandes només es reordenen dins dels trams consecutius amb el mateix compromís.
+        longitudObjectiu (Optional[float]): Longitud a partir de la qual la ruta és prou bona (vegeu algorismes.cotes).
+
+    Returns:
+        List[Comanda]: Ordre de lliurament millorat.
+    """
+    ruta: List[Comanda] = comandes[:]
+    if len(ruta) < 2:
+        return ruta
+
+    limit: float = time.perf_counter() + tempsMaxim
+    millorat: bool = True
+    while millorat and time.perf_counter() < limit:
+        if longitudObjectiu is not None and longitudRuta(inici, [comanda.coordenades for comanda in ruta], distancia) <= longitudObjectiu:
+            break
+        millorat = dosOpt(inici, ruta, distancia, mantenirPrioritat, limit) or orOpt(inici, ruta, distancia, mantenirPrioritat, limit)
+    return ruta
+
+def trams(ruta: List[Comanda], mantenirPrioritat: bool) -> List[Tuple[int, int]]:
+    """
+    Retorna els trams [inici, fi) de posicions de la ruta on es poden fer moviments.
+    """
+    if not mantenirPrioritat:
+        return [(0, len(ruta))]
+    limits: List[Tuple[int, int]] = []
+    inici: int = 0
+    for i in range(1, len(ruta) + 1):
+        if i == len(ruta) or ruta[i].compromis != ruta[inici].compromis:
+            limits.append((inici, i))
+            inici = i
+    return limits
+
+def dosOpt(inici: Coordenada, ruta: List[Comanda], distancia: Callable[[Coordenada, Coordenada], float], mantenirPrioritat: bool, limit: float) -> bool:
+    """
+    Busca i aplica el primer moviment 2-opt (inversió d'un segment) que escurça la ruta.
+
+    Invertir el segment també inverteix el sentit de totes les seves arestes interiors. Amb distàncies simètriques
+    no canvia res, però amb una xarxa viària amb carrers d'un sol sentit sí, per això la diferència es va acumulant
+    a mesura que el segment s'allarga i es té en compte en el cost del moviment.
+
+    Returns:
+        bool: Indica si s'ha aplicat algun moviment.
+    """
+    n: int = len(ruta)
+    punt: Callable[[int], Coordenada] = lambda k: inici if k < 0 else ruta[k].coordenades
+    for primer, ultim in trams(ruta, mantenirPrioritat):
+        for i in range(primer, ultim - 1):
+            if time.perf_counter() > limit:
+                return False
+            anterior: Coordenada = punt(i - 1)
+            arestaInicial: float = distancia(anterior, punt(i))
+            # Diferència entre recórrer les arestes interiors de ruta[i..j] en sentit contrari i en el sentit actual
+            interior: float = 0.0
+            for j in range(i + 1, ultim):
+                interior += distancia(punt(j), punt(j - 1)) - distancia(punt(j - 1), punt(j))
+                # S'inverteix ruta[i..j]: canvien les arestes (i-1, i) i (j, j+1) i el sentit de les interiors
+                delta: float = distancia(anterior, punt(j)) - arestaInicial + interior
+                if j + 1 < n:
+                    delta += distancia(punt(i), punt(j + 1)) - distancia(punt(j), punt(j + 1))
+                if delta < -EPSILON:
+                    ruta[i:j + 1] = reversed(ruta[i:j + 1])
+                    return True
+    return False
+
+def orOpt(inici: Coordenada, ruta: List[Comanda], distancia: Callable[[Coordenada, Coordenada], float], mantenirPrioritat: bool, limit: float) -> bool:
+    """
+    Busca i aplica el primer moviment Or-opt (moure un segment d'1 a MIDA_OR_OPT comandes) que escurça la ruta.
+
+    Returns:
+        bool: Indica si s'ha aplicat algun moviment.
+    """
+    n: int = len(ruta)
+    punt: Callable[[int], Coordenada] = lambda k: inici if k < 0 else ruta[k].coordenades
+    for primer, ultim in trams(ruta, mantenirPrioritat):
+        for mida in range(1, MIDA_OR_OPT + 1):
+            for i in range(primer, ultim - mida + 1):
+                if time.perf_counter() > limit:
+                    return False
+                j: int = i + mida - 1
+                # Treure el segment ruta[i..j] uneix i-1 amb j+1
+                guanyTreure: float = distancia(punt(i - 1), punt(i)) - (distancia(punt(i - 1), punt(j + 1)) if j + 1 < n else 0)
+                if j + 1 < n:
+                    guanyTreure += distancia(punt(j), punt(j + 1))
+                # Inserir el segment entre les posicions k i k+1 (k fora del segment)
+                for k in range(primer - 1, ultim):
+                    if i - 1 <= k <= j:
+                        continue
+                    cost: float = distancia(punt(k), punt(i)) + ((distancia(punt(j), punt(k + 1)) - distancia(punt(k), punt(k + 1))) if k + 1 < n else 0)
+                    if cost - guanyTreure < -EPSILON:
+                        segment: List[Comanda] = ruta[i:j + 1]
+                        del ruta[i:j + 1]
+                        posicio: int = k + 1 if k < i else k + 1 - mida
+                        ruta[posicio:posicio] = segment
+                        return True
+    return False
@@ -0,0 +1,221 @@
+from math import gcd
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from domain.comanda import Comanda
+from domain.especialitat import Especialitat
+from algorismes.veinatge import DESCOMPTE, VeinatgeIntercanvi
+
+def fitnessSolucio(programades: List[Comanda], noProgramades: List[Comanda], capacitatMaxima: int) -> Tuple[float, int]:
+    """
+    Calcula el fitness del Hill Climbing de la solució formada per les comandes programades seguides de les no programades.
+
+    Args:
+        programades (List[Comanda]): Llista de comandes programades per lliurar.
+        noProgramades (List[Comanda]): Llista de comandes no programades per lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+
+    Returns:
+        Tuple[float, int]: Tupla amb el fitness de la solució i el nombre de comandes.
+    """
+    return VeinatgeIntercanvi(programades + noProgramades, capacitatMaxima).fitness()
+
+def programacioDinamica(comandes: List[Comanda], capacitatMaxima: int) -> Tuple[List[Comanda], List[Comanda]]:
+    """
+    Funció que resol de manera exacta el problema de la motxilla que optimitza el Hill Climbing.
+
+    El fitness del Hill Climbing és el compromís descomptat (0.9^posició) de les comandes que caben a la motxilla
+    començant pel principi de la llista, i la motxilla s'acaba a la primera comanda que no hi cap. Per tant:
+        - Dins de la motxilla, el millor ordre és per compromís creixent (desigualtat de reordenació).
+        - Una motxilla és vàlida si conté totes les comandes o si la comanda més pesada que en queda fora no hi cap.
+
+    Les comandes només es diferencien per l'especialitat, per tant es resol una motxilla acotada per especialitat
+    amb programació dinàmica sobre (nombre de comandes, pes). Per cada pes possible de la comanda més pesada que
+    queda fora es fa una passada que obliga a incloure les comandes més pesades. Els pesos es divideixen pel seu
+    MCD i el nombre de comandes es limita a les que caben agafant les més lleugeres. La taula de cada bloc només cobreix
+    els pesos que es poden assolir amb els blocs anteriors i des dels quals encara es pot omplir la motxilla, i només es
+    guarda la de l'últim bloc. Per reconstruir la solució, de cada bloc es guarda un bit per estat (si s'ha agafat)
+    empaquetat amb np.packbits, i per tant la memòria és 1/8 de byte per estat i bloc.
+
+    El cost depèn de la capacitat i gairebé no del nombre de comandes. Amb 12.000 g el Hill Climbing és més ràpid
+    fins a unes 150 comandes i la programació dinàmica a partir d'unes 200.
+
+    Args:
+        comandes (List[Comanda]): Llista de comandes a lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+
+    Returns:
+        Tuple[List[Comanda], List[Comanda]]:
+            - Llista de comandes programades per lliurar, ordenades per compromís.
+            - Llista de comandes no programades per lliurar. La primera és la que no cap a la motxilla.
+    """
+    grups: Dict[Especialitat, List[Comanda]] = {}
+    for comanda in comandes:
+        grups.setdefault(comanda.especialitat, []).append(comanda)
+
+    if sum(comanda.pes for comanda in comandes) <= capacitatMaxima:
+        return sorted(comandes, key=lambda comanda: comanda.compromis), []
+
+    especialitats: List[Especialitat] = sorted(grups, key=lambda especialitat: especialitat.compromis)
+    divisor: int = 0
+    for especialitat in especialitats:
+        divisor = gcd(divisor, especialitat.pes)
+    pesos: List[int] = [especialitat.pes // divisor for especialitat in especialitats]
+    quantitats: List[int] = [len(grups[especialitat]) for especialitat in especialitats]
+    capacitat: int = capacitatMaxima // divisor
+    # Més comandes de les que caben agafant les més lleugeres no hi poden cabre
+    maxComandes: int = 0
+    pesLleugeres: int = 0
+    for pes, quantitat in sorted(zip(pesos, quantitats)):
+        preses: int = min(quantitat, (capacitat - pesLleugeres) // pes)
+        maxComandes += preses
+        pesLleugeres += preses * pes
+        if preses < quantitat:
+            break
+
+    millor: Optional[Tuple[float, int, List[int]]] = None
+    for pesFora in sorted(set(pesos)):
+        # Les especialitats més pesades que pesFora s'han d'incloure totes, si no hi caben no cal fer la passada
+        obligades: List[int] = [t for t, pes in enumerate(pesos) if pes > pesFora]
+        if sum(pesos[t] * quantitats[t] for t in obligades) > capacitat or sum(quantitats[t] for t in obligades) > maxComandes:
+            continue
+        resultat = motxillaAmbPesFora(especialitats, pesos, quantitats, capacitat, maxComandes, pesFora)
+        if resultat is not None and (millor is None or (-resultat[0], resultat[1]) > (-millor[0], millor[1])):
+            millor = resultat
+
+    if millor is None:
+        return [], comandes[:]
+
+    programades: List[Comanda] = []
+    noProgramades: List[Comanda] = []
+    for especialitat, quantitat in zip(especialitats, millor[2]):
+        programades += grups[especialitat][:quantitat]
+        noProgramades += grups[especialitat][quantitat:]
+    # La comanda que tanca la motxilla ha de ser la més pesada de les que queden fora
+    noProgramades.sort(key=lambda comanda: -comanda.pes)
+    return programades, noProgramades
+
+def blocs(quantitat: int) -> List[int]:
+    """
+    Divideix una quantitat en blocs de mida 1, 2, 4, ... i la resta, de manera que qualsevol quantitat
+    entre 0 i la total és la suma d'un subconjunt dels blocs.
+    """
+    mides: List[int] = []
+    mida: int = 1
+    while quantitat > 0:
+        mides.append(min(mida, quantitat))
+        quantitat -= mides[-1]
+        mida *= 2
+    return mides
+
+def motxillaAmbPesFora(especialitats: List[Especialitat], pesos: List[int], quantitats: List[int], capacitat: int, maxComandes: int, pesFora: int) -> Optional[Tuple[float, int, List[int]]]:
+    """
+    Programació dinàmica per a un pes fixat de la comanda més pesada que queda fora de la motxilla.
+
+    Les especialitats més pesades s'inclouen totes, i almenys una comanda del pes fixat ha de quedar fora.
+    L'estat és (alguna comanda del pes fixat fora, nombre de comandes, pes) i el valor és el compromís descomptat mínim.
+
+    Afegir q comandes d'una especialitat a partir de la posició k costa compromis * 0.9^k * (1 - 0.9^q) / (1 - 0.9),
+    que és la suma dels costos d'afegir-les en dos blocs consecutius. Per això cada especialitat es tracta com
+    una motxilla 0/1 de blocs binaris (1, 2, 4, ...) en lloc de provar totes les quantitats.
+
+    Agafar un bloc no canvia la marca, i deixar-lo fora només la pot activar en els blocs del pes fixat. Per això de
+    cada bloc només es guarden els bits dels estats on s'ha agafat i, en els blocs del pes fixat, els de la marca anterior.
+
+    Args:
+        especialitats (List[Especialitat]): Especialitats ordenades per compromís.
+        pesos (List[int]): Pes de cada especialitat dividit pel MCD.
+        quantitats (List[int]): Nombre de comandes de cada especialitat.
+        capacitat (int): Capacitat de la motxilla dividida pel MCD.
+        maxComandes (int): Nombre màxim de comandes que poden cabre a la motxilla.
+        pesFora (int): Pes de la comanda més pesada que queda fora.
+
+    Returns:
+        Optional[Tuple[float, int, List[int]]]:
+            - Compromís descomptat mínim, nombre de comandes i quantitat de cada especialitat, o None si no hi ha solució.
+    """
+    infinit: float = float("inf")
+    descomptes: np.ndarray = DESCOMPTE ** np.arange(maxComandes + 1)
+    # La motxilla ha de ser prou plena perquè la comanda de pes pesFora no hi càpiga
+    pesMinim: int = max(0, capacitat - pesFora + 1)
+    llistaBlocs: List[Tuple[int, int]] = [(t, q) for t, (pes, quantitat) in enumerate(zip(pesos, quantitats)) for q in ([quantitat] if pes > pesFora else blocs(quantitat))]
+    # Cada taula només cobreix els pesos [inici, final]: els que es poden assolir amb els blocs anteriors
+    # i dels quals encara es pot arribar a pesMinim amb els blocs que queden (pes restant)
+    restant: int = sum(q * pesos[t] for t, q in llistaBlocs)
+    inici: int = 0
+    final: int = 0
+    taula: np.ndarray = np.full((2, maxComandes + 1, 1), infinit)
+    taula[0, 0, 0] = 0
+    # Fins al primer bloc del pes fixat la marca no es pot activar: només cal la taula sense marca
+    files: int = 1
+    # Per cada bloc: especialitat, mida, primer pes de la taula, bits dels estats on s'ha agafat i, si és del pes fixat,
+    # bits dels estats que venen de la marca desactivada quan no s'ha agafat
+    decisions: List[Tuple[int, int, int, np.ndarray, Optional[np.ndarray]]] = []
+
+    for t, q in llistaBlocs:
+        especialitat: Especialitat = especialitats[t]
+        pes: int = pesos[t]
+        restant -= q * pes
+        nouInici: int = max(inici, pesMinim - restant)
+        nouFinal: int = min(capacitat, final + q * pes)
+        if nouInici > nouFinal:
+            return None
+        nova: np.ndarray = np.full((2, maxComandes + 1, nouFinal - nouInici + 1), infinit)
+        agafat: np.ndarray = np.zeros(nova.shape, dtype=bool)
+        senseMarca: Optional[np.ndarray] = None
+
+        if pes <= pesFora and nouInici <= final:
+            # Sense agafar el bloc el pes no canvia: pesos [nouInici, final] de les dues taules
+            anterior: np.ndarray = taula[:, :, nouInici - inici:]
+            destinacio: np.ndarray = nova[:, :, :final - nouInici + 1]
+            if pes == pesFora:
+                # Deixar fora una comanda del pes fixat activa la marca
+                millora: np.ndarray = np.zeros(nova.shape[1:], dtype=bool)
+                np.less(anterior[0], anterior[1], out=millora[:, :final - nouInici + 1])
+                destinacio[1] = np.where(millora[:, :final - nouInici + 1], anterior[0], anterior[1])
+                senseMarca = np.packbits(millora, axis=-1)
+            else:
+                destinacio[:files] = anterior[:files]
+
+        # Agafant el bloc, els pesos [primer, nouFinal] venen dels pesos [primer - q * pes, nouFinal - q * pes] de la taula anterior
+        primer: int = max(nouInici, inici + q * pes)
+        if q <= maxComandes and primer <= nouFinal:
+            cost: np.ndarray = especialitat.compromis * descomptes[:maxComandes + 1 - q] * (1 - DESCOMPTE ** q) / (1 - DESCOMPTE)
+            candidat: np.ndarray = taula[:files, :maxComandes + 1 - q, primer - q * pes - inici:nouFinal - q * pes - inici + 1] + cost[None, :, None]
+            destinacio = nova[:files, q:, primer - nouInici:]
+            millora = candidat < destinacio
+            np.copyto(destinacio, candidat, where=millora)
+            np.copyto(agafat[:files, q:, primer - nouInici:], True, where=millora)
+
+        if pes == pesFora:
+            files = 2
+        taula, inici, final = nova, nouInici, nouFinal
+        decisions.append((t, q, inici, np.packbits(agafat, axis=-1), senseMarca))
+
+    # Després de l'últim bloc la taula només té pesos a partir de pesMinim
+    finals: np.ndarray = taula[1]
+    if not np.isfinite(finals).any():
+        return None
+    # Menor compromís i, en cas d'empat, més comandes
+    costos: np.ndarray = finals.min(axis=1)
+    numComandes: int = max(range(maxComandes + 1), key=lambda k: (-costos[k], k))
+    costMinim: float = float(costos[numComandes])
+    pes = inici + int(finals[numComandes].argmin())
+
+    # Reconstrucció de les quantitats recorrent les decisions enrere
+    seleccio: List[int] = [0] * len(especialitats)
+    k: int = numComandes
+    marca: int = 1
+    for t, q, primerPes, agafat, senseMarca in reversed(decisions):
+        if bit(agafat[marca, k], pes - primerPes):
+            seleccio[t] += q
+            k, pes = k - q, pes - q * pesos[t]
+        elif senseMarca is not None and marca == 1 and bit(senseMarca[k], pes - primerPes):
+            marca = 0
+    return costMinim, numComandes, seleccio
+
+def bit(bits: np.ndarray, posicio: int) -> bool:
+    """
+    Llegeix un bit d'una fila empaquetada amb np.packbits (el primer bit és el més significatiu de cada byte).
+    """
+    return bool((bits[posicio >> 3] >> (7 - (posicio & 7))) & 1)
@@ -0,0 +1,116 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+import os, random, time
+
+from domain.comanda import Comanda
+from algorismes.veinatge import VeinatgeIntercanvi
+from algorismes.cotes import TOLERANCIA_GAP, cotaCompromis, valorObjectiu
+
+class EstadistiquesEscalada:
+    """
+    Resultat d'una de les escalades independents de escaladaMultiInici.
+    """
+
+    def __init__(self, inici: int, llavor: Optional[int], fitness: Tuple[float, int], iteracions: int, temps: float, proces: int) -> None:
+        self.inici: int = inici
+        self.llavor: Optional[int] = llavor
+        self.fitness: Tuple[float, int] = fitness
+        self.iteracions: int = iteracions
+        self.temps: float = temps
+        self.proces: int = proces
+
+    def __repr__(self) -> str:
+        return f"EstadistiquesEscalada(inici={self.inici}, llavor={self.llavor}, fitness={self.fitness}, iteracions={self.iteracions}, temps={round(self.temps, 4)}, proces={self.proces})"
+
+def escalada(comandes: List[Comanda], capacitatMaxima: int, iteracionsMaximes: int, inici: int, llavor: Optional[int],
+             compromisObjectiu: Optional[float] = None) -> Tuple[List[int], EstadistiquesEscalada]:
+    """
+    Funció que executa una escalada des d'una permutació aleatòria de les comandes.
+
+    L'escalada 0 parteix de l'ordre original, de manera que el multi-inici mai és pitjor que hillClimbing.
+
+    Args:
+        comandes (List[Comanda]): Llista de comandes a lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        iteracionsMaximes (int): Nombre màxim d'iteracions.
+        inici (int): Número de l'escalada.
+        llavor (Optional[int]): Llavor de la permutació inicial.
+        compromisObjectiu (Optional[float]): Compromís a partir del qual l'escalada s'atura.
+
+    Returns:
+        Tuple[List[int], EstadistiquesEscalada]:
+            - Permutació final com a índexs de la llista de comandes.
+            - Estadístiques de l'escalada.
+    """
+    tempsInici: float = time.perf_counter()
+    ordre: List[int] = list(range(len(comandes)))
+    if inici > 0:
+        random.Random(llavor).shuffle(ordre)
+
+    veinatge: VeinatgeIntercanvi = VeinatgeIntercanvi([comandes[k] for k in ordre], capacitatMaxima)
+    iteracions: int = veinatge.pujar(iteracionsMaximes, compromisObjectiu)
+    permutacio: List[int] = [ordre[k] for k in veinatge.ordre]
+    return permutacio, EstadistiquesEscalada(inici, llavor, veinatge.fitness(), iteracions, time.perf_counter() - tempsInici, os.getpid())
+
+def escaladaMultiInici(comandes: List[Comanda], capacitatMaxima: int, iteracionsMaximes: int = 1000, numInicis: int = 8,
+                       executor: Optional[Executor] = None, numTreballadors: Optional[int] = None, llavor: Optional[int] = None,
+                       informar: Optional[Callable[[EstadistiquesEscalada, EstadistiquesEscalada], None]] = None,
+                       toleranciaGap: float = TOLERANCIA_GAP) -> Tuple[List[Comanda], List[Comanda], List[EstadistiquesEscalada]]:
+    """
+    Funció que executa numInicis escalades independents en paral·lel i es queda amb la millor.
+
+    Cada escalada parteix d'una permutació aleatòria diferent i s'executa en un procés del pool.
+    A mesura que acaben, es crida informar amb les estadístiques de l'escalada i les de la millor fins al moment.
+    En cas d'empat de fitness guanya l'escalada amb el número més baix, per tant el resultat no depèn de l'ordre d'acabament.
+
+    Args:
+        comandes (List[Comanda]): Llista de comandes a lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        iteracionsMaximes (int): Nombre màxim d'iteracions de cada escalada.
+        numInicis (int): Nombre d'escalades.
+        executor (Optional[Executor]): Pool on s'executen les escalades. Si no n'hi ha, se'n crea un de temporal.
+        numTreballadors (Optional[int]): Nombre de processos del pool temporal. Amb 1 les escalades s'executen en aquest procés.
+        llavor (Optional[int]): Llavor de les permutacions inicials.
+        informar (Optional[Callable[[EstadistiquesEscalada, EstadistiquesEscalada], None]]): Funció que rep cada resultat i el millor fins al moment.
+        toleranciaGap (float): Gap relatiu respecte a la cota del compromís a partir del qual cada escalada s'atura.
+
+    Returns:
+        Tuple[List[Comanda], List[Comanda], List[EstadistiquesEscalada]]:
+            - Llista de comandes programades per lliurar.
+            - Llista de comandes no programades per lliurar.
+            - Estadístiques de cada escalada, ordenades per número.
+    """
+    generador: random.Random = random.Random(llavor)
+    llavors: List[int] = [generador.randrange(2**32) for _ in range(numInicis)]
+    objectiu: float = valorObjectiu(cotaCompromis(comandes, capacitatMaxima), toleranciaGap)
+    resultats: List[Tuple[List[int], EstadistiquesEscalada]] = []
+    millor: Optional[Tuple[List[int], EstadistiquesEscalada]] = None
+
+    def afegir(resultat: Tuple[List[int], EstadistiquesEscalada]) -> None:
+        nonlocal millor
+        resultats.append(resultat)
+        if millor is None or (resultat[1].fitness, -resultat[1].inici) > (millor[1].fitness, -millor[1].inici):
+            millor = resultat
+        if informar is not None:
+            informar(resultat[1], millor[1])
+
+    if executor is None and numTreballadors == 1:
+        for inici in range(numInicis):
+            afegir(escalada(comandes, capacitatMaxima, iteracionsMaximes, inici, llavors[inici], objectiu))
+    else:
+        pool: Executor = executor if executor is not None else ProcessPoolExecutor(numTreballadors)
+        try:
+            futurs: List[Future] = [pool.submit(escalada, comandes, capacitatMaxima, iteracionsMaximes, inici, llavors[inici], objectiu) for inici in range(numInicis)]
+            for futur in as_completed(futurs):
+                afegir(futur.result())
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+    if millor is None:
+        return [], comandes[:], []
+
+    permutacio, estadistiques = millor
+    solucio: List[Comanda] = [comandes[k] for k in permutacio]
+    numComandes: int = estadistiques.fitness[1]
+    return solucio[:numComandes], solucio[numComandes:], sorted((resultat[1] for resultat in resultats), key=lambda e: e.inici)
@@ -0,0 +1,122 @@
+from typing import List, Optional, Tuple, Union
+import heapq
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+
+def hillClimbingReferencia(comandes: List[Comanda], capacitatMaxima: int, iteracionsMaximes: int = 1000) -> Tuple[List[Comanda], List[Comanda]]:
+    """
+    Implementació original del Hill Climbing, que genera i avalua cada veí copiant la llista de comandes.
+
+    Es conserva com a referència per comprovar que hillClimbing troba solucions de la mateixa qualitat.
+
+    Args:
+        comandes (List[Comanda]): Llista de comandes a lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        iteracionsMaximes (int): Nombre màxim d'iteracions.
+
+    Returns:
+        Tuple[List[Comanda], List[Comanda]]:
+            - Llista de comandes programades per lliurar.
+            - Llista de comandes no programades per lliurar.
+    """
+
+    def fitness(comandes: List[Comanda], capacitatMaxima: int,) -> Tuple[float, int]:
+        """
+        Funció que calcula el fitness d'una solució.
+
+        Args:
+            comandes (List[Comanda]): Llista de comandes a lliurar.
+            capacitatMaxima (int): Capacitat màxima de la motxilla.
+
+        Returns:
+            Tuple[int, int]: Tupla amb el fitness de la solució i el nombre de comandes.
+        """
+        pesAcumulat: int = 0
+        numComandes: int = 0
+        sumCompromis: float = 0
+        for comanda in comandes:
+            if pesAcumulat + comanda.especialitat.pes > capacitatMaxima:
+                break
+            pesAcumulat += comanda.especialitat.pes
+            # El compromís de les comandes es multiplica per 0.9^numComandes
+            # L'objectiu és donar més pes a les comandes més urgents
+            # i garantir que dintre de la solució estiguin ordenades per compromís.
+            sumCompromis += comanda.especialitat.compromis * 0.9 ** numComandes 
+            numComandes += 1
+        return (-sumCompromis, numComandes)
+
+    def generarVeins(comandes: List[Comanda]) -> List[List[Comanda]]:
+        """
+        Funció que genera veins d'una solució.
+
+        Args:
+            comandes (List[Comanda]): Llista de comandes a lliurar.
+
+        Returns:
+            List[List[Comanda]]: Llista de veins de la solució.
+        """
+        veins: List[List[Comanda]] = []
+        for i in range(len(comandes)):
+            for j in range(i + 1, len(comandes)):
+                vei: List[Comanda] = comandes[:]
+                vei[i], vei[j] = vei[j], vei[i]
+                veins.append(vei)
+        return veins
+    
+    solucioActual: List[Comanda] = comandes[:]
+    fitnessAcutal: Tuple[float, int] = fitness(solucioActual, capacitatMaxima)
+    repeticions: int = 0
+    for i in range(iteracionsMaximes):
+        veins: List[List[Comanda]] = generarVeins(solucioActual)
+        veinsFitness: List[Tuple[Tuple[float, int], List[Comanda]]] = [(fitness(vei, capacitatMaxima), vei) for vei in veins]
+        millorFitness, millorVei = max(veinsFitness, key=lambda x: x[0])
+        if millorFitness > fitnessAcutal:
+            solucioActual = millorVei
+            fitnessAcutal = millorFitness
+            repeticions = 0
+        else:
+            repeticions += 1
+            if repeticions > iteracionsMaximes*0.1:
+                break
+        
+    solucioFinal: List[Comanda] = []
+    pesAcumulat: int = 0
+    for comanda in solucioActual[:]:
+        if pesAcumulat + comanda.especialitat.pes > capacitatMaxima:
+            break
+        pesAcumulat += comanda.especialitat.pes
+        solucioFinal.append(comanda)
+        solucioActual.remove(comanda)
+    return solucioFinal, solucioActual
+
+def bestFirstSearchReferencia(inici: Coordenada, llista: Union[List[Restaurant], List[Comanda]], comanda: Comanda) -> Tuple[Optional[Union[Restaurant, Comanda]], float]:
+    """
+    Implementació original del Best First Search, que calcula la geodèsica a tots els candidats amb geopy.
+
+    Es conserva com a referència per comprovar que best_first_search troba el mateix restaurant o comanda.
+
+    Args:
+        inici (Coordenada): Coordenada inicial de la ubicació actual.
+        restaurants (List[Restaurant]): Llista de restaurants disponibles.
+        comanda (Comanda): Comanda a lliurar.
+
+    Returns:
+        Tuple[Optional[Restaurant], float]:
+            - Restaurant més proper que ofereixi l'especialitat de la comanda.
+            - Distància entre la ubicació actual i el restaurant més proper.
+    """
+
+    cua: List[Tuple[float, Union[Optional[Restaurant], Optional[Comanda]]]] = []
+    escollit: Union[Optional[Restaurant], Optional[Comanda]] = None
+    distancia: float = 0
+    
+    for r in llista:
+        if r.especialitat == comanda.especialitat:
+            distance = inici.distancia(r.coordenades)
+            heapq.heappush(cua, (distance, r))
+
+    while cua:
+        distancia, restaurant = heapq.heappop(cua)
+        return restaurant, distancia
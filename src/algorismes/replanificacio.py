@@ -0,0 +1,282 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+from domain.distancies import MatriuDistancies
+from algorismes.millorarRuta import millorarRuta
+from instrumentacio import instrumentacio
+
+# Temps màxim en segons de la reparació de l'ordre de lliurament de cada viatge afectat per una actualització
+TEMPS_REPARACIO: float = 0.005
+
+class Viatge:
+    """
+    Viatge pendent d'un pla: les comandes en ordre de recollida, el restaurant de cadascuna i l'ordre de lliurament.
+    """
+
+    __slots__ = ("recollides", "restaurants", "lliuraments", "pes")
+
+    def __init__(self, recollides: List[Comanda], restaurants: List[Restaurant], lliuraments: List[Comanda]) -> None:
+        self.recollides: List[Comanda] = recollides
+        self.restaurants: List[Restaurant] = restaurants
+        self.lliuraments: List[Comanda] = lliuraments
+        self.pes: int = sum(comanda.pes for comanda in recollides)
+
+    def punts(self) -> List[Coordenada]:
+        return [restaurant.coordenades for restaurant in self.restaurants] + [comanda.coordenades for comanda in self.lliuraments]
+
+    def __repr__(self) -> str:
+        return f"Viatge(comandes={[comanda.id for comanda in self.recollides]}, lliuraments={[comanda.id for comanda in self.lliuraments]}, pes={self.pes})"
+
+class Insercio:
+    """
+    Inserció més barata d'una comanda al pla.
+    """
+
+    __slots__ = ("cost", "viatge", "recollida", "lliurament", "restaurant")
+
+    def __init__(self, cost: float, viatge: int, recollida: int, lliurament: int, restaurant: Restaurant) -> None:
+        self.cost: float = cost
+        # Posició del viatge (len(viatges) si s'ha de fer un viatge nou al final) i posicions de la recollida i del lliurament dins del viatge
+        self.viatge: int = viatge
+        self.recollida: int = recollida
+        self.lliurament: int = lliurament
+        self.restaurant: Restaurant = restaurant
+
+class Pla:
+    """
+    Pla de la resta del torn d'un repartidor, que es pot actualitzar quan arriben o es cancel·len comandes
+    sense tornar a planificar-ho tot.
+
+    El repartidor és a la ubicació actual amb la motxilla ja recollida (les comandes en ordre de lliurament)
+    i després fa els viatges pendents i torna a l'oficina. Tot el pla és una sola ruta i el cost d'una inserció
+    és l'augment de la seva longitud.
+
+    Una comanda nova s'insereix amb inserció més barata: per cada viatge amb capacitat suficient es prova cada posició
+    de recollida, amb el restaurant de l'especialitat que menys allarga la ruta en aquella posició, i cada posició de lliurament,
+    i també un viatge nou al final. Una comanda cancel·lada es treu del seu viatge amb la seva recollida.
+    Després només es repara l'ordre de lliurament dels viatges afectats, amb 2-opt i Or-opt.
+    """
+
+    def __init__(self, oficina: Coordenada, ubicacio: Coordenada, viatges: List[Viatge], capacitatMaxima: int, restaurants: List[Restaurant],
+                 repetirRestaurants: bool, matriu: MatriuDistancies, motxilla: Optional[List[Comanda]] = None, mantenirPrioritat: bool = True,
+                 tempsReparacio: float = TEMPS_REPARACIO) -> None:
+        """
+        Args:
+            oficina (Coordenada): Coordenada on acaba el torn.
+            ubicacio (Coordenada): Ubicació actual del repartidor.
+            viatges (List[Viatge]): Viatges pendents, en ordre.
+            capacitatMaxima (int): Capacitat màxima de la motxilla.
+            restaurants (List[Restaurant]): Restaurants on es pot recollir. Sense repetir restaurants, els dels viatges pendents es treuen dels disponibles.
+            repetirRestaurants (bool): Indica si es poden repetir els restaurants visitats.
+            matriu (MatriuDistancies): Matriu de distàncies. Les comandes noves que no hi són es calculen a demanda.
+            motxilla (Optional[List[Comanda]]): Comandes ja recollides, en ordre de lliurament.
+            mantenirPrioritat (bool): Indica si les insercions i les reparacions han de mantenir l'ordre per compromís.
+            tempsReparacio (float): Temps màxim en segons de la reparació de cada viatge afectat.
+        """
+        self.oficina: Coordenada = oficina
+        self.ubicacio: Coordenada = ubicacio
+        self.viatges: List[Viatge] = viatges
+        self.capacitatMaxima: int = capacitatMaxima
+        self.repetirRestaurants: bool = repetirRestaurants
+        self.matriu: MatriuDistancies = matriu
+        self.motxilla: List[Comanda] = motxilla if motxilla is not None else []
+        self.mantenirPrioritat: bool = mantenirPrioritat
+        self.tempsReparacio: float = tempsReparacio
+
+        usats: set = set() if repetirRestaurants else {restaurant for viatge in viatges for restaurant in viatge.restaurants}
+        self.disponibles: Dict[int, List[Restaurant]] = {}
+        for restaurant in restaurants:
+            if restaurant not in usats:
+                self.disponibles.setdefault(restaurant.codiEspecialitat, []).append(restaurant)
+
+    def __len__(self) -> int:
+        return len(self.motxilla) + sum(len(viatge.lliuraments) for viatge in self.viatges)
+
+    def ruta(self) -> List[Coordenada]:
+        ruta: List[Coordenada] = [self.ubicacio] + [comanda.coordenades for comanda in self.motxilla]
+        for viatge in self.viatges:
+            ruta.extend(viatge.punts())
+        ruta.append(self.oficina)
+        return ruta
+
+    def longitud(self) -> float:
+        """
+        Distància que queda fins a tornar a l'oficina, en metres.
+        """
+        ruta: List[Coordenada] = self.ruta()
+        return sum(self.matriu.distancia(a, b) for a, b in zip(ruta, ruta[1:]))
+
+    def inici(self, posicio: int) -> Coordenada:
+        """
+        Punt on comença el viatge de la posició donada: l'últim lliurament anterior o la ubicació actual.
+        """
+        if posicio > 0:
+            return self.viatges[posicio - 1].lliuraments[-1].coordenades
+        return self.motxilla[-1].coordenades if self.motxilla else self.ubicacio
+
+    def final(self, posicio: int) -> Coordenada:
+        """
+        Punt on va el repartidor després del viatge de la posició donada: el primer restaurant del següent o l'oficina.
+        """
+        return self.viatges[posicio + 1].restaurants[0].coordenades if posicio + 1 < len(self.viatges) else self.oficina
+
+    def posicionsLliurament(self, lliuraments: List[Comanda], comanda: Comanda) -> List[int]:
+        """
+        Posicions de lliurament on es pot inserir la comanda. Per mantenir la prioritat, la comanda va al costat de les del seu compromís
+        o, si no n'hi ha cap, entre dos trams de compromisos diferents, sense partir-ne cap.
+        """
+        if not self.mantenirPrioritat:
+            return list(range(len(lliuraments) + 1))
+        if any(altra.compromis == comanda.compromis for altra in lliuraments):
+            return [j for j in range(len(lliuraments) + 1)
+                    if (j > 0 and lliuraments[j - 1].compromis == comanda.compromis) or (j < len(lliuraments) and lliuraments[j].compromis == comanda.compromis)]
+        return [j for j in range(len(lliuraments) + 1) if j == 0 or j == len(lliuraments) or lliuraments[j - 1].compromis != lliuraments[j].compromis]
+
+    def millorInsercio(self, comanda: Comanda) -> Insercio:
+        """
+        Busca la inserció de la comanda que menys allarga la ruta del pla.
+
+        Args:
+            comanda (Comanda): Comanda nova.
+
+        Returns:
+            Insercio: Cost, viatge, posicions i restaurant de la millor inserció.
+        """
+        if comanda.pes > self.capacitatMaxima:
+            raise ValueError(f"La comanda {comanda.id} pesa {comanda.pes} g i no cap a la motxilla, amb una capacitat de {self.capacitatMaxima} g.")
+        candidats: Optional[List[Restaurant]] = self.disponibles.get(comanda.codiEspecialitat)
+        if not candidats:
+            raise ValueError(f"No hi ha cap restaurant disponible que ofereixi l'especialitat {comanda.especialitat.especialitat} per a la comanda {comanda.id}.")
+        coordenades: List[Coordenada] = [restaurant.coordenades for restaurant in candidats]
+        distancia = self.matriu.distancia
+        # Distància de cada restaurant candidat fins a la comanda, comuna a totes les posicions on la recollida va just abans del lliurament
+        finsComanda: np.ndarray = self.matriu.distanciesFins(coordenades, comanda.coordenades)
+
+        def desviament(anterior: Coordenada, seguent: Coordenada) -> Tuple[float, int]:
+            costos: np.ndarray = self.matriu.distancies(anterior, coordenades) + self.matriu.distanciesFins(coordenades, seguent) - distancia(anterior, seguent)
+            k: int = int(np.argmin(costos))
+            return float(costos[k]), k
+
+        # Viatge nou al final, abans de tornar a l'oficina
+        anterior: Coordenada = self.inici(len(self.viatges))
+        costos: np.ndarray = self.matriu.distancies(anterior, coordenades) + finsComanda + distancia(comanda.coordenades, self.oficina) - distancia(anterior, self.oficina)
+        k: int = int(np.argmin(costos))
+        millor: Insercio = Insercio(float(costos[k]), len(self.viatges), 0, 0, candidats[k])
+
+        for posicio, viatge in enumerate(self.viatges):
+            if viatge.pes + comanda.pes > self.capacitatMaxima:
+                continue
+            final: Coordenada = self.final(posicio)
+            recollides: List[Coordenada] = [self.inici(posicio)] + [restaurant.coordenades for restaurant in viatge.restaurants]
+            lliuraments: List[Coordenada] = [altra.coordenades for altra in viatge.lliuraments]
+            n: int = len(viatge.restaurants)
+            # La recollida a la posició i va entre recollides[i] i el punt següent, i el lliurament a la posició j entre anteriors[j] i seguents[j]
+            costosRecollida: List[Tuple[float, int]] = [desviament(recollides[i], (recollides + lliuraments[:1])[i + 1]) for i in range(n + 1)]
+            anteriors: List[Coordenada] = recollides[-1:] + lliuraments
+            seguents: List[Coordenada] = lliuraments + [final]
+            # La comanda nova no acostuma a ser a la matriu: les seves distàncies es calculen de cop per a totes les posicions
+            desviaments: List[float] = (self.matriu.distanciesFins(anteriors, comanda.coordenades) + self.matriu.distancies(comanda.coordenades, seguents)).tolist()
+            costosLliurament: Dict[int, float] = {j: desviaments[j] - distancia(anteriors[j], seguents[j]) for j in self.posicionsLliurament(viatge.lliuraments, comanda)}
+            if not costosLliurament:
+                continue
+
+            opcions: List[Tuple[float, int, int, int]] = []
+            j: int = min(costosLliurament, key=costosLliurament.get)
+            i: int = min(range(n), key=lambda i: costosRecollida[i][0])
+            opcions.append((costosRecollida[i][0] + costosLliurament[j], i, j, costosRecollida[i][1]))
+            posteriors: List[int] = [j for j in costosLliurament if j > 0]
+            if posteriors:
+                j = min(posteriors, key=costosLliurament.get)
+                opcions.append((costosRecollida[n][0] + costosLliurament[j], n, j, costosRecollida[n][1]))
+            if 0 in costosLliurament:
+                # L'última recollida i el primer lliurament queden junts: el restaurant va just abans de la comanda
+                costos = self.matriu.distancies(recollides[-1], coordenades) + finsComanda + distancia(comanda.coordenades, seguents[0]) - distancia(recollides[-1], seguents[0])
+                k = int(np.argmin(costos))
+                opcions.append((float(costos[k]), n, 0, k))
+            cost, i, j, k = min(opcions, key=lambda opcio: opcio[0])
+            if cost < millor.cost:
+                millor = Insercio(cost, posicio, i, j, candidats[k])
+        return millor
+
+    def afegir(self, comanda: Comanda) -> Viatge:
+        """
+        Insereix una comanda nova a la posició més barata del pla.
+
+        Returns:
+            Viatge: Viatge on s'ha inserit la comanda.
+        """
+        insercio: Insercio = self.millorInsercio(comanda)
+        if insercio.viatge == len(self.viatges):
+            self.viatges.append(Viatge([comanda], [insercio.restaurant], [comanda]))
+        else:
+            viatge: Viatge = self.viatges[insercio.viatge]
+            viatge.recollides.insert(insercio.recollida, comanda)
+            viatge.restaurants.insert(insercio.recollida, insercio.restaurant)
+            viatge.lliuraments.insert(insercio.lliurament, comanda)
+            viatge.pes += comanda.pes
+        if not self.repetirRestaurants:
+            self.disponibles[comanda.codiEspecialitat].remove(insercio.restaurant)
+        if instrumentacio.actiu:
+            instrumentacio.comptar("insercions")
+        return self.viatges[insercio.viatge]
+
+    def cancellar(self, comanda: Comanda) -> Optional[Viatge]:
+        """
+        Treu una comanda del pla. Si ja és a la motxilla només es deixa de lliurar; si no, també es treu la seva recollida
+        i, sense repetir restaurants, el restaurant torna a estar disponible.
+
+        Returns:
+            Optional[Viatge]: Viatge afectat, o None si la comanda era a la motxilla o el viatge s'ha quedat buit i s'ha eliminat.
+        """
+        if comanda in self.motxilla:
+            self.motxilla.remove(comanda)
+            return None
+        for posicio, viatge in enumerate(self.viatges):
+            if comanda in viatge.lliuraments:
+                i: int = viatge.recollides.index(comanda)
+                viatge.recollides.pop(i)
+                restaurant: Restaurant = viatge.restaurants.pop(i)
+                viatge.lliuraments.remove(comanda)
+                viatge.pes -= comanda.pes
+                if not self.repetirRestaurants:
+                    self.disponibles.setdefault(restaurant.codiEspecialitat, []).append(restaurant)
+                if not viatge.recollides:
+                    del self.viatges[posicio]
+                    return None
+                return viatge
+        raise ValueError(f"La comanda {comanda.id} no és al pla.")
+
+    def reparar(self, viatge: Viatge) -> None:
+        """
+        Millora l'ordre de lliurament d'un viatge des de la seva última recollida.
+        """
+        viatge.lliuraments = millorarRuta(viatge.restaurants[-1].coordenades, viatge.lliuraments, self.matriu.distancia, self.tempsReparacio, self.mantenirPrioritat)
+
+    def actualitzar(self, afegides: List[Comanda], cancellades: List[Comanda]) -> List[Viatge]:
+        """
+        Aplica un canvi de comandes al pla: primer les cancel·lacions, perquè les comandes noves puguin aprofitar la capacitat alliberada,
+        i després les insercions. Només es reparen els viatges afectats.
+
+        Args:
+            afegides (List[Comanda]): Comandes noves.
+            cancellades (List[Comanda]): Comandes cancel·lades.
+
+        Returns:
+            List[Viatge]: Viatges afectats que queden al pla.
+        """
+        with instrumentacio.fase("replanificar", afegides=len(afegides), cancellades=len(cancellades)):
+            afectats: List[Viatge] = []
+            for comanda in cancellades:
+                afectats.append(self.cancellar(comanda))
+            for comanda in afegides:
+                afectats.append(self.afegir(comanda))
+            pendents: set = {id(viatge) for viatge in self.viatges}
+            reparats: List[Viatge] = []
+            for viatge in afectats:
+                if viatge is not None and id(viatge) in pendents and all(viatge is not altre for altre in reparats):
+                    self.reparar(viatge)
+                    reparats.append(viatge)
+        return reparats
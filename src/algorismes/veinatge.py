@@ -0,0 +1,143 @@
+from bisect import bisect_right
+from itertools import accumulate
+from operator import mul
+from typing import List, Optional, Tuple
+
+from domain.comanda import Comanda
+from instrumentacio import instrumentacio
+
+# Factor de descompte del compromís per posició dins la motxilla
+DESCOMPTE: float = 0.9
+
+class VeinatgeIntercanvi:
+    """
+    Veïnatge d'intercanvis (swap) per al Hill Climbing de la motxilla.
+
+    Manté les sumes prefix del pes i del compromís descomptat de la solució actual, de manera que
+    el fitness de l'intercanvi de dues posicions es calcula en O(log n) sense copiar la llista.
+    Només l'intercanvi escollit s'aplica a la solució.
+    """
+
+    def __init__(self, comandes: List[Comanda], capacitatMaxima: int) -> None:
+        self.solucio: List[Comanda] = comandes[:]
+        # Posició de cada comanda de la solució a la llista original
+        self.ordre: List[int] = list(range(len(comandes)))
+        self.capacitatMaxima: int = capacitatMaxima
+        self.pesos: List[int] = [comanda.pes for comanda in self.solucio]
+        self.compromisos: List[int] = [comanda.compromis for comanda in self.solucio]
+        self.descomptes: List[float] = [DESCOMPTE ** k for k in range(len(self.solucio))]
+        self.recalcular()
+
+    def recalcular(self) -> None:
+        """
+        Recalcula les sumes prefix de la solució actual.
+
+        pesAcumulat[k] és el pes de les k primeres comandes i compromisAcumulat[k] la suma del seu compromís
+        descomptat. numComandes és el nombre de comandes que caben a la motxilla començant pel principi.
+        """
+        self.pesAcumulat: List[int] = list(accumulate(self.pesos, initial=0))
+        self.compromisAcumulat: List[float] = list(accumulate(map(mul, self.compromisos, self.descomptes), initial=0))
+        self.numComandes: int = bisect_right(self.pesAcumulat, self.capacitatMaxima) - 1
+
+    def fitness(self) -> Tuple[float, int]:
+        """
+        Fitness de la solució actual.
+
+        Returns:
+            Tuple[float, int]: Tupla amb el fitness de la solució i el nombre de comandes.
+        """
+        return (-self.compromisAcumulat[self.numComandes], self.numComandes)
+
+    def avaluar(self, i: int, j: int) -> Tuple[float, int]:
+        """
+        Calcula el fitness de la solució que resulta d'intercanviar les posicions i < j, sense aplicar-lo.
+
+        Les posicions no canvien de lloc, per tant només cal trobar el nou punt de tall de la motxilla
+        amb una cerca binària sobre les sumes prefix i corregir la contribució de les posicions i i j.
+
+        Args:
+            i (int): Primera posició de l'intercanvi.
+            j (int): Segona posició de l'intercanvi (j > i).
+
+        Returns:
+            Tuple[float, int]: Tupla amb el fitness del veí i el nombre de comandes.
+        """
+        n: int = len(self.solucio)
+        diferencia: int = self.pesos[j] - self.pesos[i]
+        if i > self.numComandes or (diferencia == 0 and self.compromisos[i] == self.compromisos[j]):
+            return self.fitness()
+
+        # Entre i i j-1 el pes acumulat augmenta en la diferència de pes, a partir de j torna a ser l'original
+        tall: int = bisect_right(self.pesAcumulat, self.capacitatMaxima - diferencia, i + 1, j + 1)
+        if tall > j:
+            tall = bisect_right(self.pesAcumulat, self.capacitatMaxima, j + 1, n + 1)
+        numComandes: int = tall - 1
+
+        sumCompromis: float = self.compromisAcumulat[numComandes]
+        if i < numComandes:
+            sumCompromis += (self.compromisos[j] - self.compromisos[i]) * self.descomptes[i]
+        if j < numComandes:
+            sumCompromis += (self.compromisos[i] - self.compromisos[j]) * self.descomptes[j]
+        return (-sumCompromis, numComandes)
+
+    def millorMoviment(self) -> Tuple[Tuple[float, int], Optional[Tuple[int, int]]]:
+        """
+        Busca el millor intercanvi del veïnatge. En cas d'empat es queda el primer en ordre (i, j).
+
+        Els intercanvis amb i més enllà del punt de tall no modifiquen la motxilla i no s'avaluen.
+
+        Returns:
+            Tuple[Tuple[float, int], Optional[Tuple[int, int]]]:
+                - Fitness del millor veí.
+                - Posicions de l'intercanvi, o None si no hi ha veïns.
+        """
+        n: int = len(self.solucio)
+        millorFitness: Tuple[float, int] = (float("-inf"), 0)
+        millorMoviment: Optional[Tuple[int, int]] = None
+        for i in range(min(self.numComandes + 1, n)):
+            for j in range(i + 1, n):
+                fitnessVei: Tuple[float, int] = self.avaluar(i, j)
+                if fitnessVei > millorFitness:
+                    millorFitness, millorMoviment = fitnessVei, (i, j)
+        if instrumentacio.actiu:
+            files: int = min(self.numComandes + 1, n)
+            instrumentacio.comptar("veinsHillClimbing", files * (2 * n - files - 1) // 2)
+        return millorFitness, millorMoviment
+
+    def aplicar(self, i: int, j: int) -> None:
+        """
+        Aplica l'intercanvi de les posicions i i j a la solució actual.
+
+        Args:
+            i (int): Primera posició de l'intercanvi.
+            j (int): Segona posició de l'intercanvi.
+        """
+        for llista in (self.solucio, self.ordre, self.pesos, self.compromisos):
+            llista[i], llista[j] = llista[j], llista[i]
+        self.recalcular()
+
+    def pujar(self, iteracionsMaximes: int, compromisObjectiu: Optional[float] = None) -> int:
+        """
+        Aplica el millor intercanvi mentre millori la solució, fins a un màxim d'iteracions.
+
+        La cerca és determinista: si cap veí millora la solució, les iteracions següents tampoc ho faran.
+        També s'atura quan el compromís de la solució arriba al compromís objectiu (vegeu algorismes.cotes),
+        sense avaluar el veïnatge sencer per comprovar que no hi ha cap millora.
+
+        Args:
+            iteracionsMaximes (int): Nombre màxim d'iteracions.
+            compromisObjectiu (Optional[float]): Compromís descomptat a partir del qual la solució és prou bona.
+
+        Returns:
+            int: Nombre d'intercanvis aplicats.
+        """
+        fitnessActual: Tuple[float, int] = self.fitness()
+        for iteracio in range(iteracionsMaximes):
+            if compromisObjectiu is not None and -fitnessActual[0] <= compromisObjectiu:
+                return iteracio
+            millorFitness, millorMoviment = self.millorMoviment()
+            if millorMoviment is None or millorFitness <= fitnessActual:
+                return iteracio
+            self.aplicar(*millorMoviment)
+            fitnessActual = self.fitness()
+        return iteracionsMaximes
@@ -0,0 +1,165 @@
+from typing import Dict, List, Optional
+import math
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+from domain.distancies import MIDA_BLOC, RADI_MITJA
+
+# Comandes per zona per defecte: el cost de cada zona creix més que linealment amb la seva mida, el de totes plegades amb el nombre de zones
+MIDA_ZONA: int = 250
+ITERACIONS_KMITJANES: int = 50
+METODES_ZONES: List[str] = ["kmitjanes", "quadricula"]
+
+class Zona:
+    """
+    Comandes i restaurants d'una zona de la ciutat, que es planifica independentment de les altres.
+    """
+
+    def __init__(self, numero: int, comandes: List[Comanda], restaurants: List[Restaurant], costura: bool = False) -> None:
+        self.numero: int = numero
+        self.comandes: List[Comanda] = comandes
+        self.restaurants: List[Restaurant] = restaurants
+        # La zona de costura té les comandes que no s'han pogut servir a la seva zona, amb els restaurants de tota la ciutat
+        self.costura: bool = costura
+
+    def __repr__(self) -> str:
+        return f"Zona(numero={self.numero}, comandes={len(self.comandes)}, restaurants={len(self.restaurants)}, costura={self.costura})"
+
+def projectar(coordenades: List[Coordenada], origen: Coordenada) -> np.ndarray:
+    """
+    Projecció equirectangular en metres al voltant de l'origen. A escala de ciutat les distàncies euclidianes
+    entre els punts projectats són prou bones per agrupar-los.
+
+    Returns:
+        np.ndarray: Coordenades x (est) i y (nord) de cada punt (n x 2).
+    """
+    latituds: np.ndarray = np.radians([coordenada.latitud for coordenada in coordenades])
+    longituds: np.ndarray = np.radians([coordenada.longitud for coordenada in coordenades])
+    return np.column_stack((RADI_MITJA * math.cos(math.radians(origen.latitud)) * (longituds - math.radians(origen.longitud)),
+                            RADI_MITJA * (latituds - math.radians(origen.latitud)))).reshape(-1, 2)
+
+def mesProper(punts: np.ndarray, centres: np.ndarray) -> np.ndarray:
+    """
+    Índex del centre més proper a cada punt, per blocs de files per limitar la memòria temporal.
+    """
+    resultat: np.ndarray = np.empty(len(punts), dtype=np.int64)
+    files: int = max(1, MIDA_BLOC // max(len(centres), 1))
+    for inici in range(0, len(punts), files):
+        bloc: np.ndarray = punts[inici:inici + files]
+        resultat[inici:inici + files] = np.argmin(((bloc[:, None, :] - centres[None, :, :]) ** 2).sum(axis=2), axis=1)
+    return resultat
+
+def kMitjanes(punts: np.ndarray, k: int, llavor: Optional[int] = None, iteracions: int = ITERACIONS_KMITJANES) -> np.ndarray:
+    """
+    Agrupa els punts en k grups amb l'algorisme de Lloyd, amb els centres inicials triats amb k-means++.
+
+    Args:
+        punts (np.ndarray): Punts projectats (n x 2).
+        k (int): Nombre de grups.
+        llavor (Optional[int]): Llavor del generador aleatori.
+        iteracions (int): Nombre màxim d'iteracions.
+
+    Returns:
+        np.ndarray: Grup de cada punt.
+    """
+    generador: np.random.Generator = np.random.default_rng(llavor)
+    centres: np.ndarray = np.empty((k, 2))
+    centres[0] = punts[generador.integers(len(punts))]
+    distancies: np.ndarray = np.sum((punts - centres[0]) ** 2, axis=1)
+    for i in range(1, k):
+        # Cada centre nou es tria amb probabilitat proporcional al quadrat de la distància al centre més proper
+        total: float = float(distancies.sum())
+        centres[i] = punts[generador.choice(len(punts), p=distancies / total) if total > 0 else generador.integers(len(punts))]
+        distancies = np.minimum(distancies, np.sum((punts - centres[i]) ** 2, axis=1))
+
+    grups: np.ndarray = np.zeros(len(punts), dtype=np.int64)
+    for iteracio in range(iteracions):
+        nous: np.ndarray = mesProper(punts, centres)
+        if iteracio > 0 and np.array_equal(nous, grups):
+            break
+        grups = nous
+        for i in range(k):
+            membres: np.ndarray = punts[grups == i]
+            if len(membres):
+                centres[i] = membres.mean(axis=0)
+    return grups
+
+def quadricula(punts: np.ndarray, costat: float) -> np.ndarray:
+    """
+    Agrupa els punts per cel·les quadrades de la quadrícula centrada a l'origen de la projecció.
+
+    Returns:
+        np.ndarray: Grup de cada punt, numerats de 0 en l'ordre de les cel·les.
+    """
+    cellaX: np.ndarray = np.floor(punts[:, 0] / costat + 0.5).astype(np.int64)
+    cellaY: np.ndarray = np.floor(punts[:, 1] / costat + 0.5).astype(np.int64)
+    _, grups = np.unique(np.column_stack((cellaX, cellaY)), axis=0, return_inverse=True)
+    return grups.reshape(-1)
+
+def zonificar(oficina: Coordenada, comandes: List[Comanda], restaurants: List[Restaurant], midaZona: int = MIDA_ZONA,
+              metode: str = "kmitjanes", llavor: Optional[int] = None) -> List[Zona]:
+    """
+    Divideix les comandes en zones d'unes midaZona comandes i assigna cada restaurant a la zona amb el centre més proper.
+
+    Args:
+        oficina (Coordenada): Centre de la projecció i de la quadrícula.
+        comandes (List[Comanda]): Comandes a repartir.
+        restaurants (List[Restaurant]): Restaurants a repartir.
+        midaZona (int): Nombre aproximat de comandes per zona.
+        metode (str): "kmitjanes" per agrupar les comandes amb k-means o "quadricula" per cel·les quadrades al voltant de l'oficina,
+            amb el costat que dona midaZona comandes per cel·la si les comandes estiguessin repartides uniformement.
+        llavor (Optional[int]): Llavor del k-means.
+
+    Returns:
+        List[Zona]: Zones amb alguna comanda.
+    """
+    if metode not in METODES_ZONES:
+        raise ValueError(f"El mètode {metode} no existeix. Els mètodes disponibles són: {', '.join(METODES_ZONES)}.")
+    if not comandes:
+        return []
+    puntsComandes: np.ndarray = projectar([comanda.coordenades for comanda in comandes], oficina)
+    numZones: int = max(1, math.ceil(len(comandes) / midaZona))
+    if metode == "kmitjanes":
+        grups: np.ndarray = kMitjanes(puntsComandes, min(numZones, len(comandes)), llavor)
+    else:
+        amplada, alcada = np.ptp(puntsComandes, axis=0)
+        grups = quadricula(puntsComandes, max(math.sqrt(max(amplada, 1.0) * max(alcada, 1.0) / numZones), 1.0))
+
+    etiquetes: List[int] = sorted(set(grups.tolist()))
+    zones: List[Zona] = [Zona(numero + 1, [], []) for numero in range(len(etiquetes))]
+    posicio: Dict[int, int] = {etiqueta: numero for numero, etiqueta in enumerate(etiquetes)}
+    for comanda, grup in zip(comandes, grups.tolist()):
+        zones[posicio[grup]].comandes.append(comanda)
+
+    if restaurants:
+        centres: np.ndarray = np.array([puntsComandes[grups == etiqueta].mean(axis=0) for etiqueta in etiquetes])
+        puntsRestaurants: np.ndarray = projectar([restaurant.coordenades for restaurant in restaurants], oficina)
+        for restaurant, zona in zip(restaurants, mesProper(puntsRestaurants, centres).tolist()):
+            zones[zona].restaurants.append(restaurant)
+    return zones
+
+def separarSobrants(zona: Zona, repetirRestaurants: bool) -> List[Comanda]:
+    """
+    Treu de la zona les comandes que no s'hi poden servir: les que no tenen cap restaurant de la seva especialitat a la zona
+    i, si els restaurants no es poden repetir, les que en necessiten més dels que hi ha. Les comandes que es queden
+    són les primeres per compromís de cada especialitat.
+
+    Returns:
+        List[Comanda]: Comandes sobrants, que s'han de planificar amb els restaurants de tota la ciutat.
+    """
+    disponibles: Dict[int, int] = {}
+    for restaurant in zona.restaurants:
+        disponibles[restaurant.codiEspecialitat] = disponibles.get(restaurant.codiEspecialitat, 0) + 1
+    sobrants: List[Comanda] = []
+    for comanda in sorted(zona.comandes, key=lambda comanda: comanda.compromis):
+        if disponibles.get(comanda.codiEspecialitat, 0) > 0:
+            if not repetirRestaurants:
+                disponibles[comanda.codiEspecialitat] -= 1
+        else:
+            sobrants.append(comanda)
+    if sobrants:
+        descartades: set = {id(comanda) for comanda in sobrants}
+        zona.comandes = [comanda for comanda in zona.comandes if id(comanda) not in descartades]
+    return sobrants
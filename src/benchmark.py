@@ -0,0 +1,333 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from contextlib import redirect_stdout
+import argparse, io, json, os, pickle, platform, subprocess, sys, tempfile, time
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.mapGenerator import MapGenerator
+from domain.distancies import MatriuDistancies
+from domain.indexEspacial import IndexEspacial
+from domain.taules import TaulaComandes
+from algorismes.motxillaExacta import fitnessSolucio, programacioDinamica
+from algorismes.referencia import bestFirstSearchReferencia, hillClimbingReferencia
+from algorismes.cercaLocal import cercaTabu, recuitSimulat
+from algorismes.cotes import cotaCompromis, cotaRuta
+from algorismes.esdeveniments import ARRIBADA, CuaEsdeveniments, RegistreComanda, arribadesPoisson
+from data.data import especialitats
+from data.generador import generarCiutat
+from data.resultats import obrirEscriptor
+from delivery_simulation import best_first_search, entregarComandes, hillClimbing, omplirMotxilla, planificarViatges, planificarZones, simularEsdeveniments
+
+MIDES: List[int] = [10, 100, 1000, 10000, 100000]
+# Nombre màxim de comandes de les funcions que no escalen a tota la ciutat (el veïnatge del Hill Climbing és quadràtic)
+MIDA_MAXIMA: Dict[str, int] = {"hillClimbing": 1000, "omplirMotxilla": 1000, "simularEsdeveniments": 100, "planificarViatges": 100, "planificarZones": 1000, "EscriptorViatges": 10000}
+# Comandes per zona de la planificació per zones, que s'executa en aquest procés per mesurar el temps total de càlcul
+MIDA_ZONA_BENCHMARK: int = 100
+# Nombre màxim de punts de la matriu de distàncies, la resta de distàncies es calculen a demanda
+PUNTS_MATRIU: int = 4000
+# Nombre màxim de comandes de les comprovacions amb les implementacions de referència
+MIDA_REFERENCIA: Dict[str, int] = {"hillClimbing": 60, "best_first_search": 1000}
+CONSULTES_BFS: int = 200
+CONSULTES_REFERENCIA: int = 20
+CAPACITAT_MAXIMA: int = 12000
+# Un temps és una regressió si supera la referència en aquesta proporció i en més de MARGE_MINIM segons
+TOLERANCIA: float = 0.25
+MARGE_MINIM: float = 1e-3
+EPSILON: float = 1e-9
+# Temps màxim dels solvers amb temps límit i marge que se'ls permet per acabar la iteració en curs
+TEMPS_SOLVER: float = 0.05
+MARGE_SOLVER: float = 0.01
+# Gap relatiu acceptat pel Hill Climbing amb aturada per la cota del compromís
+TOLERANCIA_GAP_BENCHMARK: float = 0.05
+# Mòduls pesats que la simulació només ha de carregar quan els fa servir
+IMPORTACIONS_MANDROSES: List[str] = ["folium", "pandas", "geopy"]
+# Vegades que es llegeixen els atributs de cada comanda a la comparació entre objectes i vistes de les taules
+LECTURES_ATRIBUTS: int = 10
+# Vistes que es copien com els arguments d'una tasca del pool i mida màxima de la còpia respecte a la de les mateixes comandes
+VISTES_COPIADES: int = 250
+PROPORCIO_COPIA_VISTES: float = 1.5
+# Esdeveniments per comanda a la prova de la cua (arribada, recollida, lliurament i final de viatge),
+# ritme mínim de la cua a partir de MIDA_RITME_CUA comandes i ritme d'arribades de la simulació per esdeveniments
+ESDEVENIMENTS_COMANDA: int = 4
+RITME_MINIM_CUA: float = 100000
+MIDA_RITME_CUA: int = 1000
+RITME_ARRIBADES: float = 60
+
+def cronometrar(funcio: Callable[[], Any], repeticions: int) -> float:
+    """
+    Executa la funció diverses vegades sense mostrar la seva sortida i retorna el temps mínim en segons.
+    """
+    temps: List[float] = []
+    for _ in range(repeticions):
+        with redirect_stdout(io.StringIO()):
+            tempsInici: float = time.perf_counter()
+            funcio()
+            temps.append(time.perf_counter() - tempsInici)
+    return min(temps)
+
+def mesurar(mida: int, llavor: int, repeticions: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Mesura les funcions de la simulació amb una ciutat sintètica i comprova la qualitat de les solucions.
+
+    Args:
+        mida (int): Nombre de comandes (i de restaurants) de la ciutat.
+        llavor (int): Llavor de la ciutat.
+        repeticions (int): Nombre de repeticions de cada mesura.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+            - Temps de cada funció.
+            - Resultat de cada comprovació de qualitat.
+    """
+    oficina, comandes, restaurants = generarCiutat(mida, llavor=llavor)
+    punts: List[Coordenada] = [oficina] + [restaurant.coordenades for restaurant in restaurants]
+    matriu: MatriuDistancies = MatriuDistancies(punts if len(punts) <= PUNTS_MATRIU else [oficina])
+    indexRestaurants: IndexEspacial = IndexEspacial(restaurants, matriu)
+    consultes: List[Comanda] = comandes[:CONSULTES_BFS]
+    resultats: List[Dict[str, Any]] = []
+    qualitat: List[Dict[str, Any]] = []
+
+    def afegir(funcio: str, n: int, mesura: Callable[[], Any]) -> None:
+        temps: float = cronometrar(mesura, repeticions)
+        resultats.append({"funcio": funcio, "mida": mida, "n": n, "temps": temps})
+        print(f"\t{funcio} ({n}): {round(temps, 6)} segons")
+
+    def comprovar(prova: str, correcte: bool, detall: str) -> None:
+        qualitat.append({"prova": prova, "mida": mida, "correcte": correcte, "detall": detall})
+        if not correcte:
+            print(f"\tERROR {prova}: {detall}")
+
+    seleccio: List[Comanda] = comandes[:MIDA_MAXIMA["hillClimbing"]]
+    afegir("hillClimbing", len(seleccio), lambda: hillClimbing(seleccio, CAPACITAT_MAXIMA))
+
+    # Les consultes surten d'un restaurant, com a omplirMotxilla
+    afegir("best_first_search", len(consultes), lambda: [best_first_search(restaurant.coordenades, restaurants, comanda, matriu, indexRestaurants)
+                                                         for comanda, restaurant in zip(consultes, restaurants)])
+
+    seleccio = comandes[:MIDA_MAXIMA["hillClimbing"]]
+    afegir("hillClimbing.toleranciaGap", len(seleccio), lambda: hillClimbing(seleccio, CAPACITAT_MAXIMA, toleranciaGap=TOLERANCIA_GAP_BENCHMARK))
+    fitnessInicial: Tuple[float, int] = fitnessSolucio(seleccio, [], CAPACITAT_MAXIMA)
+    for nom, solver in (("recuitSimulat", recuitSimulat), ("cercaTabu", cercaTabu)):
+        afegir(nom, len(seleccio), lambda: solver(seleccio, CAPACITAT_MAXIMA, TEMPS_SOLVER, llavor))
+        tempsSolver: float = cronometrar(lambda: solver(seleccio, CAPACITAT_MAXIMA, TEMPS_SOLVER, llavor), 1)
+        fitnessSolver: Tuple[float, int] = fitnessSolucio(*solver(seleccio, CAPACITAT_MAXIMA, TEMPS_SOLVER, llavor), CAPACITAT_MAXIMA)
+        # Ha de respectar el temps màxim i no pot retornar res pitjor que la solució de partida
+        comprovar(nom, tempsSolver <= TEMPS_SOLVER + MARGE_SOLVER and fitnessSolver >= fitnessInicial,
+                  f"{round(tempsSolver, 4)} segons amb un màxim de {TEMPS_SOLVER}, fitness {fitnessSolver} i inicial {fitnessInicial}")
+
+    # Atributs que llegeixen els algorismes, amb objectes Comanda i amb vistes d'una TaulaComandes (dades de --data)
+    taula: TaulaComandes = TaulaComandes.deComandes(comandes)
+    vistes: List[Any] = list(taula)
+    def llegirAtributs(elements: List[Any]) -> None:
+        for _ in range(LECTURES_ATRIBUTS):
+            for element in elements:
+                element.pes, element.compromis, element.codiEspecialitat, element.coordenades
+    afegir("atributs.Comanda", len(comandes), lambda: llegirAtributs(comandes))
+    afegir("atributs.VistaComanda", len(vistes), lambda: llegirAtributs(vistes))
+    afegir("TaulaComandes.iter", len(taula), lambda: list(taula))
+    comprovar("taules", all(taula[fila] is vista and (vista.id, vista.pes, vista.compromis, vista.codiEspecialitat, vista.coordenades.latitud)
+                            == (comanda.id, comanda.pes, comanda.compromis, comanda.codiEspecialitat, comanda.coordenades.latitud)
+                            for fila, (vista, comanda) in enumerate(zip(vistes, comandes))),
+              "les vistes de la taula no coincideixen amb les comandes o la mateixa fila dona objectes diferents")
+    # Copiar unes quantes vistes a un procés del pool no pot copiar tota la taula
+    midaVistes: int = len(pickle.dumps(vistes[:VISTES_COPIADES]))
+    midaComandes: int = len(pickle.dumps(comandes[:VISTES_COPIADES]))
+    copies: List[Any] = pickle.loads(pickle.dumps(vistes[:VISTES_COPIADES]))
+    comprovar("taules.pickle", midaVistes <= PROPORCIO_COPIA_VISTES * midaComandes
+              and [(copia.id, copia.pes, copia.coordenades.latitud) for copia in copies] == [(vista.id, vista.pes, vista.coordenades.latitud) for vista in vistes[:VISTES_COPIADES]],
+              f"{midaVistes} bytes per {len(copies)} vistes i {midaComandes} bytes per les mateixes comandes")
+
+    seleccio = comandes[:MIDA_MAXIMA["omplirMotxilla"]]
+    afegir("omplirMotxilla", len(seleccio), lambda: omplirMotxilla(oficina, seleccio, CAPACITAT_MAXIMA, restaurants[:], True, matriu))
+
+    with redirect_stdout(io.StringIO()):
+        motxilla, _, ubicacio, _, _, _ = omplirMotxilla(oficina, seleccio, CAPACITAT_MAXIMA, restaurants[:], True, matriu)
+    afegir("entregarComandes", len(motxilla), lambda: entregarComandes(ubicacio, motxilla[:], matriu))
+
+    # Sense repetir restaurants, l'assignació conjunta no pot recórrer més distància de recollida que la seqüencial
+    afegir("omplirMotxilla.hongares", len(seleccio), lambda: omplirMotxilla(oficina, seleccio, CAPACITAT_MAXIMA, restaurants[:], False, matriu, assignacio="hongares"))
+    with redirect_stdout(io.StringIO()):
+        _, recollidaSequencial, _, _, _, _ = omplirMotxilla(oficina, seleccio, CAPACITAT_MAXIMA, restaurants[:], False, matriu)
+        _, recollidaHongares, _, _, _, _ = omplirMotxilla(oficina, seleccio, CAPACITAT_MAXIMA, restaurants[:], False, matriu, assignacio="hongares")
+    comprovar("assignacio", recollidaHongares <= recollidaSequencial + EPSILON,
+              f"{round(recollidaHongares, 2)} metres de recollida amb l'algorisme hongarès i {round(recollidaSequencial, 2)} amb l'assignació seqüencial")
+
+    # La cua rep els esdeveniments desordenats, com quan diversos repartidors programen els seus viatges
+    temps: List[float] = (np.random.default_rng(llavor).random(ESDEVENIMENTS_COMANDA * mida) * mida).tolist()
+    def processarCua() -> None:
+        cua: CuaEsdeveniments = CuaEsdeveniments()
+        for instant in temps:
+            cua.programar(instant, ARRIBADA)
+        while cua:
+            cua.seguent()
+    afegir("CuaEsdeveniments", len(temps), processarCua)
+    if mida >= MIDA_RITME_CUA:
+        ritme: float = len(temps) / cronometrar(processarCua, 1)
+        comprovar("CuaEsdeveniments", ritme >= RITME_MINIM_CUA, f"{round(ritme)} esdeveniments per segon amb un mínim de {RITME_MINIM_CUA}")
+
+    seleccio = comandes[:MIDA_MAXIMA["simularEsdeveniments"]]
+    def simular() -> None:
+        registres: List[RegistreComanda] = [RegistreComanda(comanda, arribada) for comanda, arribada in zip(seleccio, arribadesPoisson(len(seleccio), RITME_ARRIBADES, llavor))]
+        simularEsdeveniments(oficina, registres, CAPACITAT_MAXIMA, restaurants, True, matriu, numRepartidors=2)
+    afegir("simularEsdeveniments", len(seleccio), simular)
+
+    # Replanificació incremental: cada mesura cancel·la una comanda del pla i la torna a afegir
+    seleccio = comandes[:MIDA_MAXIMA["planificarViatges"]]
+    # Com a main, les comandes planificades són a la matriu
+    matriuPla: MatriuDistancies = MatriuDistancies.dePunts(oficina, seleccio, restaurants) if len(seleccio) + len(punts) <= PUNTS_MATRIU else matriu
+    afegir("planificarViatges", len(seleccio), lambda: planificarViatges(oficina, seleccio, CAPACITAT_MAXIMA, restaurants, True, matriuPla))
+    with redirect_stdout(io.StringIO()):
+        pla = planificarViatges(oficina, seleccio, CAPACITAT_MAXIMA, restaurants, True, matriuPla)
+    canviada: Comanda = seleccio[len(seleccio) // 2]
+    afegir("Pla.actualitzar", len(pla), lambda: (pla.actualitzar([], [canviada]), pla.actualitzar([canviada], [])))
+    lliurades: List[Comanda] = [comanda for viatge in pla.viatges for comanda in viatge.lliuraments]
+    comprovar("Pla.actualitzar", len(lliurades) == len(seleccio) and {id(comanda) for comanda in lliurades} == {id(comanda) for comanda in seleccio}
+              and all(viatge.pes <= CAPACITAT_MAXIMA for viatge in pla.viatges), f"{len(lliurades)} comandes al pla de {len(seleccio)}")
+
+    seleccio = comandes[:MIDA_MAXIMA["planificarZones"]]
+    afegir("planificarZones", len(seleccio), lambda: planificarZones(oficina, seleccio, restaurants, CAPACITAT_MAXIMA, True, MIDA_ZONA_BENCHMARK, treballadors=1, llavor=llavor))
+    zones, resultatsZones = planificarZones(oficina, seleccio, restaurants, CAPACITAT_MAXIMA, True, MIDA_ZONA_BENCHMARK, treballadors=1, llavor=llavor)
+    servides: int = sum(resultat.numComandes for resultat in resultatsZones)
+    comprovar("planificarZones", servides == len(seleccio), f"{servides} comandes servides de {len(seleccio)} en {len(zones)} zones")
+
+    # A partir de LLINDAR_COMPACTE punts (domain/mapGenerator.py) el mapa es genera en mode compacte
+    with tempfile.TemporaryDirectory() as directori:
+        def generarMapa() -> None:
+            mapa: MapGenerator = MapGenerator(oficina, comandes, restaurants, especialitats, directori)
+            mapa.generateInitialMap()
+            mapa.save("benchmark.html")
+        afegir("MapGenerator", mida, generarMapa)
+
+        # Un viatge per comanda, amb la ruta des de l'oficina passant pel restaurant de la mateixa posició
+        viatges: List[Tuple[str, int, List[Coordenada]]] = [(restaurant.nom, comanda.id, [oficina, restaurant.coordenades, comanda.coordenades])
+                                                            for comanda, restaurant in zip(comandes[:MIDA_MAXIMA["EscriptorViatges"]], restaurants)]
+        cami: str = os.path.join(directori, "viatges.geojson")
+        def escriureViatges() -> None:
+            # Cada repetició escriu un fitxer nou en lloc d'afegir-hi els viatges
+            if os.path.exists(cami):
+                os.remove(cami)
+            with obrirEscriptor(cami) as escriptor:
+                for numero, (nom, id, ruta) in enumerate(viatges):
+                    escriptor.escriure(numero + 1, [nom], [id], 0.0, ruta)
+        afegir("EscriptorViatges", len(viatges), escriureViatges)
+        with open(cami, encoding="utf-8") as fitxer:
+            escrits: int = len(json.load(fitxer)["features"])
+        comprovar("EscriptorViatges", escrits == len(viatges), f"{escrits} viatges al fitxer de {len(viatges)}")
+
+    # Qualitat respecte a les implementacions de referència
+    if mida <= MIDA_REFERENCIA["hillClimbing"] and mida >= 2:
+        fitness: Tuple[float, int] = fitnessSolucio(*hillClimbing(comandes, CAPACITAT_MAXIMA), CAPACITAT_MAXIMA)
+        fitnessReferencia: Tuple[float, int] = fitnessSolucio(*hillClimbingReferencia(comandes, CAPACITAT_MAXIMA), CAPACITAT_MAXIMA)
+        comprovar("hillClimbing", fitness[1] > fitnessReferencia[1] or (fitness[1] == fitnessReferencia[1] and fitness[0] >= fitnessReferencia[0] - EPSILON),
+                  f"fitness {fitness} i referència {fitnessReferencia}")
+    if mida <= MIDA_REFERENCIA["best_first_search"]:
+        diferencia: float = 0.0
+        for comanda, restaurant in zip(consultes[:CONSULTES_REFERENCIA], restaurants):
+            _, distancia = best_first_search(restaurant.coordenades, restaurants, comanda, matriu, indexRestaurants)
+            _, distanciaReferencia = bestFirstSearchReferencia(restaurant.coordenades, restaurants, comanda)
+            diferencia = max(diferencia, abs(distancia - distanciaReferencia))
+        comprovar("best_first_search", diferencia <= 1e-3, f"diferència màxima de {diferencia} metres amb la referència")
+
+    seleccio = comandes[:MIDA_MAXIMA["hillClimbing"]]
+    fitness = fitnessSolucio(*hillClimbing(seleccio, CAPACITAT_MAXIMA), CAPACITAT_MAXIMA)
+    fitnessOptim: Tuple[float, int] = fitnessSolucio(*programacioDinamica(seleccio, CAPACITAT_MAXIMA), CAPACITAT_MAXIMA)
+    comprovar("programacioDinamica", fitnessOptim[1] > fitness[1] or (fitnessOptim[1] == fitness[1] and fitnessOptim[0] >= fitness[0] - EPSILON),
+              f"òptim {fitnessOptim} i Hill Climbing {fitness}")
+
+    # Les cotes inferiors no poden superar l'òptim de la motxilla ni la longitud de cap ruta
+    cota: float = cotaCompromis(seleccio, CAPACITAT_MAXIMA)
+    with redirect_stdout(io.StringIO()):
+        distanciaLliurament, _, rutaLliurament = entregarComandes(ubicacio, motxilla[:], matriu)
+    cotaLliurament: float = cotaRuta(rutaLliurament[0], rutaLliurament[1:], matriu.distancia)
+    comprovar("cotes", cota <= -fitnessOptim[0] + EPSILON and cotaLliurament <= distanciaLliurament + EPSILON,
+              f"cota {round(cota, 2)} i òptim {round(-fitnessOptim[0], 2)} del compromís, cota {round(cotaLliurament, 2)} i ruta de {round(distanciaLliurament, 2)} metres")
+    return resultats, qualitat
+
+def mesurarArrencada(repeticions: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Mesura el temps d'arrencada en processos nous: importar la simulació i executar-la sense interacció ni mapa.
+
+    Args:
+        repeticions (int): Nombre de repeticions de cada mesura.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+            - Temps de cada mesura (amb mida 0).
+            - Comprovació que la importació no carrega els mòduls de IMPORTACIONS_MANDROSES.
+    """
+    directori: str = os.path.dirname(os.path.abspath(__file__))
+    ordres: Dict[str, List[str]] = {"importacio": [sys.executable, "-c", "import delivery_simulation"],
+                                    "arrencada": [sys.executable, "delivery_simulation.py", "--no-interactiu", "--no-mapa"]}
+    resultats: List[Dict[str, Any]] = []
+    for funcio, ordre in ordres.items():
+        temps: float = cronometrar(lambda: subprocess.run(ordre, cwd=directori, check=True, stdout=subprocess.DEVNULL), repeticions)
+        resultats.append({"funcio": funcio, "mida": 0, "n": 0, "temps": temps})
+        print(f"\t{funcio}: {round(temps, 6)} segons")
+
+    codi: str = f"import sys, delivery_simulation; print(','.join(m for m in {IMPORTACIONS_MANDROSES!r} if m in sys.modules))"
+    carregats: str = subprocess.run([sys.executable, "-c", codi], cwd=directori, check=True, capture_output=True, text=True).stdout.strip()
+    qualitat: List[Dict[str, Any]] = [{"prova": "importacio", "mida": 0, "correcte": not carregats,
+                                       "detall": f"mòduls carregats en importar la simulació: {carregats or 'cap'}"}]
+    if carregats:
+        print(f"\tERROR importacio: {qualitat[0]['detall']}")
+    return resultats, qualitat
+
+def regressions(resultats: List[Dict[str, Any]], referencia: Dict[str, Any], tolerancia: float) -> List[str]:
+    """
+    Compara els temps amb els d'una execució de referència.
+
+    Args:
+        resultats (List[Dict[str, Any]]): Temps de l'execució actual.
+        referencia (Dict[str, Any]): Resultat d'una execució anterior del benchmark.
+        tolerancia (float): Augment relatiu del temps permès.
+
+    Returns:
+        List[str]: Descripció de cada regressió.
+    """
+    anteriors: Dict[Tuple[str, int], float] = {(resultat["funcio"], resultat["mida"]): resultat["temps"] for resultat in referencia["resultats"]}
+    trobades: List[str] = []
+    for resultat in resultats:
+        anterior: Optional[float] = anteriors.get((resultat["funcio"], resultat["mida"]))
+        if anterior is not None and resultat["temps"] > anterior * (1 + tolerancia) and resultat["temps"] - anterior > MARGE_MINIM:
+            trobades.append(f"{resultat['funcio']} ({resultat['mida']} comandes): {round(resultat['temps'], 6)} segons, abans {round(anterior, 6)} segons")
+    return trobades
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de les funcions de la simulació amb ciutats sintètiques.")
+    parser.add_argument("--mides", type=int, nargs="+", default=MIDES, help="Nombre de comandes de cada ciutat.")
+    parser.add_argument("--llavor", type=int, default=0, help="Llavor de les ciutats.")
+    parser.add_argument("--repeticions", type=int, default=3, help="Repeticions de cada mesura (es guarda el temps mínim).")
+    parser.add_argument("--sortida", type=str, default=os.path.join(os.path.dirname(__file__), "out", "benchmark.json"), help="Fitxer JSON on es guarden els resultats.")
+    parser.add_argument("--referencia", type=str, default=None, help="Fitxer JSON d'una execució anterior per detectar regressions.")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="Augment relatiu del temps a partir del qual hi ha una regressió.")
+    parser.add_argument("--sense-arrencada", dest="arrencada", action="store_false", help="No mesurar el temps d'arrencada de la simulació.")
+    args = parser.parse_args()
+
+    resultats: List[Dict[str, Any]] = []
+    qualitat: List[Dict[str, Any]] = []
+    if args.arrencada:
+        print("Arrencada:")
+        resultats, qualitat = mesurarArrencada(args.repeticions)
+    for mida in args.mides:
+        print(f"Ciutat de {mida} comandes:")
+        resultatsMida, qualitatMida = mesurar(mida, args.llavor, args.repeticions)
+        resultats += resultatsMida
+        qualitat += qualitatMida
+
+    sortida: Dict[str, Any] = {"llavor": args.llavor, "repeticions": args.repeticions, "python": platform.python_version(),
+                               "plataforma": platform.platform(), "resultats": resultats, "qualitat": qualitat}
+    os.makedirs(os.path.dirname(os.path.abspath(args.sortida)), exist_ok=True)
+    with open(args.sortida, "w") as fitxer:
+        json.dump(sortida, fitxer, indent=4)
+    print(f"Resultats guardats a {args.sortida}")
+
+    errors: List[str] = [f"{prova['prova']} ({prova['mida']} comandes): {prova['detall']}" for prova in qualitat if not prova["correcte"]]
+    if args.referencia is not None:
+        with open(args.referencia) as fitxer:
+            errors += [f"Regressió a {regressio}" for regressio in regressions(resultats, json.load(fitxer), args.tolerancia)]
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+    print(f"Totes les {len(qualitat)} comprovacions de qualitat són correctes.")
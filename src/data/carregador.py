@@ -0,0 +1,248 @@
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+import os
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+from domain.especialitat import Especialitat
+from domain.taules import TaulaComandes, TaulaRestaurants, VistaComanda, VistaRestaurant
+from domain.xarxaViaria import XarxaViaria
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Nombre de files que es llegeixen de cop dels fitxers grans
+MIDA_BLOC: int = 100_000
+
+COLUMNES_ESPECIALITATS: List[str] = ["codi", "especialitat", "compromis", "pes", "colorMarcador"]
+COLUMNES_RESTAURANTS: List[str] = ["nom", "carrer", "especialitat", "latitud", "longitud"]
+COLUMNES_COMANDES: List[str] = ["id", "especialitat", "carrer", "latitud", "longitud"]
+COLUMNES_OFICINA: List[str] = ["latitud", "longitud"]
+# Espai de noms dels fitxers GraphML (el format en què osmnx guarda les xarxes d'OpenStreetMap)
+ESPAI_GRAPHML: str = "{http://graphml.graphdrawing.org/xmlns}"
+
+class DadesColumnars:
+    """
+    Dades d'una simulació en format columnar: una TaulaComandes i una TaulaRestaurants en lloc d'un objecte per fila.
+
+    Les especialitats es guarden com els seus codis enters. Les comandes i els restaurants es consulten
+    com a vistes de les taules, que només es creen quan es demanen i es poden recórrer una a una.
+    """
+
+    def __init__(self, oficina: Coordenada, especialitats: Dict[str, Especialitat],
+                 comandes: Dict[str, np.ndarray], restaurants: Dict[str, np.ndarray]) -> None:
+        self.oficina: Coordenada = oficina
+        self.especialitats: Dict[str, Especialitat] = especialitats
+        self.comandes: TaulaComandes = TaulaComandes(especialitats.values(), comandes["id"], comandes["especialitat"], comandes["carrer"],
+                                                     comandes["latitud"], comandes["longitud"])
+        self.restaurants: TaulaRestaurants = TaulaRestaurants(especialitats.values(), restaurants["nom"], restaurants["especialitat"], restaurants["carrer"],
+                                                              restaurants["latitud"], restaurants["longitud"])
+
+    def numComandes(self) -> int:
+        return len(self.comandes)
+
+    def numRestaurants(self) -> int:
+        return len(self.restaurants)
+
+    def iterComandes(self) -> Iterator[VistaComanda]:
+        """
+        Recorre les comandes creant les vistes una a una, sense guardar-les.
+        """
+        return iter(self.comandes)
+
+    def llistaComandes(self) -> List[VistaComanda]:
+        return list(self.comandes)
+
+    def llistaRestaurants(self) -> List[VistaRestaurant]:
+        return list(self.restaurants)
+
+def trobarFitxer(directori: str, nom: str) -> Optional[str]:
+    for extensio in (".parquet", ".csv"):
+        cami: str = os.path.join(directori, nom + extensio)
+        if os.path.exists(cami):
+            return cami
+    return None
+
+def llegirBlocs(cami: str, columnes: List[str], midaBloc: int = MIDA_BLOC) -> Iterator["pd.DataFrame"]:
+    """
+    Llegeix un fitxer CSV o Parquet per blocs de files.
+
+    Els CSV es llegeixen amb el fitxer mapat a memòria. Els Parquet necessiten pyarrow, que no és una dependència obligatòria.
+
+    Args:
+        cami (str): Camí del fitxer.
+        columnes (List[str]): Columnes a llegir.
+        midaBloc (int): Nombre de files de cada bloc.
+
+    Yields:
+        pd.DataFrame: Blocs de com a molt midaBloc files.
+    """
+    if cami.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError(f"Per llegir el fitxer {cami} cal instal·lar pyarrow (pip install pyarrow).") from error
+        fitxer = pq.ParquetFile(cami, memory_map=True)
+        for lot in fitxer.iter_batches(batch_size=midaBloc, columns=columnes):
+            yield lot.to_pandas()
+    else:
+        import pandas as pd
+        yield from pd.read_csv(cami, usecols=columnes, chunksize=midaBloc, memory_map=True, keep_default_na=False, float_precision="round_trip")
+
+def llegirColumnes(cami: str, columnes: List[str], codis: Dict[str, int], midaBloc: int = MIDA_BLOC) -> Dict[str, np.ndarray]:
+    """
+    Llegeix un fitxer de comandes o restaurants per blocs i en retorna les columnes com a arrays.
+
+    La columna especialitat es converteix als codis enters de les especialitats (Especialitat.codi).
+
+    Args:
+        cami (str): Camí del fitxer.
+        columnes (List[str]): Columnes a llegir.
+        codis (Dict[str, int]): Codi enter de cada especialitat.
+        midaBloc (int): Nombre de files de cada bloc.
+
+    Returns:
+        Dict[str, np.ndarray]: Un array per columna.
+    """
+    blocs: Dict[str, List[np.ndarray]] = {columna: [] for columna in columnes}
+    for bloc in llegirBlocs(cami, columnes, midaBloc):
+        especialitat = bloc["especialitat"].map(codis)
+        if especialitat.isna().any():
+            desconeguda = bloc["especialitat"][especialitat.isna()].iloc[0]
+            raise ValueError(f"L'especialitat {desconeguda} del fitxer {cami} no existeix.")
+        bloc["especialitat"] = especialitat
+        for columna in columnes:
+            blocs[columna].append(bloc[columna].to_numpy())
+
+    tipus: Dict[str, type] = {"id": np.int64, "especialitat": np.int16, "latitud": np.float64, "longitud": np.float64}
+    return {columna: np.concatenate(parts).astype(tipus.get(columna, object)) if parts else np.empty(0, dtype=tipus.get(columna, object))
+            for columna, parts in blocs.items()}
+
+def carregarDades(directori: str, oficina: Optional[Coordenada] = None, midaBloc: int = MIDA_BLOC) -> DadesColumnars:
+    """
+    Carrega les especialitats, els restaurants i les comandes d'un directori.
+
+    El directori ha de contenir els fitxers especialitats, restaurants i comandes (.csv o .parquet),
+    i opcionalment oficina amb la coordenada de sortida.
+
+    Args:
+        directori (str): Directori amb els fitxers.
+        oficina (Optional[Coordenada]): Coordenada de l'oficina si el directori no en té.
+        midaBloc (int): Nombre de files que es llegeixen de cop.
+
+    Returns:
+        DadesColumnars: Dades carregades.
+    """
+    fitxers: Dict[str, Optional[str]] = {nom: trobarFitxer(directori, nom) for nom in ("especialitats", "restaurants", "comandes", "oficina")}
+    for nom in ("especialitats", "restaurants", "comandes"):
+        if fitxers[nom] is None:
+            raise FileNotFoundError(f"No s'ha trobat el fitxer {nom}.csv ni {nom}.parquet al directori {directori}.")
+
+    especialitats: Dict[str, Especialitat] = {}
+    for bloc in llegirBlocs(fitxers["especialitats"], COLUMNES_ESPECIALITATS, midaBloc):
+        for fila in bloc.itertuples(index=False):
+            especialitats[fila.codi] = Especialitat(fila.especialitat, int(fila.compromis), int(fila.pes), fila.colorMarcador)
+    codis: Dict[str, int] = {codi: especialitat.codi for codi, especialitat in especialitats.items()}
+
+    if fitxers["oficina"] is not None:
+        fila = next(llegirBlocs(fitxers["oficina"], COLUMNES_OFICINA, midaBloc)).iloc[0]
+        oficina = Coordenada(float(fila["latitud"]), float(fila["longitud"]))
+    if oficina is None:
+        raise FileNotFoundError(f"No s'ha trobat el fitxer oficina.csv ni oficina.parquet al directori {directori}.")
+
+    restaurants: Dict[str, np.ndarray] = llegirColumnes(fitxers["restaurants"], COLUMNES_RESTAURANTS, codis, midaBloc)
+    comandes: Dict[str, np.ndarray] = llegirColumnes(fitxers["comandes"], COLUMNES_COMANDES, codis, midaBloc)
+    return DadesColumnars(oficina, especialitats, comandes, restaurants)
+
+def guardarCSV(directori: str, oficina: Coordenada, especialitats: Dict[str, Especialitat], comandes: List[Comanda], restaurants: List[Restaurant]) -> None:
+    """
+    Guarda unes dades en format CSV perquè es puguin carregar amb carregarDades.
+
+    Args:
+        directori (str): Directori on es guarden els fitxers.
+        oficina (Coordenada): Coordenada de l'oficina.
+        especialitats (Dict[str, Especialitat]): Especialitats per codi.
+        comandes (List[Comanda]): Llista de comandes.
+        restaurants (List[Restaurant]): Llista de restaurants.
+    """
+    import pandas as pd
+    os.makedirs(directori, exist_ok=True)
+    codis: Dict[Especialitat, str] = {especialitat: codi for codi, especialitat in especialitats.items()}
+    taules: List[Tuple[str, List[str], list]] = [
+        ("oficina", COLUMNES_OFICINA, [(oficina.latitud, oficina.longitud)]),
+        ("especialitats", COLUMNES_ESPECIALITATS, [(codi, e.especialitat, e.compromis, e.pes, e.colorMarcador) for codi, e in especialitats.items()]),
+        ("restaurants", COLUMNES_RESTAURANTS, [(r.nom, r.carrer, codis[r.especialitat], r.coordenades.latitud, r.coordenades.longitud) for r in restaurants]),
+        ("comandes", COLUMNES_COMANDES, [(c.id, codis[c.especialitat], c.carrer, c.coordenades.latitud, c.coordenades.longitud) for c in comandes])
+    ]
+    for nom, columnes, files in taules:
+        pd.DataFrame(files, columns=columnes).to_csv(os.path.join(directori, nom + ".csv"), index=False)
+
+def llegirGraphML(cami: str, metrica: str = "geodesica") -> XarxaViaria:
+    """
+    Llegeix una xarxa viària d'un fitxer GraphML local, per exemple un extracte d'OpenStreetMap guardat amb osmnx.save_graphml.
+
+    Els nodes han de tenir els atributs x (longitud) i y (latitud). La llargada de les arestes és l'atribut length en metres;
+    si no hi és, es calcula amb la mètrica. Si el graf no és dirigit, cada aresta es pot recórrer en els dos sentits.
+    No es fa cap connexió a la xarxa.
+
+    Args:
+        cami (str): Camí del fitxer.
+        metrica (str): Mètrica dels trams d'accés a la xarxa i de les arestes sense llargada.
+
+    Returns:
+        XarxaViaria: Xarxa viària del fitxer.
+    """
+    import xml.etree.ElementTree as ET
+    atributs: Dict[str, str] = {}
+    nodes: Dict[str, int] = {}
+    latituds: List[float] = []
+    longituds: List[float] = []
+    arestes: List[Tuple[str, str, Optional[float]]] = []
+    dirigit: bool = True
+    for _, element in ET.iterparse(cami, events=("end",)):
+        etiqueta: str = element.tag.replace(ESPAI_GRAPHML, "")
+        if etiqueta == "key":
+            atributs[element.get("id")] = element.get("attr.name")
+        elif etiqueta == "node":
+            dades: Dict[str, str] = {atributs.get(dada.get("key")): dada.text for dada in element.iter(ESPAI_GRAPHML + "data")}
+            nodes[element.get("id")] = len(nodes)
+            latituds.append(float(dades["y"]))
+            longituds.append(float(dades["x"]))
+            element.clear()
+        elif etiqueta == "edge":
+            dades = {atributs.get(dada.get("key")): dada.text for dada in element.iter(ESPAI_GRAPHML + "data")}
+            arestes.append((element.get("source"), element.get("target"), float(dades["length"]) if dades.get("length") else None))
+            element.clear()
+        elif etiqueta == "graph":
+            dirigit = element.get("edgedefault", "directed") == "directed"
+
+    origens: np.ndarray = np.array([nodes[origen] for origen, _, _ in arestes], dtype=np.int64)
+    destins: np.ndarray = np.array([nodes[desti] for _, desti, _ in arestes], dtype=np.int64)
+    llargades: np.ndarray = np.array([np.nan if llargada is None else llargada for _, _, llargada in arestes], dtype=np.float64)
+    latitudsNodes: np.ndarray = np.array(latituds, dtype=np.float64)
+    longitudsNodes: np.ndarray = np.array(longituds, dtype=np.float64)
+    senseLlargada: np.ndarray = np.isnan(llargades)
+    if senseLlargada.any():
+        from domain.distancies import METRIQUES
+        o, d = origens[senseLlargada], destins[senseLlargada]
+        llargades[senseLlargada] = METRIQUES[metrica](latitudsNodes[o], longitudsNodes[o], latitudsNodes[d], longitudsNodes[d])
+    if not dirigit:
+        origens, destins, llargades = np.concatenate([origens, destins]), np.concatenate([destins, origens]), np.concatenate([llargades, llargades])
+    return XarxaViaria(latitudsNodes, longitudsNodes, origens, destins, llargades, metrica)
+
+def guardarGraphML(cami: str, xarxa: XarxaViaria) -> None:
+    """
+    Guarda una xarxa viària en format GraphML dirigit perquè es pugui carregar amb llegirGraphML.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(cami)), exist_ok=True)
+    with open(cami, "w", encoding="utf-8") as fitxer:
+        fitxer.write('<?xml version="1.0" encoding="utf-8"?>\n<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        fitxer.write('<key id="d0" for="node" attr.name="y" attr.type="double"/>\n<key id="d1" for="node" attr.name="x" attr.type="double"/>\n')
+        fitxer.write('<key id="d2" for="edge" attr.name="length" attr.type="double"/>\n<graph edgedefault="directed">\n')
+        for node, (latitud, longitud) in enumerate(zip(xarxa.latituds.tolist(), xarxa.longituds.tolist())):
+            fitxer.write(f'<node id="{node}"><data key="d0">{latitud!r}</data><data key="d1">{longitud!r}</data></node>\n')
+        for origen, veins in enumerate(xarxa.adjacencia):
+            for desti, llargada in veins:
+                fitxer.write(f'<edge source="{origen}" target="{desti}"><data key="d2">{llargada!r}</data></edge>\n')
+        fitxer.write("</graph>\n</graphml>\n")
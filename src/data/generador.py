@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+from domain.especialitat import Especialitat
+from domain.distancies import METRIQUES
+from domain.xarxaViaria import XarxaViaria
+from data.data import comandes, restaurants, especialitats, tecnocampus
+
+def capsaContenidora(punts: List[Coordenada]) -> Tuple[float, float, float, float]:
+    """
+    Retorna la latitud mínima, la latitud màxima, la longitud mínima i la longitud màxima dels punts.
+    """
+    latituds: List[float] = [punt.latitud for punt in punts]
+    longituds: List[float] = [punt.longitud for punt in punts]
+    return min(latituds), max(latituds), min(longituds), max(longituds)
+
+# Capsa de les dades de data/data.py (Mataró), on es generen les ciutats sintètiques
+CAPSA_MATARO: Tuple[float, float, float, float] = capsaContenidora([tecnocampus] + [comanda.coordenades for comanda in comandes] + [restaurant.coordenades for restaurant in restaurants])
+
+def generarCiutat(numComandes: int, numRestaurants: Optional[int] = None, llavor: int = 0, oficina: Coordenada = tecnocampus,
+                  especialitatsCiutat: Optional[Dict[str, Especialitat]] = None,
+                  capsa: Tuple[float, float, float, float] = CAPSA_MATARO) -> Tuple[Coordenada, List[Comanda], List[Restaurant]]:
+    """
+    Genera una ciutat sintètica amb comandes i restaurants repartits uniformement dins d'una capsa.
+
+    La mateixa llavor genera sempre la mateixa ciutat. Cada especialitat té almenys un restaurant,
+    per tant totes les comandes es poden recollir.
+
+    Args:
+        numComandes (int): Nombre de comandes.
+        numRestaurants (Optional[int]): Nombre de restaurants. Per defecte, tants com comandes (i almenys un per especialitat).
+        llavor (int): Llavor del generador aleatori.
+        oficina (Coordenada): Coordenada de l'oficina.
+        especialitatsCiutat (Optional[Dict[str, Especialitat]]): Especialitats de la ciutat. Per defecte, les de data/data.py.
+        capsa (Tuple[float, float, float, float]): Latitud mínima, latitud màxima, longitud mínima i longitud màxima.
+
+    Returns:
+        Tuple[Coordenada, List[Comanda], List[Restaurant]]:
+            - Coordenada de l'oficina.
+            - Llista de comandes.
+            - Llista de restaurants.
+    """
+    llistaEspecialitats: List[Especialitat] = list((especialitatsCiutat or especialitats).values())
+    numRestaurants = max(numRestaurants if numRestaurants is not None else numComandes, len(llistaEspecialitats))
+    generador: np.random.Generator = np.random.default_rng(llavor)
+    latitudMinima, latitudMaxima, longitudMinima, longitudMaxima = capsa
+
+    def punts(quantitat: int) -> List[Coordenada]:
+        latituds: np.ndarray = generador.uniform(latitudMinima, latitudMaxima, quantitat)
+        longituds: np.ndarray = generador.uniform(longitudMinima, longitudMaxima, quantitat)
+        return [Coordenada(latitud, longitud) for latitud, longitud in zip(latituds.tolist(), longituds.tolist())]
+
+    especialitatsComandes: np.ndarray = generador.integers(0, len(llistaEspecialitats), numComandes)
+    comandesCiutat: List[Comanda] = [Comanda(i + 1, llistaEspecialitats[codi], f"Carrer {i + 1}", coordenada)
+                                     for i, (codi, coordenada) in enumerate(zip(especialitatsComandes.tolist(), punts(numComandes)))]
+
+    # Els primers restaurants cobreixen totes les especialitats
+    especialitatsRestaurants: np.ndarray = np.concatenate([np.arange(len(llistaEspecialitats)),
+                                                          generador.integers(0, len(llistaEspecialitats), numRestaurants - len(llistaEspecialitats))])
+    restaurantsCiutat: List[Restaurant] = [Restaurant(f"Restaurant {i + 1}", f"Plaça {i + 1}", llistaEspecialitats[codi], coordenada)
+                                           for i, (codi, coordenada) in enumerate(zip(especialitatsRestaurants.tolist(), punts(numRestaurants)))]
+    return oficina, comandesCiutat, restaurantsCiutat
+
+def generarXarxa(capsa: Tuple[float, float, float, float] = CAPSA_MATARO, separacio: float = 100.0, sinuositat: float = 0.2,
+                 llavor: int = 0, marge: float = 0.1, metrica: str = "geodesica") -> XarxaViaria:
+    """
+    Genera una xarxa viària sintètica en quadrícula que cobreix una capsa, per provar les distàncies per carretera sense un extracte d'OpenStreetMap.
+
+    Els carrers verticals són de doble sentit i els horitzontals d'un sol sentit, alternant el sentit a cada fila,
+    de manera que des de qualsevol node es pot arribar a qualsevol altre. La llargada de cada tram és la distància
+    en línia recta multiplicada per un factor aleatori entre 1 i 1 + sinuositat.
+
+    Args:
+        capsa (Tuple[float, float, float, float]): Latitud mínima, latitud màxima, longitud mínima i longitud màxima.
+        separacio (float): Distància aproximada entre carrers en metres.
+        sinuositat (float): Allargament màxim relatiu de cada tram respecte a la línia recta.
+        llavor (int): Llavor del generador aleatori.
+        marge (float): Marge al voltant de la capsa, relatiu a la seva mida.
+        metrica (str): Mètrica de la xarxa.
+
+    Returns:
+        XarxaViaria: Xarxa viària en quadrícula.
+    """
+    latitudMinima, latitudMaxima, longitudMinima, longitudMaxima = capsa
+    margeLatitud: float = (latitudMaxima - latitudMinima) * marge
+    margeLongitud: float = (longitudMaxima - longitudMinima) * marge
+    latitudMinima, latitudMaxima = latitudMinima - margeLatitud, latitudMaxima + margeLatitud
+    longitudMinima, longitudMaxima = longitudMinima - margeLongitud, longitudMaxima + margeLongitud
+    alcada: float = float(METRIQUES[metrica](latitudMinima, longitudMinima, latitudMaxima, longitudMinima))
+    amplada: float = float(METRIQUES[metrica](latitudMinima, longitudMinima, latitudMinima, longitudMaxima))
+    files: int = max(2, int(round(alcada / separacio)) + 1)
+    columnes: int = max(2, int(round(amplada / separacio)) + 1)
+
+    latituds, longituds = np.meshgrid(np.linspace(latitudMinima, latitudMaxima, files), np.linspace(longitudMinima, longitudMaxima, columnes), indexing="ij")
+    node: np.ndarray = np.arange(files * columnes).reshape(files, columnes)
+    # Carrers verticals en els dos sentits
+    origens: List[np.ndarray] = [node[:-1, :].ravel(), node[1:, :].ravel()]
+    destins: List[np.ndarray] = [node[1:, :].ravel(), node[:-1, :].ravel()]
+    # Carrers horitzontals cap a l'est a les files parells i cap a l'oest a les senars
+    for fila in range(files):
+        if fila % 2 == 0:
+            origens.append(node[fila, :-1])
+            destins.append(node[fila, 1:])
+        else:
+            origens.append(node[fila, 1:])
+            destins.append(node[fila, :-1])
+    origen: np.ndarray = np.concatenate(origens)
+    desti: np.ndarray = np.concatenate(destins)
+    latituds, longituds = latituds.ravel(), longituds.ravel()
+    generador: np.random.Generator = np.random.default_rng(llavor)
+    llargades: np.ndarray = METRIQUES[metrica](latituds[origen], longituds[origen], latituds[desti], longituds[desti]) * generador.uniform(1, 1 + sinuositat, len(origen))
+    return XarxaViaria(latituds, longituds, origen, desti, llargades, metrica)
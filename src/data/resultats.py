@@ -0,0 +1,211 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from abc import ABC, abstractmethod
+import json, os
+
+from domain.coordenada import Coordenada
+
+# Decimals de les coordenades de les polilínies: 5 és el format de Google Maps, 6 el d'OSRM i Valhalla
+PRECISIO_POLILINIA: int = 5
+# Decimals de les coordenades de la geometria GeoJSON (uns 1,1 cm a l'equador)
+DECIMALS_GEOJSON: int = 7
+FORMATS_VIATGES: Dict[str, str] = {".geojson": "FeatureCollection GeoJSON", ".geojsonl": "GeoJSON amb una Feature per línia", ".parquet": "Parquet"}
+
+def codificarPolilinia(punts: Iterable[Coordenada], precisio: int = PRECISIO_POLILINIA) -> str:
+    """
+    Codifica una ruta amb l'algorisme de polilínies de Google: cada coordenada es guarda com la diferència amb l'anterior,
+    arrodonida a precisio decimals, en blocs de 5 bits representats amb caràcters ASCII imprimibles.
+
+    Args:
+        punts (Iterable[Coordenada]): Coordenades de la ruta.
+        precisio (int): Nombre de decimals de les coordenades.
+
+    Returns:
+        str: Polilínia codificada.
+    """
+    factor: int = 10 ** precisio
+    caracters: List[str] = []
+    latitudAnterior: int = 0
+    longitudAnterior: int = 0
+    for punt in punts:
+        latitud: int = round(punt.latitud * factor)
+        longitud: int = round(punt.longitud * factor)
+        for diferencia in (latitud - latitudAnterior, longitud - longitudAnterior):
+            valor: int = ~(diferencia << 1) if diferencia < 0 else diferencia << 1
+            while valor >= 0x20:
+                caracters.append(chr((0x20 | (valor & 0x1f)) + 63))
+                valor >>= 5
+            caracters.append(chr(valor + 63))
+        latitudAnterior, longitudAnterior = latitud, longitud
+    return "".join(caracters)
+
+def descodificarPolilinia(polilinia: str, precisio: int = PRECISIO_POLILINIA) -> List[Tuple[float, float]]:
+    """
+    Descodifica una polilínia de codificarPolilinia.
+
+    Returns:
+        List[Tuple[float, float]]: Latitud i longitud de cada punt.
+    """
+    factor: int = 10 ** precisio
+    punts: List[Tuple[float, float]] = []
+    posicio: int = 0
+    coordenades: List[int] = [0, 0]
+    while posicio < len(polilinia):
+        for i in range(2):
+            valor: int = 0
+            desplacament: int = 0
+            while True:
+                bloc: int = ord(polilinia[posicio]) - 63
+                posicio += 1
+                valor |= (bloc & 0x1f) << desplacament
+                desplacament += 5
+                if bloc < 0x20:
+                    break
+            coordenades[i] += ~(valor >> 1) if valor & 1 else valor >> 1
+        punts.append((coordenades[0] / factor, coordenades[1] / factor))
+    return punts
+
+class EscriptorViatges(ABC):
+    """
+    Escriu els viatges d'una simulació a un fitxer a mesura que es planifiquen, sense guardar-ne cap a memòria.
+
+    Cada viatge té el número, els noms dels restaurants en l'ordre de recollida, els identificadors de les comandes
+    en l'ordre de lliurament, la distància en metres i la ruta (recollida i lliurament) com a polilínia codificada.
+    """
+
+    def __init__(self, cami: str, precisio: int = PRECISIO_POLILINIA) -> None:
+        self.cami: str = cami
+        self.precisio: int = precisio
+        self.viatges: int = 0
+
+    def __enter__(self) -> "EscriptorViatges":
+        return self
+
+    def __exit__(self, *excepcio: Any) -> None:
+        self.tancar()
+
+    def propietats(self, numero: int, recollides: List[str], lliuraments: List[int], distancia: float, ruta: List[Coordenada]) -> Dict[str, Any]:
+        # Les vistes de les taules tornen tipus de numpy, que json no sap escriure
+        return {"viatge": int(numero), "recollides": [str(nom) for nom in recollides], "lliuraments": [int(id) for id in lliuraments],
+                "distancia": float(distancia), "polilinia": codificarPolilinia(ruta, self.precisio)}
+
+    @abstractmethod
+    def escriure(self, numero: int, recollides: List[str], lliuraments: List[int], distancia: float, ruta: List[Coordenada]) -> None:
+        """
+        Afegeix un viatge al fitxer.
+
+        Args:
+            numero (int): Número del viatge.
+            recollides (List[str]): Noms dels restaurants en l'ordre de recollida.
+            lliuraments (List[int]): Identificadors de les comandes en l'ordre de lliurament.
+            distancia (float): Distància del viatge en metres.
+            ruta (List[Coordenada]): Coordenades de la ruta, des de l'inici de la recollida fins a l'últim lliurament.
+        """
+
+    @abstractmethod
+    def tancar(self) -> None:
+        """
+        Tanca el fitxer, que queda complet.
+        """
+
+class EscriptorGeoJSON(EscriptorViatges):
+    """
+    Escriu cada viatge com una Feature GeoJSON amb la ruta com a LineString i la resta de dades com a propietats.
+
+    Amb l'extensió .geojsonl cada Feature ocupa una línia. Amb .geojson les Features formen una FeatureCollection:
+    després de cada viatge s'escriu el final de la col·lecció i el següent viatge el sobreescriu, de manera que el fitxer
+    sempre és un JSON vàlid, encara que la simulació s'interrompi. En els dos casos, si el fitxer ja existeix s'hi afegeixen els viatges.
+    """
+
+    INICI: bytes = b'{"type": "FeatureCollection", "features": [\n'
+    FINAL: bytes = b"\n]}\n"
+    SEPARADOR: bytes = b",\n"
+
+    def __init__(self, cami: str, precisio: int = PRECISIO_POLILINIA) -> None:
+        super().__init__(cami, precisio)
+        self.coleccio: bool = not cami.lower().endswith(".geojsonl")
+        self.buit: bool = True
+        if not self.coleccio:
+            self.fitxer = open(cami, "ab")
+        elif os.path.exists(cami) and os.path.getsize(cami) > 0:
+            self.fitxer = open(cami, "r+b")
+            self.fitxer.seek(-len(self.FINAL), os.SEEK_END)
+            if self.fitxer.read() != self.FINAL:
+                self.fitxer.close()
+                raise ValueError(f"El fitxer {cami} no és una FeatureCollection escrita per EscriptorGeoJSON, no s'hi poden afegir viatges.")
+            self.fitxer.seek(-len(self.FINAL), os.SEEK_END)
+            self.buit = self.fitxer.tell() == len(self.INICI)
+        else:
+            self.fitxer = open(cami, "wb")
+            self.fitxer.write(self.INICI)
+
+    def escriure(self, numero: int, recollides: List[str], lliuraments: List[int], distancia: float, ruta: List[Coordenada]) -> None:
+        geometria: Optional[Dict[str, Any]] = None
+        if len(ruta) >= 2:
+            geometria = {"type": "LineString", "coordinates": [[round(punt.longitud, DECIMALS_GEOJSON), round(punt.latitud, DECIMALS_GEOJSON)] for punt in ruta]}
+        feature: bytes = json.dumps({"type": "Feature", "geometry": geometria, "properties": self.propietats(numero, recollides, lliuraments, distancia, ruta)},
+                                    ensure_ascii=False).encode("utf-8")
+        if not self.coleccio:
+            self.fitxer.write(feature + b"\n")
+        else:
+            self.fitxer.write((b"" if self.buit else self.SEPARADOR) + feature + self.FINAL)
+            # El final es torna a escriure darrere del viatge següent
+            self.fitxer.seek(-len(self.FINAL), os.SEEK_CUR)
+        self.fitxer.flush()
+        self.buit = False
+        self.viatges += 1
+
+    def tancar(self) -> None:
+        if self.fitxer.closed:
+            return
+        if self.coleccio and self.buit:
+            self.fitxer.write(self.FINAL)
+        self.fitxer.close()
+
+class EscriptorParquet(EscriptorViatges):
+    """
+    Escriu cada viatge com un grup de files d'un fitxer Parquet. Necessita pyarrow, que no és una dependència obligatòria.
+
+    El format Parquet no permet afegir files a un fitxer tancat: si el fitxer ja existeix se sobreescriu,
+    i el fitxer només es pot llegir quan s'ha tancat l'escriptor.
+    """
+
+    def __init__(self, cami: str, precisio: int = PRECISIO_POLILINIA) -> None:
+        super().__init__(cami, precisio)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError(f"Per escriure el fitxer {cami} cal instal·lar pyarrow (pip install pyarrow).") from error
+        self.pa = pa
+        self.esquema = pa.schema([("viatge", pa.int32()), ("recollides", pa.list_(pa.string())), ("lliuraments", pa.list_(pa.int64())),
+                                  ("distancia", pa.float64()), ("polilinia", pa.string())])
+        self.fitxer = pq.ParquetWriter(cami, self.esquema)
+        self.obert: bool = True
+
+    def escriure(self, numero: int, recollides: List[str], lliuraments: List[int], distancia: float, ruta: List[Coordenada]) -> None:
+        propietats: Dict[str, Any] = self.propietats(numero, recollides, lliuraments, distancia, ruta)
+        self.fitxer.write_table(self.pa.Table.from_pylist([propietats], schema=self.esquema))
+        self.viatges += 1
+
+    def tancar(self) -> None:
+        if self.obert:
+            self.fitxer.close()
+            self.obert = False
+
+def obrirEscriptor(cami: str, precisio: int = PRECISIO_POLILINIA) -> EscriptorViatges:
+    """
+    Obre l'escriptor de viatges del format de l'extensió del fitxer.
+
+    Args:
+        cami (str): Camí del fitxer (.geojson, .geojsonl o .parquet).
+        precisio (int): Nombre de decimals de les polilínies.
+
+    Returns:
+        EscriptorViatges: Escriptor obert, que s'ha de tancar (o fer servir amb with) perquè el fitxer quedi complet.
+    """
+    extensio: str = os.path.splitext(cami)[1].lower()
+    if extensio not in FORMATS_VIATGES:
+        raise ValueError(f"El format {extensio or cami} no existeix. Els formats disponibles són: {', '.join(FORMATS_VIATGES)}.")
+    if extensio == ".parquet":
+        return EscriptorParquet(cami, precisio)
+    return EscriptorGeoJSON(cami, precisio)
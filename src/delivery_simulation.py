@@ -1,20 +1,49 @@
-from typing import List, Optional, Tuple, Union
-import argparse, os, heapq, time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext, redirect_stdout
+import argparse, cProfile, io, os, random, time
 
 from domain.coordenada import Coordenada
 from domain.comanda import Comanda
 from domain.restaurant import Restaurant
+from domain.especialitat import Especialitat
 from domain.mapGenerator import MapGenerator
+from domain.distancies import MatriuDistancies, METRIQUES
+from domain.magatzemDistancies import MagatzemDistancies
+from domain.indexEspacial import IndexEspacial
+from domain.taules import VistaComanda, VistaRestaurant
+from domain.xarxaViaria import XarxaViaria
+from algorismes.veinatge import VeinatgeIntercanvi
+from algorismes.multiInici import EstadistiquesEscalada, escaladaMultiInici
+from algorismes.motxillaExacta import fitnessSolucio, programacioDinamica
+from algorismes.millorarRuta import millorarRuta
+from algorismes.cotes import TOLERANCIA_GAP, cotaCompromis, cotaRuta, gap, longitudRuta, valorObjectiu
+from algorismes.cercaLocal import TEMPS_MAXIM, ProgresCerca, cercaTabu, recuitSimulat
+from algorismes.flota import VELOCITAT_REPARTIDOR, ResultatRepartidor, repartirComandes, repartirRestaurants
+from algorismes.replanificacio import Pla, Viatge
+from algorismes.assignacio import ASSIGNACIONS, planificarRecollides
+from algorismes.zones import METODES_ZONES, MIDA_ZONA, Zona, separarSobrants, zonificar
+from algorismes.esdeveniments import ARRIBADA, DESPATX, FI_VIATGE, LLIURAMENT, RECOLLIDA, CuaEsdeveniments, RegistreComanda, arribadesPoisson, resumServei
 from data.data import comandes, restaurants, especialitats, tecnocampus
+from data.carregador import DadesColumnars, carregarDades, llegirGraphML
+from data.resultats import EscriptorViatges, obrirEscriptor
+from ingesta import microLots, simularArribades
+from instrumentacio import instrumentacio
+from opcions import OpcionsPlanificacio
 
-def hillClimbing(comandes: List[Comanda], capacitatMaxima: int, iteracionsMaximes: int = 1000) -> Tuple[List[Comanda], List[Comanda]]:
+def hillClimbing(comandes: List[Comanda], capacitatMaxima: int, iteracionsMaximes: int = 1000, toleranciaGap: float = TOLERANCIA_GAP) -> Tuple[List[Comanda], List[Comanda]]:
     """
     Funció que implementa l'algorisme Hill Climbing per a la resolució del problema de la motxilla.
 
+    El veïnatge són tots els intercanvis de dues comandes. Cada intercanvi s'avalua incrementalment
+    amb VeinatgeIntercanvi i només s'aplica el millor. L'escalada s'atura quan cap intercanvi millora la solució
+    o quan el gap respecte a la cota inferior del compromís (cotaCompromis) no supera toleranciaGap.
+
     Args:
         comandes (List[Comanda]): Llista de comandes a lliurar.
         capacitatMaxima (int): Capacitat màxima de la motxilla.
         iteracionsMaximes (int): Nombre màxim d'iteracions.
+        toleranciaGap (float): Gap relatiu a partir del qual l'escalada s'atura. Amb 0 només s'atura abans d'hora si la solució és òptima.
 
     Returns:
         Tuple[List[Comanda], List[Comanda]]:
@@ -22,83 +51,41 @@ def hillClimbing(comandes: List[Comanda], capacitatMaxima: int, iteracionsMaxime
             - Llista de comandes no programades per lliurar.
     """
 
-    def fitness(comandes: List[Comanda], capacitatMaxima: int,) -> Tuple[float, int]:
-        """
-        Funció que calcula el fitness d'una solució.
+    veinatge: VeinatgeIntercanvi = VeinatgeIntercanvi(comandes, capacitatMaxima)
+    cota: float = cotaCompromis(comandes, capacitatMaxima)
+    iteracions: int = veinatge.pujar(iteracionsMaximes, valorObjectiu(cota, toleranciaGap))
+    if instrumentacio.actiu:
+        instrumentacio.comptar("iteracionsHillClimbing", iteracions)
+        instrumentacio.esdeveniment("convergencia", comandes=len(comandes), iteracions=iteracions, fitness=veinatge.fitness(),
+                                    gap=round(gap(-veinatge.fitness()[0], cota), 6))
 
-        Args:
-            comandes (List[Comanda]): Llista de comandes a lliurar.
-            capacitatMaxima (int): Capacitat màxima de la motxilla.
+    solucioActual: List[Comanda] = veinatge.solucio
+    return solucioActual[:veinatge.numComandes], solucioActual[veinatge.numComandes:]
 
-        Returns:
-            Tuple[int, int]: Tupla amb el fitness de la solució i el nombre de comandes.
-        """
-        pesAcumulat: int = 0
-        numComandes: int = 0
-        sumCompromis: float = 0
-        for comanda in comandes:
-            if pesAcumulat + comanda.especialitat.pes > capacitatMaxima:
-                break
-            pesAcumulat += comanda.especialitat.pes
-            # El compromís de les comandes es multiplica per 0.9^numComandes
-            # L'objectiu és donar més pes a les comandes més urgents
-            # i garantir que dintre de la solució estiguin ordenades per compromís.
-            sumCompromis += comanda.especialitat.compromis * 0.9 ** numComandes 
-            numComandes += 1
-        return (-sumCompromis, numComandes)
-
-    def generarVeins(comandes: List[Comanda]) -> List[List[Comanda]]:
-        """
-        Funció que genera veins d'una solució.
-
-        Args:
-            comandes (List[Comanda]): Llista de comandes a lliurar.
-
-        Returns:
-            List[List[Comanda]]: Llista de veins de la solució.
-        """
-        veins: List[List[Comanda]] = []
-        for i in range(len(comandes)):
-            for j in range(i + 1, len(comandes)):
-                vei: List[Comanda] = comandes[:]
-                vei[i], vei[j] = vei[j], vei[i]
-                veins.append(vei)
-        return veins
-    
-    solucioActual: List[Comanda] = comandes[:]
-    fitnessAcutal: Tuple[float, int] = fitness(solucioActual, capacitatMaxima)
-    repeticions: int = 0
-    for i in range(iteracionsMaximes):
-        veins: List[List[Comanda]] = generarVeins(solucioActual)
-        veinsFitness: List[Tuple[Tuple[float, int], List[Comanda]]] = [(fitness(vei, capacitatMaxima), vei) for vei in veins]
-        millorFitness, millorVei = max(veinsFitness, key=lambda x: x[0])
-        if millorFitness > fitnessAcutal:
-            solucioActual = millorVei
-            fitnessAcutal = millorFitness
-            repeticions = 0
-        else:
-            repeticions += 1
-            if repeticions > iteracionsMaximes*0.1:
-                break
-        
-    solucioFinal: List[Comanda] = []
-    pesAcumulat: int = 0
-    for comanda in solucioActual[:]:
-        if pesAcumulat + comanda.especialitat.pes > capacitatMaxima:
-            break
-        pesAcumulat += comanda.especialitat.pes
-        solucioFinal.append(comanda)
-        solucioActual.remove(comanda)
-    return solucioFinal, solucioActual
+# Algorismes per escollir les comandes de cada motxilla, per nom. Tots reben les comandes, la capacitat màxima, el temps màxim
+# en segons, la llavor, la funció de progrés i la tolerància del gap, encara que no els facin servir. Per afegir-ne un n'hi ha prou d'afegir-lo al diccionari.
+SOLVERS: Dict[str, Callable[[List[Comanda], int, float, Optional[int], Optional[Callable[[ProgresCerca], None]], float], Tuple[List[Comanda], List[Comanda]]]] = {
+    "hillClimbing": lambda comandes, capacitatMaxima, tempsMaxim, llavor, informar, toleranciaGap: hillClimbing(comandes, capacitatMaxima, toleranciaGap=toleranciaGap),
+    "programacioDinamica": lambda comandes, capacitatMaxima, tempsMaxim, llavor, informar, toleranciaGap: programacioDinamica(comandes, capacitatMaxima),
+    "recuitSimulat": lambda comandes, capacitatMaxima, tempsMaxim, llavor, informar, toleranciaGap: recuitSimulat(comandes, capacitatMaxima, tempsMaxim, llavor, informar,
+                                                                                                                   toleranciaGap=toleranciaGap),
+    "cercaTabu": lambda comandes, capacitatMaxima, tempsMaxim, llavor, informar, toleranciaGap: cercaTabu(comandes, capacitatMaxima, tempsMaxim, llavor, informar,
+                                                                                                           toleranciaGap=toleranciaGap)
+}
 
-def best_first_search(inici: Coordenada, llista: Union[List[Restaurant], List[Comanda]], comanda: Comanda) -> Tuple[Optional[Union[Restaurant, Comanda]], float]:
+def best_first_search(inici: Coordenada, llista: Union[List[Restaurant], List[Comanda]], comanda: Comanda, matriu: Optional[MatriuDistancies] = None, index: Optional[IndexEspacial] = None) -> Tuple[Optional[Union[Restaurant, Comanda]], float]:
     """
     Funció que implementa l'algorisme Best First Search per a la resolució del problema de la motxilla.
 
+    Si es dona un índex espacial, la cerca es fa a l'arbre k-d de l'especialitat de la comanda en O(log n)
+    i la llista no es recorre. Altrament es fa un escombrat lineal de la llista.
+
     Args:
         inici (Coordenada): Coordenada inicial de la ubicació actual.
         restaurants (List[Restaurant]): Llista de restaurants disponibles.
         comanda (Comanda): Comanda a lliurar.
+        matriu (Optional[MatriuDistancies]): Matriu de distàncies precalculada. Si no n'hi ha, es calcula cada distància.
+        index (Optional[IndexEspacial]): Índex espacial amb els mateixos elements que la llista.
 
     Returns:
         Tuple[Optional[Restaurant], float]:
@@ -106,22 +93,28 @@ def best_first_search(inici: Coordenada, llista: Union[List[Restaurant], List[Co
             - Distància entre la ubicació actual i el restaurant més proper.
     """
 
-    cua: List[Tuple[float, Union[Optional[Restaurant], Optional[Comanda]]]] = []
-    escollit: Union[Optional[Restaurant], Optional[Comanda]] = None
-    distancia: float = 0
-    
-    for r in llista:
-        if r.especialitat == comanda.especialitat:
-            distance = inici.distancia(r.coordenades)
-            heapq.heappush(cua, (distance, r))
+    if index is not None:
+        return index.mesProper(inici, comanda.especialitat)
 
-    while cua:
-        distancia, restaurant = heapq.heappop(cua)
-        return restaurant, distancia
-    
-    return None, 0.0
+    candidats: List[Union[Restaurant, Comanda]] = [r for r in llista if r.codiEspecialitat == comanda.codiEspecialitat]
+    if instrumentacio.actiu:
+        instrumentacio.comptar("candidatsBFS", len(candidats))
+    if not candidats:
+        return None, 0.0
+
+    if matriu is not None:
+        distancies: List[float] = matriu.distancies(inici, [r.coordenades for r in candidats]).tolist()
+    else:
+        distancies = [inici.distancia(r.coordenades) for r in candidats]
+
+    # En cas d'empat es queda el primer candidat de la llista, igual que l'índex espacial
+    posicio: int = min(range(len(candidats)), key=lambda i: distancies[i])
+    return candidats[posicio], distancies[posicio]
 
-def omplirMotxilla(inici: Coordenada, comandes: List[Comanda], capacitatMaxima: int, restaurants: List[Restaurant], repetirRestaurants: bool)-> Tuple[List[Comanda], float, Coordenada, List[Comanda], List[Restaurant], List[Coordenada]]:
+def omplirMotxilla(inici: Coordenada, comandes: List[Comanda], capacitatMaxima: int, restaurants: List[Restaurant], repetirRestaurants: bool, matriu: Optional[MatriuDistancies] = None, indexRestaurants: Optional[IndexEspacial] = None,
+                   inicis: int = 1, executor: Optional[Executor] = None, llavor: Optional[int] = None, treballadors: Optional[int] = None,
+                   solver: str = "hillClimbing", informarGap: bool = False, tempsSolver: float = TEMPS_MAXIM,
+                   informarProgres: Optional[Callable[[ProgresCerca], None]] = None, assignacio: str = "sequencial", toleranciaGap: float = TOLERANCIA_GAP)-> Tuple[List[Comanda], float, Coordenada, List[Comanda], List[Restaurant], List[Coordenada]]:
     """
     Funció que simula l'ompliment d'una motxilla amb comandes recollides en restaurants.
 
@@ -131,11 +124,23 @@ def omplirMotxilla(inici: Coordenada, comandes: List[Comanda], capacitatMaxima:
         Això ajuda a prioritzar les comandes urgents i garanteix que es lliurin a temps.
         El temps de compromís ve determinat per l'especialitat de la comanda. Cada especialitat té un temps de compromís diferent.
         La funció calcula el pes acumulat de les comandes i s'assegura que no superi la seva capacitat màxima.
+        Amb més d'un inici es fan diverses escalades des de permutacions aleatòries en paral·lel i es queda la millor.
+        Amb el solver programacioDinamica el mateix problema es resol de manera exacta.
+        Els solvers recuitSimulat i cercaTabu recorren el mateix veïnatge durant tempsSolver segons i retornen la millor solució trobada.
+        Tots els solvers de cerca local s'aturen abans si el gap respecte a la cota inferior del compromís no supera toleranciaGap.
+        Amb informarGap es mostra el gap de la motxilla i de la ruta de recollida respecte a les seves cotes inferiors.
     
     Heurística per determinar els restaurants [Best First Search]:
         La funció selecciona el restaurant més proper a la ubicació actual i que ofereixi l'especialitat de la comanda a lliurar.
-        Itera pels restaurants disponibles i calcula la distància entre la ubicació actual i cada restaurant.
-        Si l'opció de repetir restaurants està desactivada, el restaurant seleccionat s'elimina de la llista de restaurants disponibles.
+        La cerca es fa a l'índex espacial de restaurants, amb un arbre k-d per especialitat.
+        Si l'opció de repetir restaurants està desactivada, el restaurant seleccionat s'elimina de l'índex i,
+        en acabar, de la llista de restaurants disponibles.
+
+    Assignació conjunta dels restaurants [algorisme hongarès]:
+        Amb assignacio="hongares", els restaurants de totes les comandes de la motxilla s'escullen alhora, minimitzant la suma
+        de les distàncies des de la ubicació actual fins al restaurant i des del restaurant fins a la comanda. Sense repetir
+        restaurants, les primeres comandes ja no es queden els restaurants que les següents necessiten. Després s'ordenen
+        les recollides amb 2-opt i Or-opt dins dels trams amb el mateix compromís.
     
     Args:
         inici (Coordenada): Coordenada inicial de la ubicació actual.
@@ -143,6 +148,21 @@ def omplirMotxilla(inici: Coordenada, comandes: List[Comanda], capacitatMaxima:
         capacitatMaxima (int): Capacitat màxima de la motxilla.
         restaurants (List[Restaurant]): Llista de restaurants disponibles.
         repetirRestaurants (bool): Indica si es poden repetir els restaurants visitats.
+        matriu (Optional[MatriuDistancies]): Matriu de distàncies precalculada.
+        indexRestaurants (Optional[IndexEspacial]): Índex espacial dels restaurants disponibles, es pot reutilitzar entre crides.
+            Si no es dona, es construeix a partir de la llista de restaurants.
+        inicis (int): Nombre d'escalades independents del Hill Climbing.
+        executor (Optional[Executor]): Pool de processos per a les escalades, es pot reutilitzar entre crides.
+        llavor (Optional[int]): Llavor de les permutacions inicials de les escalades.
+        treballadors (Optional[int]): Nombre de processos de les escalades si no es dona executor. Amb 1 s'executen en aquest procés.
+        solver (str): Nom de l'algorisme de SOLVERS per escollir les comandes.
+        informarGap (bool): Indica si s'ha de mostrar la distància entre el resultat del solver i l'òptim.
+        tempsSolver (float): Temps màxim en segons dels solvers amb temps límit.
+        informarProgres (Optional[Callable[[ProgresCerca], None]]): Funció que rep el progrés dels solvers amb temps límit
+            i, amb més d'un inici, cada escalada acabada amb la millor fins al moment.
+            Si no n'hi ha i la instrumentació està activa, el progrés s'escriu a la traça.
+        assignacio (str): "sequencial" per escollir el restaurant més proper de cada comanda en ordre, o "hongares" per assignar-los tots alhora.
+        toleranciaGap (float): Gap relatiu respecte a la cota inferior del compromís a partir del qual els solvers s'aturen.
     
     Returns:
         Tuple[List[Restaurant], float, Coordenada, List[Comanda], List[Restaurant]]: 
@@ -154,17 +174,70 @@ def omplirMotxilla(inici: Coordenada, comandes: List[Comanda], capacitatMaxima:
             - Llista de coordenades de la ruta.
     """
     
+    if solver not in SOLVERS:
+        raise ValueError(f"El solver {solver} no existeix. Els solvers disponibles són: {', '.join(SOLVERS)}.")
+    if assignacio not in ASSIGNACIONS:
+        raise ValueError(f"L'assignació {assignacio} no existeix. Les assignacions disponibles són: {', '.join(ASSIGNACIONS)}.")
+    if informarProgres is None and instrumentacio.actiu:
+        informarProgres = lambda progres: instrumentacio.esdeveniment("progres", solver=progres.solver, iteracio=progres.iteracio, tempsCerca=round(progres.temps, 6),
+                                                                      fitness=progres.millorFitness, final=progres.final)
+
     ubicacioActual: Coordenada = inici
     motxilla: List[Comanda] = []
     capacitatActual: int = 0
     distanciaRecorreguda: float = 0
     ruta: List[Coordenada] = [ubicacioActual]
+    restaurantsVisitats: Set[Restaurant] = set()
+
+    if indexRestaurants is None:
+        indexRestaurants = IndexEspacial(restaurants, matriu)
 
     comandesProgramades: List[Comanda] = []
     comandesNoProgramades: List[Comanda] = []
 
     # // comandes = sorted(comandes, key=lambda comanda: comanda.especialitat.compromis)
-    comandesProgramades, comandesNoProgramades = hillClimbing(comandes, capacitatMaxima)
+    with instrumentacio.fase("seleccio", solver=solver, comandes=len(comandes)):
+        if solver == "hillClimbing" and inicis > 1:
+            estadistiques: List[EstadistiquesEscalada]
+            informarEscalada: Optional[Callable[[EstadistiquesEscalada, EstadistiquesEscalada], None]] = None
+            if informarProgres is not None:
+                tempsInici: float = time.perf_counter()
+                acabades: List[EstadistiquesEscalada] = []
+
+                def informarEscalada(resultat: EstadistiquesEscalada, millorFinsAra: EstadistiquesEscalada) -> None:
+                    acabades.append(resultat)
+                    informarProgres(ProgresCerca("hillClimbing", len(acabades), time.perf_counter() - tempsInici, resultat.fitness, millorFinsAra.fitness,
+                                                 final=len(acabades) == inicis))
+            comandesProgramades, comandesNoProgramades, estadistiques = escaladaMultiInici(comandes, capacitatMaxima, numInicis=inicis, executor=executor,
+                                                                                           numTreballadors=treballadors, llavor=llavor,
+                                                                                           informar=informarEscalada, toleranciaGap=toleranciaGap)
+            millor: EstadistiquesEscalada = max(estadistiques, key=lambda e: (e.fitness, -e.inici))
+            if instrumentacio.actiu:
+                instrumentacio.comptar("iteracionsHillClimbing", sum(e.iteracions for e in estadistiques))
+            print(f"\t\tS'han fet {len(estadistiques)} escalades en {len({e.proces for e in estadistiques})} processos. La millor és la número {millor.inici} amb {millor.fitness[1]} comandes i fitness {round(millor.fitness[0], 2)} després de {millor.iteracions} iteracions.")
+        else:
+            comandesProgramades, comandesNoProgramades = SOLVERS[solver](comandes, capacitatMaxima, tempsSolver, llavor, informarProgres, toleranciaGap)
+
+    if informarGap and solver != "programacioDinamica":
+        fitnessActual: Tuple[float, int] = fitnessSolucio(comandesProgramades, comandesNoProgramades, capacitatMaxima)
+        fitnessOptim: Tuple[float, int] = fitnessSolucio(*programacioDinamica(comandes, capacitatMaxima), capacitatMaxima)
+        diferencia: float = fitnessOptim[0] - fitnessActual[0]
+        print(f"\t\tLa solució de {solver} té un compromís de {round(-fitnessActual[0], 2)} amb {fitnessActual[1]} comandes i l'òptim és {round(-fitnessOptim[0], 2)} amb {fitnessOptim[1]} comandes (gap de {round(diferencia, 2)}, {round(100 * diferencia / max(-fitnessOptim[0], 1e-12), 2)}%).")
+    if informarGap or instrumentacio.actiu:
+        # La cota no necessita resoldre la motxilla de manera exacta, per això es pot calcular a cada viatge
+        compromis: float = -fitnessSolucio(comandesProgramades, comandesNoProgramades, capacitatMaxima)[0]
+        cota: float = cotaCompromis(comandes, capacitatMaxima)
+        if informarGap:
+            print(f"\t\tLa motxilla té un compromís de {round(compromis, 2)} i la cota inferior és {round(cota, 2)} (gap del {round(100 * gap(compromis, cota), 2)}%).")
+        if instrumentacio.actiu:
+            instrumentacio.esdeveniment("gap", objecte="motxilla", valor=round(compromis, 6), cota=round(cota, 6), gap=round(gap(compromis, cota), 6))
+
+    assignats: Dict[Comanda, Restaurant] = {}
+    if assignacio == "hongares" and comandesProgramades:
+        with instrumentacio.fase("assignacio", comandes=len(comandesProgramades)):
+            candidats: Dict[int, List[Restaurant]] = {comanda.codiEspecialitat: indexRestaurants.actius(comanda.especialitat) for comanda in comandesProgramades}
+            comandesProgramades, assignats = planificarRecollides(ubicacioActual, comandesProgramades, candidats, repetirRestaurants,
+                                                                  matriu if matriu is not None else MatriuDistancies([inici]))
 
     while len(comandesProgramades) > 0:
         comanda: Comanda = comandesProgramades.pop(0)
@@ -184,9 +257,14 @@ def omplirMotxilla(inici: Coordenada, comandes: List[Comanda], capacitatMaxima:
         
         # // if restaurant is not None:
 
-        escollit, distanciaMinima = best_first_search(ubicacioActual, restaurants, comanda)
+        if comanda in assignats:
+            escollit = assignats[comanda]
+            distanciaMinima = matriu.distancia(ubicacioActual, escollit.coordenades) if matriu is not None else ubicacioActual.distancia(escollit.coordenades)
+        else:
+            # Les comandes sense restaurant assignat segueixen el camí de sempre
+            escollit, distanciaMinima = best_first_search(ubicacioActual, restaurants, comanda, matriu, indexRestaurants)
 
-        if escollit is not None and isinstance(escollit, Restaurant):
+        if escollit is not None and isinstance(escollit, (Restaurant, VistaRestaurant)):
             restaurant = escollit
 
             print(f"\t\tAnem al restaurant {restaurant.nom} ({restaurant.especialitat.especialitat}) que està a {round(distanciaMinima, 2)} metres a les coordenades ({restaurant.coordenades.latitud}, {restaurant.coordenades.longitud}) a per la comanda {comanda.id} ({comanda.especialitat.especialitat}).")
@@ -198,16 +276,46 @@ def omplirMotxilla(inici: Coordenada, comandes: List[Comanda], capacitatMaxima:
             ruta.append(ubicacioActual)
 
             if not repetirRestaurants:
-                restaurants.remove(restaurant)
+                indexRestaurants.eliminar(restaurant)
+                restaurantsVisitats.add(restaurant)
         else:
             print(f"\t\tNo hi ha cap restaurant que ofereixi la especialitat {comanda.especialitat.especialitat} a prop de la ubicació actual.")
             Exception(f"No hi ha cap restaurant que ofereixi la especialitat {comanda.especialitat.especialitat} a prop de la ubicació actual.")
     
+    if restaurantsVisitats:
+        restaurants[:] = [r for r in restaurants if r not in restaurantsVisitats]
+
     print(f"\t\tLa motxilla s'ha omplert amb {capacitatActual} g de {capacitatMaxima} g i s'han visitat {len(motxilla)} restaurants.")
+    if informarGap or instrumentacio.actiu:
+        informarGapRuta("recollida", ruta, distanciaRecorreguda, matriu.distancia if matriu is not None else Coordenada.distancia, informarGap)
 
     return motxilla, distanciaRecorreguda, ubicacioActual, comandesNoProgramades, restaurants, ruta
 
-def entregarComandes(inici: Coordenada, motxilla: List[Comanda]) -> Tuple[float, Coordenada, List[Coordenada]]:
+def informarGapRuta(nom: str, ruta: List[Coordenada], distancia: float, funcioDistancia: Callable[[Coordenada, Coordenada], float], mostrar: bool = True) -> float:
+    """
+    Calcula el gap d'una ruta respecte a la cota de l'arbre d'expansió mínima, el mostra i l'escriu a la traça si la instrumentació està activa.
+
+    Args:
+        nom (str): Nom de la ruta ("recollida" o "lliurament").
+        ruta (List[Coordenada]): Coordenades de la ruta, començant per l'inici.
+        distancia (float): Longitud de la ruta en metres.
+        funcioDistancia (Callable[[Coordenada, Coordenada], float]): Funció de distància.
+        mostrar (bool): Indica si s'ha de mostrar el gap.
+
+    Returns:
+        float: Gap relatiu de la ruta.
+    """
+    cota: float = cotaRuta(ruta[0], ruta[1:], funcioDistancia)
+    gapRuta: float = gap(distancia, cota)
+    if mostrar:
+        print(f"\t\tLa ruta de {nom} fa {round(distancia, 2)} metres i la cota inferior és {round(cota, 2)} metres (gap del {round(100 * gapRuta, 2)}%).")
+    if instrumentacio.actiu:
+        instrumentacio.esdeveniment("gap", objecte=nom, valor=round(distancia, 6), cota=round(cota, 6), gap=round(gapRuta, 6))
+    return gapRuta
+
+def entregarComandes(inici: Coordenada, motxilla: List[Comanda], matriu: Optional[MatriuDistancies] = None,
+                     millorarRutes: bool = False, tempsMillora: float = 0.05, mantenirPrioritat: bool = True,
+                     informarGap: bool = False, toleranciaGap: float = TOLERANCIA_GAP) -> Tuple[float, Coordenada, List[Coordenada]]:
     """
     Funció que simula l'entrega de comandes a partir d'una motxilla de restaurants.
 
@@ -218,12 +326,23 @@ def entregarComandes(inici: Coordenada, motxilla: List[Comanda]) -> Tuple[float,
 
     Heurística per determinar les comandes [Best First Search]:
         La funció selecciona la comanda més propera a la ubicació actual entre les comandes de la mateixa especialitat.
-        Itera per les comandes disponibles i calcula la distància entre la ubicació actual i cada comanda.
+        La cerca es fa a un índex espacial de la motxilla, amb un arbre k-d per especialitat.
+
+    Millora de la ruta [2-opt / Or-opt]:
+        Opcionalment, l'ordre de lliurament obtingut es millora amb moviments 2-opt i Or-opt durant un temps màxim.
+        Si es manté la prioritat, només es reordenen les comandes amb el mateix compromís.
+        La millora s'atura abans si el gap respecte a la cota de l'arbre d'expansió mínima no supera toleranciaGap.
     
     Args:
         inici (Coordenada): Coordenada inicial de la ubicació actual.
         motxilla (List[Restaurant]): Llista de restaurants a la motxilla.
         comandes (List[Comanda]): Llista de comandes a lliurar.
+        matriu (Optional[MatriuDistancies]): Matriu de distàncies precalculada.
+        millorarRutes (bool): Indica si s'ha de millorar l'ordre de lliurament amb 2-opt i Or-opt.
+        tempsMillora (float): Temps màxim en segons de la millora de la ruta.
+        mantenirPrioritat (bool): Indica si la millora ha de mantenir l'ordre per compromís.
+        informarGap (bool): Indica si s'ha de mostrar el gap de la ruta respecte a la seva cota inferior.
+        toleranciaGap (float): Gap relatiu a partir del qual la millora de la ruta s'atura.
     
     Returns:
         Tuple[float, Coordenada, List[Comanda]]: 
@@ -239,10 +358,17 @@ def entregarComandes(inici: Coordenada, motxilla: List[Comanda]) -> Tuple[float,
     # ? Realment no cal ordenar les comandes per compromis, ja estan ordenades de quan les hem recollit i estan emagatzemades a una llista ordenada.
     # ? motxilla = sorted(motxilla, key=lambda comanda: comanda.especialitat.compromis)
 
-    while len(motxilla) > 0:
-        comanda: Optional[Comanda] = motxilla[0]
+    indexMotxilla: IndexEspacial = IndexEspacial(motxilla, matriu)
+    distancia: Callable[[Coordenada, Coordenada], float] = matriu.distancia if matriu is not None else Coordenada.distancia
+    sequencia: List[Comanda] = []
+    seguent: int = 0
+
+    while len(indexMotxilla) > 0:
+        # La primera comanda encara no lliurada determina l'especialitat a lliurar
+        while motxilla[seguent] not in indexMotxilla:
+            seguent += 1
+        comanda: Optional[Comanda] = motxilla[seguent]
         escollit: Optional[Union[Restaurant, Comanda]] = None
-        distanciaMinima: float = float("inf")
 
         # // for r in motxilla:
         # //     if r.especialitat == comanda.especialitat:
@@ -253,66 +379,716 @@ def entregarComandes(inici: Coordenada, motxilla: List[Comanda]) -> Tuple[float,
 
         # // if comanda is not None:
 
-        escollit, distanciaMinima = best_first_search(ubicacioActual, motxilla, comanda)
-            
-        if escollit is not None and isinstance(escollit, Comanda):
-            comanda = escollit
+        escollit, _ = best_first_search(ubicacioActual, motxilla, comanda, matriu, indexMotxilla)
             
-            print(f"\t\tAnem a lliurar la comanda {comanda.id} ({comanda.especialitat.especialitat}) que està a {round(distanciaMinima, 2)} metres a les coordenades ({comanda.coordenades.latitud}, {comanda.coordenades.longitud}).")
-            
-            ubicacioActual = comanda.coordenades
-            distanciaRecorreguda += distanciaMinima
-            ruta.append(ubicacioActual)
-
-            motxilla.remove(comanda)
+        if escollit is not None and isinstance(escollit, (Comanda, VistaComanda)):
+            sequencia.append(escollit)
+            ubicacioActual = escollit.coordenades
+            indexMotxilla.eliminar(escollit)
 
         else:
             print(f"\t\tNo s'ha pogut trobar cap comanda a lliurar.")
             raise Exception(f"No s'ha pogut trobar cap comanda a lliurar.")
-            
+
+    if millorarRutes:
+        longitudInicial: float = longitudRuta(inici, [c.coordenades for c in sequencia], distancia)
+        with instrumentacio.fase("millorarRuta", comandes=len(sequencia)):
+            objectiu: float = valorObjectiu(cotaRuta(inici, [c.coordenades for c in sequencia], distancia), toleranciaGap)
+            sequencia = millorarRuta(inici, sequencia, distancia, tempsMillora, mantenirPrioritat, objectiu)
+        longitudFinal: float = longitudRuta(inici, [c.coordenades for c in sequencia], distancia)
+        print(f"\t\tLa ruta de lliurament s'ha millorat de {round(longitudInicial, 2)} a {round(longitudFinal, 2)} metres.")
+
+    ubicacioActual = inici
+    for comanda in sequencia:
+        distanciaMinima: float = distancia(ubicacioActual, comanda.coordenades)
+
+        print(f"\t\tAnem a lliurar la comanda {comanda.id} ({comanda.especialitat.especialitat}) que està a {round(distanciaMinima, 2)} metres a les coordenades ({comanda.coordenades.latitud}, {comanda.coordenades.longitud}).")
+        
+        ubicacioActual = comanda.coordenades
+        distanciaRecorreguda += distanciaMinima
+        ruta.append(ubicacioActual)
+
+    motxilla.clear()
 
     print(f"\t\tTotes les comandes han estat lliurades correctament i s'han recorregut {round(distanciaRecorreguda, 2)} metres.")
+    if informarGap or instrumentacio.actiu:
+        informarGapRuta("lliurament", ruta, distanciaRecorreguda, distancia, informarGap)
 
     return distanciaRecorreguda, ubicacioActual, ruta
 
-def main(capacitatMaxima: int, repetirRestaurants: bool, outputFolder: str, outputFileName: str) -> None:
+def carregarXarxa(fitxerXarxa: Optional[str], metrica: str) -> Optional[XarxaViaria]:
+    """
+    Carrega la xarxa viària d'un fitxer GraphML, si n'hi ha, per calcular les distàncies per carretera.
+    """
+    if fitxerXarxa is None:
+        return None
     tempsInici: float = time.time()
-    comandesRestants: List[Comanda] = comandes.copy()
-    ubicacioActual: Coordenada = tecnocampus
-    restaurantsNoVisitats: List[Restaurant] = restaurants.copy()
+    xarxa: XarxaViaria = llegirGraphML(fitxerXarxa, metrica)
+    print(f"S'ha carregat la xarxa viària de {fitxerXarxa} ({len(xarxa)} nodes i {xarxa.numArestes} arestes) en {round(time.time() - tempsInici, 4)} segons.")
+    return xarxa
+
+def obrirMagatzem(directoriMagatzem: Optional[str]) -> Optional[MagatzemDistancies]:
+    """
+    Obre el magatzem de matrius de distàncies del directori, si n'hi ha, per no tornar a calcular les distàncies conegudes.
+    """
+    return MagatzemDistancies(directoriMagatzem) if directoriMagatzem is not None else None
+
+def carregarCiutat(directoriDades: Optional[str], flux: bool = False) -> Tuple[Coordenada, Iterable[Comanda], List[Restaurant], Dict[str, Especialitat]]:
+    """
+    Carrega l'oficina, les comandes, els restaurants i les especialitats del directori de dades o, si no n'hi ha, de data/data.py.
+
+    Args:
+        directoriDades (Optional[str]): Directori amb les dades en CSV o Parquet.
+        flux (bool): Si s'activa, les comandes del directori es creen a mesura que es recorren, sense guardar-les en una llista.
+
+    Returns:
+        Tuple[Coordenada, Iterable[Comanda], List[Restaurant], Dict[str, Especialitat]]:
+            - Oficina.
+            - Comandes (una llista, o un iterador amb flux i directori).
+            - Restaurants.
+            - Especialitats per codi.
+    """
+    if directoriDades is None:
+        return tecnocampus, comandes, restaurants, especialitats
+    tempsInici: float = time.time()
+    dades: DadesColumnars = carregarDades(directoriDades, tecnocampus)
+    print(f"S'han carregat {dades.numComandes()} comandes i {dades.numRestaurants()} restaurants de {directoriDades} en {round(time.time() - tempsInici, 4)} segons.")
+    return dades.oficina, dades.iterComandes() if flux else dades.llistaComandes(), dades.llistaRestaurants(), dades.especialitats
+
+def construirMatriu(oficina: Coordenada, comandes: List[Comanda], restaurants: List[Restaurant], opcions: OpcionsPlanificacio,
+                    xarxa: Optional[XarxaViaria] = None) -> MatriuDistancies:
+    """
+    Matriu de distàncies de l'oficina, les comandes i els restaurants amb la mètrica, la xarxa viària i el magatzem de les opcions.
+    La xarxa viària es carrega del fitxer de les opcions si no se'n dona una de ja carregada.
+    """
+    if xarxa is None:
+        xarxa = carregarXarxa(opcions.fitxerXarxa, opcions.metrica)
+    with instrumentacio.fase("matriu", punts=1 + len(comandes) + len(restaurants)):
+        return MatriuDistancies.dePunts(oficina, comandes, restaurants, opcions.metrica, xarxa, obrirMagatzem(opcions.directoriMagatzem))
+
+def main(capacitatMaxima: int, repetirRestaurants: bool, outputFolder: str, outputFileName: str, opcions: Optional[OpcionsPlanificacio] = None,
+         inicis: int = 1, treballadors: Optional[int] = None, llavor: Optional[int] = None, directoriDades: Optional[str] = None,
+         generarMapa: bool = True, mapaCompacte: Optional[bool] = None) -> Tuple[float, int, int]:
+    tempsInici: float = time.time()
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    oficina, totesComandes, totsRestaurants, totesEspecialitats = carregarCiutat(directoriDades)
+
+    comandesRestants: List[Comanda] = totesComandes.copy()
+    ubicacioActual: Coordenada = oficina
+    restaurantsNoVisitats: List[Restaurant] = totsRestaurants.copy()
     distanciaTotal: float = 0
     numeroRecollides: int = 0
+    servides: int = 0
+    matriu: MatriuDistancies = construirMatriu(oficina, totesComandes, totsRestaurants, opcions)
+    with instrumentacio.fase("index", restaurants=len(restaurantsNoVisitats)):
+        indexRestaurants: IndexEspacial = IndexEspacial(restaurantsNoVisitats, matriu)
     
-    mapa = MapGenerator(tecnocampus, comandes, restaurants, especialitats, outputFolder)
-    mapa.generateInitialMap()
+    mapa: Optional[MapGenerator] = None
+    if generarMapa:
+        with instrumentacio.fase("mapa"):
+            mapa = MapGenerator(oficina, totesComandes, totsRestaurants, totesEspecialitats, outputFolder, mapaCompacte)
+            mapa.generateInitialMap()
+
+    # Amb més d'un inici el pool de processos es reutilitza per a totes les recollides
+    with (ProcessPoolExecutor(treballadors) if inicis > 1 and treballadors != 1 else nullcontext()) as executor, \
+         (obrirEscriptor(opcions.fitxerViatges) if opcions.fitxerViatges is not None else nullcontext()) as escriptor:
+        restaurantsPerCoordenada: Dict[Coordenada, Restaurant] = {restaurant.coordenades: restaurant for restaurant in totsRestaurants} if escriptor is not None else {}
+        while len(comandesRestants) > 0:
+            numeroRecollides += 1
+            print(f"\tAnem a recollir comandes fins a omplir la motxilla.")
+            with instrumentacio.fase("omplirMotxilla", viatge=numeroRecollides):
+                motxilla, distancia, ubicacioActual, comandesRestants, restaurantsNoVisitats, ruta = omplirMotxilla(ubicacioActual, comandesRestants, capacitatMaxima, restaurantsNoVisitats, repetirRestaurants, matriu, indexRestaurants,
+                                                                                                                    inicis, executor, llavor, treballadors, **opcions.recollida())
+            if not motxilla:
+                # Sense cap comanda recollida la simulació no avançaria mai
+                raise ValueError(f"No es pot recollir cap de les {len(comandesRestants)} comandes restants amb una capacitat de {capacitatMaxima} g.")
+            distanciaTotal += distancia
+            servides += len(motxilla)
+            if mapa is not None:
+                mapa.afegirRuta(ruta, f"Recollida número {numeroRecollides}", "blue")
+            recollides, rutaRecollida, distanciaRecollida = motxilla[:], ruta, distancia
+            
+            print(f"\tQueden {len(comandesRestants)} comandes per recollir.")
+            print()
+            print(f"\tAnem a entregar les comandes recollides.")
+            
+            with instrumentacio.fase("entregarComandes", viatge=numeroRecollides, comandes=len(motxilla)):
+                distancia, ubicacioActual, ruta = entregarComandes(ubicacioActual, motxilla, matriu, **opcions.lliurament())
+            distanciaTotal += distancia
+            if mapa is not None:
+                mapa.afegirRuta(ruta, f"Lliurament número {numeroRecollides}", "red")
+            if escriptor is not None:
+                escriureViatge(escriptor, numeroRecollides, recollides, rutaRecollida, ruta, distanciaRecollida + distancia, restaurantsPerCoordenada)
+
+            print()
+            print()
+
+    distanciaTotal += matriu.distancia(ubicacioActual, oficina)
+
+    if servides < len(totesComandes):
+        print(f"S'han recollit i entregat {servides} de {len(totesComandes)} comandes, les altres {len(totesComandes) - servides} no tenien cap restaurant de la seva especialitat. En total s'han recorregut {round(distanciaTotal/10**3, 2)} kilometres.")
+    else:
+        print(f"Totes les comandes han estat recollides i entregades correctament. En total s'han recorregut {round(distanciaTotal/10**3, 2)} kilometres.")
+    if mapa is not None:
+        mapa.afegirRuta([ubicacioActual, oficina], "Tornada a l'oficina", "green")
+        with instrumentacio.fase("guardarMapa"):
+            outputPath = mapa.save(outputFileName)
+        print(f"Mapa guardat correctament. Ho pots veure obrint el següent enllaç: file://{outputPath}")
+    if opcions.fitxerViatges is not None:
+        print(f"Viatges guardats a {opcions.fitxerViatges}.")
+    print()
+    print(f"Temps total d'execució: {round(time.time() - tempsInici, 4)} segons.")
+    print()
+    return distanciaTotal, numeroRecollides, servides
+
+def simularRepartidor(numero: int, oficina: Coordenada, comandes: List[Comanda], restaurants: List[Restaurant], capacitatMaxima: int, repetirRestaurants: bool,
+                      opcions: Optional[OpcionsPlanificacio] = None) -> ResultatRepartidor:
+    """
+    Funció que simula tots els viatges d'un repartidor de la flota, des de l'oficina fins a tornar-hi.
+
+    S'executa en un procés del pool, per això calcula la seva pròpia matriu de distàncies
+    (o la llegeix del magatzem, que comparteixen tots els processos) i guarda la sortida en lloc d'escriure-la directament.
+
+    Args:
+        numero (int): Número del repartidor.
+        oficina (Coordenada): Coordenada de sortida i arribada.
+        comandes (List[Comanda]): Comandes assignades al repartidor.
+        restaurants (List[Restaurant]): Restaurants on pot recollir.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        repetirRestaurants (bool): Indica si es poden repetir els restaurants visitats.
+        opcions (Optional[OpcionsPlanificacio]): Opcions de la planificació. Si hi ha xarxa viària, cada procés la carrega i en guarda els seus camins.
+
+    Returns:
+        ResultatRepartidor: Distància, viatges, rutes i sortida de la simulació.
+    """
+    tempsInici: float = time.perf_counter()
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    registre: io.StringIO = io.StringIO()
+    rutes: List[Tuple[str, List[Coordenada], str]] = []
+    distanciaTotal: float = 0
+    numeroRecollides: int = 0
+    servides: int = 0
+
+    with redirect_stdout(registre):
+        comandesRestants: List[Comanda] = comandes.copy()
+        restaurantsNoVisitats: List[Restaurant] = restaurants.copy()
+        ubicacioActual: Coordenada = oficina
+        matriu: MatriuDistancies = construirMatriu(oficina, comandes, restaurants, opcions)
+        indexRestaurants: IndexEspacial = IndexEspacial(restaurantsNoVisitats, matriu)
+
+        while len(comandesRestants) > 0:
+            numeroRecollides += 1
+            print(f"\tRepartidor {numero}: anem a recollir comandes fins a omplir la motxilla.")
+            motxilla, distancia, ubicacioActual, comandesRestants, restaurantsNoVisitats, ruta = omplirMotxilla(ubicacioActual, comandesRestants, capacitatMaxima, restaurantsNoVisitats, repetirRestaurants, matriu, indexRestaurants,
+                                                                                                                **opcions.recollida())
+            distanciaTotal += distancia
+            rutes.append((f"Repartidor {numero}: recollida número {numeroRecollides}", ruta, "blue"))
+            if not motxilla:
+                # Cap restaurant pot preparar les comandes que queden
+                print(f"\tRepartidor {numero}: no es poden recollir les {len(comandesRestants)} comandes que queden.")
+                break
+            # omplirMotxilla descarta les comandes sense cap restaurant, per això es compten les que es lliuren
+            servides += len(motxilla)
+
+            print(f"\tRepartidor {numero}: anem a entregar les comandes recollides.")
+            distancia, ubicacioActual, ruta = entregarComandes(ubicacioActual, motxilla, matriu, **opcions.lliurament())
+            distanciaTotal += distancia
+            rutes.append((f"Repartidor {numero}: lliurament número {numeroRecollides}", ruta, "red"))
+            print()
+
+        distanciaTotal += matriu.distancia(ubicacioActual, oficina)
+        rutes.append((f"Repartidor {numero}: tornada a l'oficina", [ubicacioActual, oficina], "green"))
+
+    return ResultatRepartidor(numero, servides, numeroRecollides, distanciaTotal, rutes, registre.getvalue(),
+                              time.perf_counter() - tempsInici, os.getpid(), len(comandes) - servides)
+
+def mainFlota(capacitatMaxima: int, repetirRestaurants: bool, outputFolder: str, outputFileName: str, numRepartidors: int,
+              opcions: Optional[OpcionsPlanificacio] = None, treballadors: Optional[int] = None, directoriDades: Optional[str] = None,
+              velocitat: float = VELOCITAT_REPARTIDOR, generarMapa: bool = True, mapaCompacte: Optional[bool] = None) -> None:
+    tempsInici: float = time.time()
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    oficina, totesComandes, totsRestaurants, totesEspecialitats = carregarCiutat(directoriDades)
+
+    if opcions.directoriMagatzem is not None:
+        # Es guarda la matriu de tota la ciutat abans de crear el pool: cada procés en llegeix la seva part del fitxer sense calcular res
+        construirMatriu(oficina, totesComandes, totsRestaurants, opcions)
+
+    # Si els restaurants no es poden repetir, cada repartidor té els seus
+    restaurantsRepartidors: Optional[List[List[Restaurant]]] = None if repetirRestaurants else repartirRestaurants(totsRestaurants, numRepartidors)
+    comandesRepartidors: List[List[Comanda]] = repartirComandes(totesComandes, numRepartidors, restaurantsRepartidors)
+    arguments: List[tuple] = [(numero + 1, oficina, comandesRepartidors[numero], totsRestaurants if restaurantsRepartidors is None else restaurantsRepartidors[numero],
+                               capacitatMaxima, repetirRestaurants, opcions)
+                              for numero in range(numRepartidors)]
+
+    resultats: List[ResultatRepartidor] = []
+    if numRepartidors == 1 or treballadors == 1:
+        resultats = [simularRepartidor(*argumentsRepartidor) for argumentsRepartidor in arguments]
+    else:
+        with ProcessPoolExecutor(treballadors) as executor:
+            futurs: List[Future] = [executor.submit(simularRepartidor, *argumentsRepartidor) for argumentsRepartidor in arguments]
+            resultats = [futur.result() for futur in as_completed(futurs)]
+    resultats.sort(key=lambda resultat: resultat.numero)
+
+    mapa: Optional[MapGenerator] = None
+    if generarMapa:
+        mapa = MapGenerator(oficina, totesComandes, totsRestaurants, totesEspecialitats, outputFolder, mapaCompacte)
+        mapa.generateInitialMap()
+    for resultat in resultats:
+        print(resultat.registre, end="")
+        if mapa is not None:
+            for nom, ruta, color in resultat.rutes:
+                mapa.afegirRuta(ruta, nom, color)
+
+    print(f"Resum de la flota de {numRepartidors} repartidors:")
+    for resultat in resultats:
+        noServides: str = f" ({resultat.numNoServides} sense servir)" if resultat.numNoServides else ""
+        print(f"\tRepartidor {resultat.numero}: {resultat.numComandes} comandes{noServides} en {resultat.viatges} viatges, {round(resultat.distancia/10**3, 2)} kilometres ({round(resultat.durada(velocitat), 1)} minuts).")
+    distanciaTotal: float = sum(resultat.distancia for resultat in resultats)
+    makespan: float = max(resultat.durada(velocitat) for resultat in resultats)
+    print(f"En total s'han recorregut {round(distanciaTotal/10**3, 2)} kilometres. L'últim repartidor acaba al cap de {round(makespan, 1)} minuts (makespan) a {velocitat} km/h.")
+    print(f"S'han planificat les rutes en {len({resultat.proces for resultat in resultats})} processos.")
+    if mapa is not None:
+        outputPath = mapa.save(outputFileName)
+        print(f"Mapa guardat correctament. Ho pots veure obrint el següent enllaç: file://{outputPath}")
+    print()
+    print(f"Temps total d'execució: {round(time.time() - tempsInici, 4)} segons.")
+    print()
 
-    while len(comandesRestants) > 0:
+def despatxar(font: Iterable[Comanda], capacitatMaxima: int, restaurants: List[Restaurant], repetirRestaurants: bool, matriu: MatriuDistancies,
+              midaLot: int = 10, maxPendents: int = 200, inici: Coordenada = tecnocampus, opcions: Optional[OpcionsPlanificacio] = None,
+              escriptor: Optional[EscriptorViatges] = None) -> Iterator[Tuple[int, List[Comanda], float, Coordenada]]:
+    """
+    Generador que planifica viatges a mesura que arriben les comandes d'un flux.
+
+    Les comandes es llegeixen en micro-lots. Cada vegada que arriba un lot es planifica un viatge
+    (omplirMotxilla + entregarComandes) amb les comandes pendents que han arribat fins aleshores.
+    Si hi ha més de maxPendents comandes pendents, es fan viatges abans de llegir el lot següent,
+    de manera que la memòria ocupada no depèn de la llargada del flux. Quan el flux s'acaba es lliuren les pendents.
+    Si no es pot recollir cap de les comandes pendents (no hi caben o no tenen cap restaurant disponible), es llança un ValueError en lloc de tornar-ho a provar indefinidament.
+
+    Args:
+        font (Iterable[Comanda]): Flux de comandes.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        restaurants (List[Restaurant]): Llista de restaurants disponibles.
+        repetirRestaurants (bool): Indica si es poden repetir els restaurants visitats.
+        matriu (MatriuDistancies): Matriu de distàncies dels punts coneguts (oficina i restaurants).
+        midaLot (int): Nombre màxim de comandes de cada micro-lot.
+        maxPendents (int): Nombre màxim de comandes pendents abans de llegir més comandes.
+        inici (Coordenada): Coordenada inicial.
+        opcions (Optional[OpcionsPlanificacio]): Opcions de la planificació de cada viatge.
+        escriptor (Optional[EscriptorViatges]): Escriptor on s'afegeix cada viatge, amb la ruta, abans de retornar-lo.
+
+    Yields:
+        Tuple[int, List[Comanda], float, Coordenada]:
+            - Número del viatge.
+            - Comandes lliurades.
+            - Distància recorreguda (recollida i lliurament).
+            - Coordenada final del viatge.
+    """
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    pendents: List[Comanda] = []
+    ubicacioActual: Coordenada = inici
+    restaurantsNoVisitats: List[Restaurant] = restaurants.copy()
+    indexRestaurants: IndexEspacial = IndexEspacial(restaurantsNoVisitats, matriu)
+    numeroRecollides: int = 0
+    restaurantsPerCoordenada: Dict[Coordenada, Restaurant] = {restaurant.coordenades: restaurant for restaurant in restaurants} if escriptor is not None else {}
+
+    def viatge() -> Tuple[int, List[Comanda], float, Coordenada]:
+        nonlocal pendents, ubicacioActual, restaurantsNoVisitats, numeroRecollides
         numeroRecollides += 1
-        print(f"\tAnem a recollir comandes fins a omplir la motxilla.")
-        motxilla, distancia, ubicacioActual, comandesRestants, restaurantsNoVisitats, ruta = omplirMotxilla(ubicacioActual, comandesRestants, capacitatMaxima, restaurantsNoVisitats, repetirRestaurants)
-        distanciaTotal += distancia
-        mapa.afegirRuta(ruta, f"Recollida número {numeroRecollides}", "blue")
-        
-        print(f"\tQueden {len(comandesRestants)} comandes per recollir.")
-        print()
-        print(f"\tAnem a entregar les comandes recollides.")
-        
-        distancia, ubicacioActual, ruta = entregarComandes(ubicacioActual, motxilla)
-        distanciaTotal += distancia
-        mapa.afegirRuta(ruta, f"Lliurament número {numeroRecollides}", "red")
+        with instrumentacio.fase("omplirMotxilla", viatge=numeroRecollides, pendents=len(pendents)):
+            motxilla, distanciaRecollida, ubicacioActual, pendents, restaurantsNoVisitats, rutaRecollida = omplirMotxilla(ubicacioActual, pendents, capacitatMaxima, restaurantsNoVisitats, repetirRestaurants, matriu, indexRestaurants,
+                                                                                                                          **opcions.recollida())
+        if not motxilla:
+            # Les comandes pendents no es reduirien mai i el flux no avançaria
+            raise ValueError(f"No es pot recollir cap de les {len(pendents)} comandes pendents amb una capacitat de {capacitatMaxima} g.")
+        lliurades: List[Comanda] = motxilla[:]
+        with instrumentacio.fase("entregarComandes", viatge=numeroRecollides, comandes=len(motxilla)):
+            distanciaLliurament, ubicacioActual, rutaLliurament = entregarComandes(ubicacioActual, motxilla, matriu, **opcions.lliurament())
+        if escriptor is not None:
+            escriureViatge(escriptor, numeroRecollides, lliurades, rutaRecollida, rutaLliurament, distanciaRecollida + distanciaLliurament, restaurantsPerCoordenada)
+        return numeroRecollides, lliurades, distanciaRecollida + distanciaLliurament, ubicacioActual
+
+    for lot in microLots(font, midaLot):
+        pendents += lot
+        yield viatge()
+        while len(pendents) > maxPendents:
+            yield viatge()
+
+    while pendents:
+        yield viatge()
+
+def mainStreaming(capacitatMaxima: int, repetirRestaurants: bool, opcions: Optional[OpcionsPlanificacio] = None, midaLot: int = 10, maxPendents: int = 200,
+                  intervalArribades: float = 0.0, directoriDades: Optional[str] = None) -> None:
+    tempsInici: float = time.time()
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    # Les comandes es creen a mesura que es llegeixen de les columnes
+    oficina, font, totsRestaurants, _ = carregarCiutat(directoriDades, flux=True)
+
+    # Les comandes no es coneixen per endavant: la matriu només té l'oficina i els restaurants
+    matriu: MatriuDistancies = construirMatriu(oficina, [], totsRestaurants, opcions)
+    distanciaTotal: float = 0
+    numComandes: int = 0
+    ubicacioActual: Coordenada = oficina
+
+    with (obrirEscriptor(opcions.fitxerViatges) if opcions.fitxerViatges is not None else nullcontext()) as escriptor:
+        for numeroRecollides, lliurades, distancia, ubicacioActual in despatxar(simularArribades(font, intervalArribades), capacitatMaxima, totsRestaurants, repetirRestaurants, matriu,
+                                                                               midaLot, maxPendents, oficina, opcions, escriptor):
+            distanciaTotal += distancia
+            numComandes += len(lliurades)
+            print(f"\tViatge número {numeroRecollides}: s'han lliurat {len(lliurades)} comandes recorrent {round(distancia, 2)} metres.")
+            print()
+
+    distanciaTotal += matriu.distancia(ubicacioActual, oficina)
+    print(f"S'han lliurat {numComandes} comandes. En total s'han recorregut {round(distanciaTotal/10**3, 2)} kilometres.")
+    if opcions.fitxerViatges is not None:
+        print(f"Viatges guardats a {opcions.fitxerViatges}.")
+    print()
+    print(f"Temps total d'execució: {round(time.time() - tempsInici, 4)} segons.")
+    print()
+
+def escriureViatge(escriptor: EscriptorViatges, numero: int, recollides: List[Comanda], rutaRecollida: List[Coordenada], rutaLliurament: List[Coordenada],
+                   distancia: float, restaurantsPerCoordenada: Dict[Coordenada, Restaurant]) -> None:
+    """
+    Afegeix un viatge a l'escriptor amb els restaurants en l'ordre de recollida i les comandes en l'ordre de lliurament.
+
+    Args:
+        escriptor (EscriptorViatges): Escriptor de viatges.
+        numero (int): Número del viatge.
+        recollides (List[Comanda]): Comandes en l'ordre de recollida (la motxilla abans de lliurar-la).
+        rutaRecollida (List[Coordenada]): Ruta de omplirMotxilla.
+        rutaLliurament (List[Coordenada]): Ruta de entregarComandes, que comença on acaba la de recollida.
+        distancia (float): Distància del viatge.
+        restaurantsPerCoordenada (Dict[Coordenada, Restaurant]): Restaurant de cada coordenada, per objecte.
+    """
+    escriptor.escriure(numero, [restaurantsPerCoordenada[punt].nom for punt in rutaRecollida[1:]], [comanda.id for comanda in ordreRuta(recollides, rutaLliurament[1:])],
+                       distancia, rutaRecollida + rutaLliurament[1:])
+
+def ordreRuta(elements: List[Union[Comanda, Restaurant]], ruta: List[Coordenada]) -> List[Union[Comanda, Restaurant]]:
+    """
+    Retorna els elements en l'ordre en què la ruta passa per les seves coordenades.
+    Les rutes de omplirMotxilla i entregarComandes només guarden coordenades, que s'identifiquen per objecte.
+    """
+    perCoordenada: Dict[Coordenada, List[Union[Comanda, Restaurant]]] = {}
+    for element in elements:
+        perCoordenada.setdefault(element.coordenades, []).append(element)
+    return [perCoordenada[punt].pop(0) for punt in ruta]
+
+def simularEsdeveniments(oficina: Coordenada, registres: List[RegistreComanda], capacitatMaxima: int, restaurants: List[Restaurant], repetirRestaurants: bool,
+                         matriu: MatriuDistancies, numRepartidors: int = 1, velocitat: float = VELOCITAT_REPARTIDOR, tempsParada: float = 0.0,
+                         opcions: Optional[OpcionsPlanificacio] = None) -> Tuple[CuaEsdeveniments, List[float], List[float], List[int]]:
+    """
+    Funció que simula el servei de les comandes per esdeveniments discrets, amb el temps en minuts.
+
+    Les arribades de les comandes, les recollides, els lliuraments i els finals de viatge són esdeveniments d'una cua ordenada per temps.
+    Cada vegada que hi ha repartidors lliures i comandes pendents, es planifica un viatge per repartidor amb omplirMotxilla
+    i entregarComandes, i les recollides i els lliuraments es programen a l'instant en què el repartidor hi arriba a la velocitat donada.
+    El repartidor queda lliure al punt de l'últim lliurament i, quan no queden esdeveniments, torna a l'oficina.
+    Els instants de servei de cada comanda es guarden al seu registre.
+
+    Args:
+        oficina (Coordenada): Coordenada de sortida i arribada dels repartidors.
+        registres (List[RegistreComanda]): Registre de cada comanda amb el seu minut d'arribada.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        restaurants (List[Restaurant]): Llista de restaurants disponibles.
+        repetirRestaurants (bool): Indica si es poden repetir els restaurants visitats.
+        matriu (MatriuDistancies): Matriu de distàncies.
+        numRepartidors (int): Nombre de repartidors.
+        velocitat (float): Velocitat dels repartidors en km/h.
+        tempsParada (float): Minuts que el repartidor passa a cada restaurant i a cada lliurament.
+        opcions (Optional[OpcionsPlanificacio]): Opcions de la planificació de cada viatge.
+
+    Returns:
+        Tuple[CuaEsdeveniments, List[float], List[float], List[int]]:
+            - Cua d'esdeveniments, amb el nombre d'esdeveniments processats.
+            - Distància recorreguda per cada repartidor, amb la tornada a l'oficina.
+            - Minut en què cada repartidor torna a l'oficina.
+            - Nombre de viatges de cada repartidor.
+    """
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    metresMinut: float = velocitat * 1000 / 60
+    cua: CuaEsdeveniments = CuaEsdeveniments()
+    for registre in registres:
+        cua.programar(registre.arribada, ARRIBADA, registre)
+    registreComanda: Dict[Comanda, RegistreComanda] = {registre.comanda: registre for registre in registres}
+    restaurantsNoVisitats: List[Restaurant] = restaurants.copy()
+    indexRestaurants: IndexEspacial = IndexEspacial(restaurantsNoVisitats, matriu)
+
+    pendents: List[RegistreComanda] = []
+    lliures: List[int] = list(range(numRepartidors))
+    ubicacions: List[Coordenada] = [oficina] * numRepartidors
+    distancies: List[float] = [0.0] * numRepartidors
+    alliberament: List[float] = [0.0] * numRepartidors
+    viatges: List[int] = [0] * numRepartidors
+    despatxProgramat: bool = False
+
+    def planificar(repartidor: int, ara: float) -> None:
+        nonlocal pendents, restaurantsNoVisitats
+        viatges[repartidor] += 1
+        with open(os.devnull, "w") as buit, redirect_stdout(buit):
+            with instrumentacio.fase("omplirMotxilla", repartidor=repartidor, pendents=len(pendents)):
+                motxilla, distanciaRecollida, ubicacio, noProgramades, restaurantsNoVisitats, ruta = omplirMotxilla(ubicacions[repartidor], [registre.comanda for registre in pendents], capacitatMaxima,
+                                                                                                                    restaurantsNoVisitats, repetirRestaurants, matriu, indexRestaurants, **opcions.recollida())
+            if not motxilla:
+                raise ValueError(f"No es pot recollir cap de les {len(pendents)} comandes pendents amb una capacitat de {capacitatMaxima} g.")
+            recollides: List[Comanda] = motxilla[:]
+            with instrumentacio.fase("entregarComandes", repartidor=repartidor, comandes=len(motxilla)):
+                distanciaLliurament, ubicacioFinal, rutaLliurament = entregarComandes(ubicacio, motxilla, matriu, **opcions.lliurament())
+        pendents = [registreComanda[comanda] for comanda in noProgramades]
+
+        temps: float = ara
+        for comanda, anterior, restaurant in zip(recollides, ruta, ruta[1:]):
+            temps += matriu.distancia(anterior, restaurant) / metresMinut + tempsParada
+            registreComanda[comanda].repartidor = repartidor
+            cua.programar(temps, RECOLLIDA, registreComanda[comanda])
+        for anterior, punt, comanda in zip(rutaLliurament, rutaLliurament[1:], ordreRuta(recollides, rutaLliurament[1:])):
+            temps += matriu.distancia(anterior, punt) / metresMinut + tempsParada
+            cua.programar(temps, LLIURAMENT, registreComanda[comanda])
+        cua.programar(temps, FI_VIATGE, repartidor)
+        ubicacions[repartidor] = ubicacioFinal
+        distancies[repartidor] += distanciaRecollida + distanciaLliurament
+
+    while cua:
+        ara, tipus, dades = cua.seguent()
+        if tipus == ARRIBADA:
+            pendents.append(dades)
+        elif tipus == RECOLLIDA:
+            dades.recollida = ara
+        elif tipus == LLIURAMENT:
+            dades.lliurament = ara
+        elif tipus == FI_VIATGE:
+            lliures.append(dades)
+            alliberament[dades] = ara
+        elif tipus == DESPATX:
+            despatxProgramat = False
+            while lliures and pendents:
+                planificar(lliures.pop(0), ara)
+        # El despatx es fa quan ja s'han processat tots els esdeveniments del mateix instant
+        if (tipus == ARRIBADA or tipus == FI_VIATGE) and lliures and pendents and not despatxProgramat:
+            cua.programar(ara, DESPATX)
+            despatxProgramat = True
+
+    tornades: List[float] = []
+    for repartidor in range(numRepartidors):
+        retorn: float = matriu.distancia(ubicacions[repartidor], oficina)
+        distancies[repartidor] += retorn
+        tornades.append(alliberament[repartidor] + retorn / metresMinut if viatges[repartidor] else 0.0)
+    return cua, distancies, tornades, viatges
+
+def mainEsdeveniments(capacitatMaxima: int, repetirRestaurants: bool, opcions: Optional[OpcionsPlanificacio] = None, numRepartidors: int = 1,
+                      velocitat: float = VELOCITAT_REPARTIDOR, ritmeArribades: Optional[float] = None, tempsParada: float = 0.0, llavor: Optional[int] = None,
+                      directoriDades: Optional[str] = None) -> Dict[str, float]:
+    tempsInici: float = time.time()
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    oficina, totesComandes, totsRestaurants, _ = carregarCiutat(directoriDades)
+
+    matriu: MatriuDistancies = construirMatriu(oficina, totesComandes, totsRestaurants, opcions)
+    registres: List[RegistreComanda] = [RegistreComanda(comanda, arribada) for comanda, arribada in zip(totesComandes, arribadesPoisson(len(totesComandes), ritmeArribades, llavor or 0))]
+
+    tempsSimulacio: float = time.perf_counter()
+    cua, distancies, tornades, viatges = simularEsdeveniments(oficina, registres, capacitatMaxima, totsRestaurants, repetirRestaurants, matriu, numRepartidors, velocitat, tempsParada,
+                                                               opcions)
+    tempsSimulacio = time.perf_counter() - tempsSimulacio
+    resum: Dict[str, float] = resumServei(registres)
+
+    arribades: str = f"{ritmeArribades} comandes per hora" if ritmeArribades else "totes a l'inici"
+    print(f"Simulació per esdeveniments de {len(registres)} comandes ({arribades}) amb {numRepartidors} repartidors a {velocitat} km/h:")
+    for repartidor in range(numRepartidors):
+        print(f"	Repartidor {repartidor + 1}: {viatges[repartidor]} viatges, {round(distancies[repartidor]/10**3, 2)} kilometres, torna a l'oficina al minut {round(tornades[repartidor], 1)}.")
+    print(f"	S'han lliurat {resum['comandes']} comandes, {resum['aTemps']} a temps ({round(resum['percentatgeATemps'], 1)}%).")
+    print(f"	Retard mitjà de les comandes tardanes: {round(resum['retardMitja'], 1)} minuts. Percentil 95: {round(resum['retardP95'], 1)} minuts. Màxim: {round(resum['retardMaxim'], 1)} minuts.")
+    print(f"	Temps des de l'arribada fins al lliurament: {round(resum['serveiMitja'], 1)} minuts de mitjana i {round(resum['serveiMaxim'], 1)} de màxim.")
+    print(f"En total s'han recorregut {round(sum(distancies)/10**3, 2)} kilometres. L'últim repartidor torna al minut {round(max(tornades), 1)}.")
+    print(f"S'han processat {cua.processats} esdeveniments en {round(tempsSimulacio, 4)} segons.")
+    print()
+    print(f"Temps total d'execució: {round(time.time() - tempsInici, 4)} segons.")
+    print()
+    return resum
+
+def planificarViatges(oficina: Coordenada, comandes: List[Comanda], capacitatMaxima: int, restaurants: List[Restaurant], repetirRestaurants: bool,
+                      matriu: MatriuDistancies, opcions: Optional[OpcionsPlanificacio] = None) -> Pla:
+    """
+    Funció que planifica tots els viatges d'un repartidor des de l'oficina, com main, i els guarda en un pla que es pot actualitzar.
+
+    Args:
+        oficina (Coordenada): Coordenada de sortida i arribada.
+        comandes (List[Comanda]): Comandes a lliurar.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        restaurants (List[Restaurant]): Restaurants disponibles.
+        repetirRestaurants (bool): Indica si es poden repetir els restaurants visitats.
+        matriu (MatriuDistancies): Matriu de distàncies.
+        opcions (Optional[OpcionsPlanificacio]): Opcions de la planificació. mantenirPrioritat també s'aplica a les actualitzacions del pla.
+
+    Returns:
+        Pla: Viatges planificats, amb el repartidor a l'oficina.
+    """
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    comandesRestants: List[Comanda] = comandes.copy()
+    restaurantsNoVisitats: List[Restaurant] = restaurants.copy()
+    indexRestaurants: IndexEspacial = IndexEspacial(restaurantsNoVisitats, matriu)
+    restaurantCoordenada: Dict[Coordenada, Restaurant] = {restaurant.coordenades: restaurant for restaurant in restaurants}
+    ubicacioActual: Coordenada = oficina
+    viatges: List[Viatge] = []
+    while comandesRestants:
+        motxilla, _, ubicacioActual, comandesRestants, restaurantsNoVisitats, ruta = omplirMotxilla(ubicacioActual, comandesRestants, capacitatMaxima, restaurantsNoVisitats, repetirRestaurants,
+                                                                                                    matriu, indexRestaurants, **opcions.recollida())
+        if not motxilla:
+            print(f"\tNo es poden recollir les {len(comandesRestants)} comandes que queden.")
+            break
+        recollides: List[Comanda] = motxilla[:]
+        _, ubicacioActual, rutaLliurament = entregarComandes(ubicacioActual, motxilla, matriu, **opcions.lliurament())
+        viatges.append(Viatge(recollides, [restaurantCoordenada[punt] for punt in ruta[1:]], ordreRuta(recollides, rutaLliurament[1:])))
+    return Pla(oficina, oficina, viatges, capacitatMaxima, restaurants, repetirRestaurants, matriu, mantenirPrioritat=opcions.mantenirPrioritat)
+
+def mainReplanificacio(capacitatMaxima: int, repetirRestaurants: bool, opcions: Optional[OpcionsPlanificacio] = None, canvis: int = 5, llavor: Optional[int] = None,
+                       directoriDades: Optional[str] = None) -> None:
+    tempsInici: float = time.time()
+    if opcions is None:
+        opcions = OpcionsPlanificacio()
+    oficina, totesComandes, totsRestaurants, _ = carregarCiutat(directoriDades)
+    if not 0 < canvis < len(totesComandes):
+        raise ValueError(f"El nombre de canvis ha d'estar entre 1 i {len(totesComandes) - 1}.")
+
+    # Les últimes comandes arriben durant el torn: no són a la matriu ni al pla inicial
+    inicials: List[Comanda] = totesComandes[:-canvis]
+    noves: List[Comanda] = totesComandes[-canvis:]
+    xarxa: Optional[XarxaViaria] = carregarXarxa(opcions.fitxerXarxa, opcions.metrica)
+    tempsPla: float = time.perf_counter()
+    matriu: MatriuDistancies = construirMatriu(oficina, inicials, totsRestaurants, opcions, xarxa)
+    with open(os.devnull, "w") as buit, redirect_stdout(buit):
+        pla: Pla = planificarViatges(oficina, inicials, capacitatMaxima, totsRestaurants, repetirRestaurants, matriu, opcions)
+    tempsPla = time.perf_counter() - tempsPla
+    if not pla.viatges:
+        # Sense cap comanda planificada no hi ha res a cancel·lar ni cap viatge on inserir les noves
+        raise ValueError(f"No es pot planificar cap de les {len(inicials)} comandes inicials amb una capacitat de {capacitatMaxima} g.")
+    print(f"Pla inicial de {len(pla)} comandes en {len(pla.viatges)} viatges: {round(pla.longitud()/10**3, 2)} kilometres en {round(tempsPla * 1000, 2)} ms.")
 
-        print()
-        print()
+    # Cada canvi cancel·la una comanda del pla a l'atzar i n'afegeix una de nova
+    generador: random.Random = random.Random(llavor or 0)
+    cancellades: List[Comanda] = []
+    latencies: List[float] = []
+    for numero, comanda in enumerate(noves, start=1):
+        planificades: List[Comanda] = [altra for viatge in pla.viatges for altra in viatge.lliuraments]
+        cancellada: Comanda = generador.choice(planificades)
+        cancellades.append(cancellada)
+        tempsCanvi: float = time.perf_counter()
+        afectats: List[Viatge] = pla.actualitzar([comanda], [cancellada])
+        latencies.append(time.perf_counter() - tempsCanvi)
+        print(f"\tCanvi {numero}: s'afegeix la comanda {comanda.id} i es cancel·la la {cancellada.id}. {len(afectats)} viatges reparats, "
+              f"{round(pla.longitud()/10**3, 2)} kilometres en {len(pla.viatges)} viatges, en {round(latencies[-1] * 1000, 2)} ms.")
 
-    distanciaTotal += ubicacioActual.distancia(tecnocampus)
-    mapa.afegirRuta([ubicacioActual, tecnocampus], "Tornada a l'oficina", "green")
+    # Comparació amb tornar-ho a planificar tot, com es faria amb main
+    finals: List[Comanda] = [comanda for comanda in totesComandes if all(comanda is not cancellada for cancellada in cancellades)]
+    tempsComplet: float = time.perf_counter()
+    matriuFinal: MatriuDistancies = construirMatriu(oficina, finals, totsRestaurants, opcions, xarxa)
+    with open(os.devnull, "w") as buit, redirect_stdout(buit):
+        plaComplet: Pla = planificarViatges(oficina, finals, capacitatMaxima, totsRestaurants, repetirRestaurants, matriuFinal, opcions)
+    tempsComplet = time.perf_counter() - tempsComplet
+    print(f"Replanificació incremental: {round(pla.longitud()/10**3, 2)} kilometres, {round(1000 * sum(latencies) / len(latencies), 2)} ms de mitjana per canvi i {round(1000 * max(latencies), 2)} ms de màxim.")
+    print(f"Replanificació completa: {round(plaComplet.longitud()/10**3, 2)} kilometres en {round(tempsComplet * 1000, 2)} ms.")
+    print()
+    print(f"Temps total d'execució: {round(time.time() - tempsInici, 4)} segons.")
+    print()
+
+def planificarZones(oficina: Coordenada, comandes: List[Comanda], restaurants: List[Restaurant], capacitatMaxima: int, repetirRestaurants: bool,
+                    midaZona: int = MIDA_ZONA, metodeZones: str = "kmitjanes", treballadors: Optional[int] = None, llavor: Optional[int] = None,
+                    opcions: Optional[OpcionsPlanificacio] = None) -> Tuple[List[Zona], List[ResultatRepartidor]]:
+    """
+    Funció que divideix la ciutat en zones i planifica cada zona independentment en un pool de processos.
+
+    Cada zona té les seves comandes i els restaurants més propers al seu centre, i es planifica amb simularRepartidor
+    des de l'oficina, amb una matriu de distàncies i un índex de restaurants només de la zona. Les comandes que no es poden servir
+    amb els restaurants de la seva zona es planifiquen al final en una zona més, de costura, amb els restaurants de tota la ciutat
+    (sense repetir restaurants, només els que les zones no han fet servir).
+
+    Args:
+        oficina (Coordenada): Coordenada de sortida i arribada.
+        comandes (List[Comanda]): Comandes a lliurar.
+        restaurants (List[Restaurant]): Restaurants disponibles.
+        capacitatMaxima (int): Capacitat màxima de la motxilla.
+        repetirRestaurants (bool): Indica si es poden repetir els restaurants visitats.
+        midaZona (int): Nombre aproximat de comandes per zona.
+        metodeZones (str): "kmitjanes" o "quadricula".
+        treballadors (Optional[int]): Nombre de processos (per defecte, tots els nuclis). Amb 1 les zones es planifiquen en aquest procés.
+        llavor (Optional[int]): Llavor del k-means.
+        opcions (Optional[OpcionsPlanificacio]): Opcions de la planificació de cada zona.
+
+    Returns:
+        Tuple[List[Zona], List[ResultatRepartidor]]:
+            - Zones, amb la de costura al final si hi ha comandes sobrants.
+            - Resultat de cada zona, en el mateix ordre.
+    """
+    with instrumentacio.fase("zonificar", comandes=len(comandes), restaurants=len(restaurants)):
+        zones: List[Zona] = zonificar(oficina, comandes, restaurants, midaZona, metodeZones, llavor)
+        sobrants: List[Comanda] = [comanda for zona in zones for comanda in separarSobrants(zona, repetirRestaurants)]
+        zones = [zona for zona in zones if zona.comandes]
+        for numero, zona in enumerate(zones, start=1):
+            zona.numero = numero
+    arguments: List[tuple] = [(zona.numero, oficina, zona.comandes, zona.restaurants, capacitatMaxima, repetirRestaurants, opcions) for zona in zones]
 
-    print(f"Totes les comandes han estat recollides i entregades correctament. En total s'han recorregut {round(distanciaTotal/10**3, 2)} kilometres.")
-    outputPath = mapa.save(outputFileName)
-    print(f"Mapa guardat correctament. Ho pots veure obrint el següent enllaç: file://{outputPath}")
+    if len(zones) == 1 or treballadors == 1:
+        resultats: List[ResultatRepartidor] = [simularRepartidor(*argumentsZona) for argumentsZona in arguments]
+    else:
+        with ProcessPoolExecutor(treballadors) as executor:
+            futurs: List[Future] = [executor.submit(simularRepartidor, *argumentsZona) for argumentsZona in arguments]
+            resultats = [futur.result() for futur in as_completed(futurs)]
+        resultats.sort(key=lambda resultat: resultat.numero)
+
+    if sobrants:
+        restaurantsCostura: List[Restaurant] = restaurants
+        if not repetirRestaurants:
+            # Les recollides de cada zona són les rutes blaves, sense el punt de sortida. Les rutes tornen copiades dels processos del pool,
+            # per això els restaurants es busquen pel valor de les coordenades i no per identitat
+            visitats: Set[Tuple[float, float]] = {(punt.latitud, punt.longitud) for resultat in resultats for _, ruta, color in resultat.rutes if color == "blue" for punt in ruta[1:]}
+            restaurantsCostura = [restaurant for restaurant in restaurants if (restaurant.coordenades.latitud, restaurant.coordenades.longitud) not in visitats]
+        costura: Zona = Zona(len(zones) + 1, sobrants, restaurantsCostura, costura=True)
+        zones.append(costura)
+        resultats.append(simularRepartidor(costura.numero, oficina, costura.comandes, costura.restaurants, capacitatMaxima, repetirRestaurants, opcions))
+    return zones, resultats
+
+def mainZones(capacitatMaxima: int, repetirRestaurants: bool, outputFolder: str, outputFileName: str, opcions: Optional[OpcionsPlanificacio] = None,
+              midaZona: int = MIDA_ZONA, metodeZones: str = "kmitjanes", treballadors: Optional[int] = None, llavor: Optional[int] = None,
+              directoriDades: Optional[str] = None, generarMapa: bool = True, mapaCompacte: Optional[bool] = None) -> Tuple[float, int, int]:
+    tempsInici: float = time.time()
+    oficina, totesComandes, totsRestaurants, totesEspecialitats = carregarCiutat(directoriDades)
+
+    tempsPlanificacio: float = time.perf_counter()
+    zones, resultats = planificarZones(oficina, totesComandes, totsRestaurants, capacitatMaxima, repetirRestaurants, midaZona, metodeZones, treballadors, llavor, opcions)
+    tempsPlanificacio = time.perf_counter() - tempsPlanificacio
+
+    print(f"Planificació per zones ({metodeZones}, unes {midaZona} comandes per zona):")
+    for zona, resultat in zip(zones, resultats):
+        nom: str = "Costura" if zona.costura else f"Zona {zona.numero}"
+        print(f"\t{nom}: {resultat.numComandes} de {len(zona.comandes)} comandes amb {len(zona.restaurants)} restaurants en {resultat.viatges} viatges, {round(resultat.distancia/10**3, 2)} kilometres ({round(resultat.temps, 4)} segons).")
+    distanciaTotal: float = sum(resultat.distancia for resultat in resultats)
+    servides: int = sum(resultat.numComandes for resultat in resultats)
+    viatges: int = sum(resultat.viatges for resultat in resultats)
+    print(f"S'han servit {servides} de {len(totesComandes)} comandes en {viatges} viatges i s'han recorregut {round(distanciaTotal/10**3, 2)} kilometres.")
+    noServides: int = sum(resultat.numNoServides for resultat in resultats)
+    if noServides:
+        print(f"No s'han pogut servir {noServides} comandes perquè no hi havia cap restaurant de la seva especialitat.")
+    print(f"S'han planificat {len(zones)} zones en {len({resultat.proces for resultat in resultats})} processos en {round(tempsPlanificacio, 4)} segons.")
+
+    if generarMapa:
+        mapa = MapGenerator(oficina, totesComandes, totsRestaurants, totesEspecialitats, outputFolder, mapaCompacte)
+        mapa.generateInitialMap()
+        for resultat in resultats:
+            for nom, ruta, color in resultat.rutes:
+                mapa.afegirRuta(ruta, nom, color)
+        outputPath = mapa.save(outputFileName)
+        print(f"Mapa guardat correctament. Ho pots veure obrint el següent enllaç: file://{outputPath}")
     print()
     print(f"Temps total d'execució: {round(time.time() - tempsInici, 4)} segons.")
     print()
+    return distanciaTotal, viatges, servides
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Simulador de l'ompliment d'una motxilla amb comandes recollides en restaurants i l'entrega de les comandes.")
@@ -321,8 +1097,94 @@ if __name__ == "__main__":
     parser.add_argument("--capacitatMaxima", type=int, default=12000, help="Capacitat màxima de la motxilla.")
     parser.add_argument("--outputFolder", type=str, default=os.path.join(os.path.dirname(__file__), "out"), help="Carpeta on es guardaran els mapes generats.")
     parser.add_argument("--outputFileName", type=str, default="mapa.html", help="Nom del fitxer on es guardarà el mapa generat.")
+    parser.add_argument("--metrica", type=str, choices=list(METRIQUES), default="geodesica", help="Mètrica per calcular les distàncies entre punts.")
+    parser.add_argument("--magatzemDistancies", dest="directoriMagatzem", type=str, default=None, help="Directori on es guarden les matrius de distàncies per reutilitzar-les entre execucions i processos.")
+    parser.add_argument("--xarxa", dest="fitxerXarxa", type=str, default=None, help="Fitxer GraphML local amb la xarxa viària (per exemple d'OpenStreetMap) per calcular les distàncies per carretera.")
+    parser.add_argument("--inicis", type=int, default=1, help="Nombre d'escalades independents del Hill Climbing per motxilla.")
+    parser.add_argument("--treballadors", type=int, default=None, help="Nombre de processos per a les escalades (per defecte, tots els nuclis).")
+    parser.add_argument("--llavor", type=int, default=None, help="Llavor de les permutacions inicials de les escalades.")
+    parser.add_argument("--solver", type=str, choices=list(SOLVERS), default="hillClimbing", help="Algorisme per escollir les comandes de cada motxilla.")
+    parser.add_argument("--tempsSolver", type=float, default=TEMPS_MAXIM, help="Temps màxim en segons de cada selecció de comandes amb recuitSimulat i cercaTabu.")
+    parser.add_argument("--assignacio", type=str, choices=ASSIGNACIONS, default="sequencial", help="Assignació dels restaurants de cada motxilla: el més proper a cada recollida, en ordre (sequencial), o tots alhora amb l'algorisme hongarès i les recollides reordenades (hongares).")
+    parser.add_argument("--gapOptim", dest="informarGap", action="store_true", default=False, help="Mostra la distància entre el resultat del solver i l'òptim i, per cada viatge, el gap de la motxilla i de les rutes respecte a les cotes inferiors.")
+    parser.add_argument("--toleranciaGap", type=float, default=TOLERANCIA_GAP, help="Gap relatiu respecte a la cota inferior (0.01 és un 1%%) a partir del qual els solvers i la millora de les rutes s'aturen. Amb 0 només s'aturen abans d'hora quan la solució és òptima.")
+    parser.add_argument("--millorarRutes", action="store_true", default=False, help="Millora l'ordre de lliurament de cada motxilla amb 2-opt i Or-opt.")
+    parser.add_argument("--tempsMillora", type=float, default=0.05, help="Temps màxim en segons de la millora de cada ruta de lliurament.")
+    parser.add_argument("--no-mantenirPrioritat", dest="mantenirPrioritat", action="store_false", default=True, help="Permet que la millora de les rutes canviï l'ordre per compromís.")
     
+    parser.add_argument("--data", dest="directoriDades", type=str, default=None, help="Directori amb les comandes, restaurants i especialitats en CSV o Parquet (per defecte, les dades de data/data.py).")
+
+    parser.add_argument("--couriers", dest="repartidors", type=int, default=None, help="Nombre de repartidors de la flota. Cada repartidor es planifica en un procés (per defecte, un sol repartidor).")
+    parser.add_argument("--velocitat", type=float, default=VELOCITAT_REPARTIDOR, help="Velocitat dels repartidors en km/h per calcular el makespan de la flota i els temps de la simulació per esdeveniments.")
+    parser.add_argument("--zones", action="store_true", default=False, help="Divideix la ciutat en zones i planifica cada zona en un procés del pool, amb una zona de costura per a les comandes sobrants.")
+    parser.add_argument("--midaZona", type=int, default=MIDA_ZONA, help="Nombre aproximat de comandes per zona amb --zones.")
+    parser.add_argument("--metodeZones", type=str, choices=METODES_ZONES, default="kmitjanes", help="Agrupació de les comandes en zones: k-means o quadrícula al voltant de l'oficina.")
+    parser.add_argument("--replanificar", action="store_true", default=False, help="Planifica el torn sense les últimes comandes i les afegeix una a una, cancel·lant-ne una altra a cada canvi, amb replanificació incremental.")
+    parser.add_argument("--canvis", type=int, default=5, help="Nombre de comandes que arriben durant el torn amb --replanificar.")
+    parser.add_argument("--esdeveniments", action="store_true", default=False, help="Simula el servei per esdeveniments discrets amb el temps de cada recollida i lliurament i el retard respecte al compromís.")
+    parser.add_argument("--ritmeArribades", type=float, default=None, help="Comandes per hora (arribades de Poisson) a la simulació per esdeveniments. Per defecte, totes arriben a l'inici.")
+    parser.add_argument("--tempsParada", type=float, default=0.0, help="Minuts a cada restaurant i a cada lliurament a la simulació per esdeveniments.")
+
+    parser.add_argument("--streaming", action="store_true", default=False, help="Rep les comandes com un flux i planifica els viatges a mesura que arriben (sense mapa).")
+    parser.add_argument("--midaLot", type=int, default=10, help="Nombre de comandes de cada micro-lot en mode streaming.")
+    parser.add_argument("--maxPendents", type=int, default=200, help="Nombre màxim de comandes pendents en mode streaming.")
+    parser.add_argument("--intervalArribades", type=float, default=0.0, help="Temps en segons entre l'arribada de dues comandes en mode streaming.")
+    
+    parser.add_argument("--no-interactiu", dest="interactiu", action="store_false", default=True, help="Comença sense esperar que es premi ENTER.")
+    parser.add_argument("--no-mapa", dest="generarMapa", action="store_false", default=True, help="No genera el mapa de la simulació.")
+    parser.add_argument("--modeMapa", type=str, choices=["auto", "detallat", "compacte"], default="auto", help="Mapa amb un marcador i una ruta animada per element (detallat) o amb clústers i una capa de rutes per color (compacte). Per defecte, compacte a partir de 500 comandes i restaurants.")
+    parser.add_argument("--viatges", dest="fitxerViatges", type=str, default=None, help="Fitxer .geojson, .geojsonl o .parquet on s'afegeix cada viatge a mesura que es planifica (restaurants, comandes, distància i ruta com a polilínia codificada).")
+    parser.add_argument("--traca", type=str, default=None, help="Fitxer JSON lines on s'escriuen els comptadors i el temps de cada fase de cada viatge.")
+    parser.add_argument("--perfil", type=str, default=None, help="Fitxer on es guarda el perfil de cProfile de l'execució.")
+
     args = parser.parse_args()
+    # La cadena de modes de sota només n'executa un, per això no es poden combinar
+    modes: List[str] = [nom for nom, actiu in (("--zones", args.zones), ("--replanificar", args.replanificar), ("--esdeveniments", args.esdeveniments),
+                                                ("--streaming", args.streaming)) if actiu]
+    if len(modes) > 1:
+        parser.error(f"Els modes {', '.join(modes)} no es poden combinar.")
+    if args.repartidors is not None and modes and modes[0] != "--esdeveniments":
+        parser.error(f"El mode {modes[0]} no es pot combinar amb --couriers, que només fan servir la flota i la simulació per esdeveniments.")
+    opcions: OpcionsPlanificacio = OpcionsPlanificacio.deArguments(args)
+    mapaCompacte: Optional[bool] = {"auto": None, "detallat": False, "compacte": True}[args.modeMapa]
+
+    if args.interactiu:
+        input("\nPrem ENTER per començar a recollir comandes...")
+    fitxerTraca = open(args.traca, "w") if args.traca is not None else None
+    if fitxerTraca is not None:
+        instrumentacio.activar(fitxerTraca)
+    perfil: Optional[cProfile.Profile] = cProfile.Profile() if args.perfil is not None else None
+    if perfil is not None:
+        perfil.enable()
 
-    input("\nPrem ENTER per començar a recollir comandes...")
-    main(args.capacitatMaxima, args.repetirRestaurants, args.outputFolder, args.outputFileName)
\ No newline at end of file
+    try:
+        if args.zones:
+            mainZones(args.capacitatMaxima, args.repetirRestaurants, args.outputFolder, args.outputFileName, opcions, args.midaZona, args.metodeZones,
+                      args.treballadors, args.llavor, args.directoriDades, args.generarMapa, mapaCompacte)
+        elif args.replanificar:
+            mainReplanificacio(args.capacitatMaxima, args.repetirRestaurants, opcions, args.canvis, args.llavor, args.directoriDades)
+        elif args.esdeveniments:
+            mainEsdeveniments(args.capacitatMaxima, args.repetirRestaurants, opcions, args.repartidors or 1, args.velocitat, args.ritmeArribades, args.tempsParada,
+                              args.llavor, args.directoriDades)
+        elif args.streaming:
+            mainStreaming(args.capacitatMaxima, args.repetirRestaurants, opcions, args.midaLot, args.maxPendents, args.intervalArribades, args.directoriDades)
+        elif args.repartidors is not None:
+            mainFlota(args.capacitatMaxima, args.repetirRestaurants, args.outputFolder, args.outputFileName, args.repartidors, opcions,
+                      args.treballadors, args.directoriDades, args.velocitat, args.generarMapa, mapaCompacte)
+        else:
+            main(args.capacitatMaxima, args.repetirRestaurants, args.outputFolder, args.outputFileName, opcions,
+                 args.inicis, args.treballadors, args.llavor, args.directoriDades, args.generarMapa, mapaCompacte)
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            perfil.dump_stats(args.perfil)
+            print(f"Perfil guardat a {args.perfil}. Es pot consultar amb: python -m pstats {args.perfil}")
+        if fitxerTraca is not None:
+            resum = instrumentacio.resum()
+            instrumentacio.desactivar()
+            fitxerTraca.close()
+            print(f"Traça guardada a {args.traca}.")
+            for nom, fase in sorted(resum["fases"].items(), key=lambda element: -element[1]["temps"]):
+                print(f"\t{nom}: {fase['temps']} segons en {fase['execucions']} execucions")
+            for nom, valor in resum["comptadors"].items():
+                print(f"\t{nom}: {valor}")
\ No newline at end of file
@@ -2,8 +2,14 @@ from domain.especialitat import Especialitat
 from domain.coordenada import Coordenada
 
 class Comanda:
+    __slots__ = ("id", "especialitat", "carrer", "coordenades", "codiEspecialitat", "pes", "compromis")
+
     def __init__(self, id: int, especialitat: Especialitat, carrer: str, coordenades: Coordenada) -> None:
         self.id: int = id
         self.especialitat: Especialitat = especialitat
         self.carrer: str = carrer
-        self.coordenades: Coordenada = coordenades
\ No newline at end of file
+        self.coordenades: Coordenada = coordenades
+        # Dades de l'especialitat que es consulten als bucles dels algorismes
+        self.codiEspecialitat: int = especialitat.codi
+        self.pes: int = especialitat.pes
+        self.compromis: int = especialitat.compromis
\ No newline at end of file
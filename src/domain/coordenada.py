@@ -1,9 +1,11 @@
-from geopy.distance import geodesic
-
 class Coordenada:
+    __slots__ = ("latitud", "longitud")
+
     def __init__(self, latitud: float, longitud: float) -> None:
         self.latitud: float = latitud
         self.longitud: float = longitud
     
     def distancia(self, altre: "Coordenada") -> float:
+        # geopy només es carrega si es calcula alguna distància sense la matriu
+        from geopy.distance import geodesic
         return geodesic((self.latitud, self.longitud), (altre.latitud, altre.longitud)).meters
\ No newline at end of file
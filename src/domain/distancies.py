@@ -0,0 +1,270 @@
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+import numpy as np
+
+from domain.coordenada import Coordenada
+from instrumentacio import instrumentacio
+
+if TYPE_CHECKING:
+    from domain.magatzemDistancies import MagatzemDistancies
+    from domain.xarxaViaria import XarxaViaria
+
+# Paràmetres de l'el·lipsoide WGS-84 (el mateix que fa servir geopy per defecte)
+RADI_EQUATORIAL: float = 6378137.0
+APLANAMENT: float = 1 / 298.257223563
+RADI_POLAR: float = RADI_EQUATORIAL * (1 - APLANAMENT)
+EXCENTRICITAT2: float = APLANAMENT * (2 - APLANAMENT)
+# Radi mitjà de la Terra (IUGG) per a les aproximacions esfèriques
+RADI_MITJA: float = 6371008.8
+
+# Nombre màxim d'elements que es calculen alhora per limitar la memòria temporal
+MIDA_BLOC: int = 1 << 20
+
+def geodesica(latitud1: np.ndarray, longitud1: np.ndarray, latitud2: np.ndarray, longitud2: np.ndarray,
+              tolerancia: float = 1e-12, iteracionsMaximes: int = 200) -> np.ndarray:
+    """
+    Funció que calcula la distància geodèsica sobre l'el·lipsoide WGS-84 amb la fórmula inversa de Vincenty.
+
+    Està vectoritzada amb NumPy: els arguments poden ser escalars o arrays amb formes compatibles (broadcasting).
+    Per a punts d'una mateixa ciutat la diferència amb geopy.distance.geodesic és inferior al mil·límetre.
+
+    Args:
+        latitud1 (np.ndarray): Latituds dels punts d'origen en graus.
+        longitud1 (np.ndarray): Longituds dels punts d'origen en graus.
+        latitud2 (np.ndarray): Latituds dels punts de destí en graus.
+        longitud2 (np.ndarray): Longituds dels punts de destí en graus.
+        tolerancia (float): Criteri de convergència de la longitud auxiliar en radiants.
+        iteracionsMaximes (int): Nombre màxim d'iteracions.
+
+    Returns:
+        np.ndarray: Distàncies en metres.
+    """
+    U1 = np.arctan((1 - APLANAMENT) * np.tan(np.radians(latitud1)))
+    U2 = np.arctan((1 - APLANAMENT) * np.tan(np.radians(latitud2)))
+    L = np.radians(longitud2) - np.radians(longitud1)
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lambda_ = L
+    for _ in range(iteracionsMaximes):
+        sinLambda, cosLambda = np.sin(lambda_), np.cos(lambda_)
+        sinSigma = np.sqrt((cosU2 * sinLambda) ** 2 + (cosU1 * sinU2 - sinU1 * cosU2 * cosLambda) ** 2)
+        cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLambda
+        sigma = np.arctan2(sinSigma, cosSigma)
+        # Els punts coincidents tenen sinSigma = 0, s'evita la divisió per zero
+        sinAlpha = np.divide(cosU1 * cosU2 * sinLambda, sinSigma, out=np.zeros_like(sinSigma), where=sinSigma != 0)
+        cos2Alpha = 1 - sinAlpha ** 2
+        # Les línies equatorials tenen cos2Alpha = 0
+        cos2SigmaM = np.divide(2 * sinU1 * sinU2, cos2Alpha, out=np.zeros_like(cos2Alpha), where=cos2Alpha != 0)
+        cos2SigmaM = cosSigma - cos2SigmaM
+        C = APLANAMENT / 16 * cos2Alpha * (4 + APLANAMENT * (4 - 3 * cos2Alpha))
+        lambdaAnterior = lambda_
+        lambda_ = L + (1 - C) * APLANAMENT * sinAlpha * (sigma + C * sinSigma * (cos2SigmaM + C * cosSigma * (-1 + 2 * cos2SigmaM ** 2)))
+        if np.all(np.abs(lambda_ - lambdaAnterior) < tolerancia):
+            break
+
+    u2 = cos2Alpha * (RADI_EQUATORIAL ** 2 - RADI_POLAR ** 2) / RADI_POLAR ** 2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (cosSigma * (-1 + 2 * cos2SigmaM ** 2) - B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)))
+    return RADI_POLAR * A * (sigma - deltaSigma)
+
+def haversine(latitud1: np.ndarray, longitud1: np.ndarray, latitud2: np.ndarray, longitud2: np.ndarray) -> np.ndarray:
+    """
+    Funció que calcula la distància de cercle màxim sobre una esfera de radi RADI_MITJA (fórmula del haversine).
+
+    Ignora l'aplanament de la Terra, per tant l'error relatiu respecte a la geodèsica pot arribar al 0.5%.
+
+    Args:
+        latitud1 (np.ndarray): Latituds dels punts d'origen en graus.
+        longitud1 (np.ndarray): Longituds dels punts d'origen en graus.
+        latitud2 (np.ndarray): Latituds dels punts de destí en graus.
+        longitud2 (np.ndarray): Longituds dels punts de destí en graus.
+
+    Returns:
+        np.ndarray: Distàncies en metres.
+    """
+    phi1, phi2 = np.radians(latitud1), np.radians(latitud2)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(longitud2 - longitud1) / 2) ** 2
+    return 2 * RADI_MITJA * np.arcsin(np.sqrt(a))
+
+def equirectangular(latitud1: np.ndarray, longitud1: np.ndarray, latitud2: np.ndarray, longitud2: np.ndarray) -> np.ndarray:
+    """
+    Funció que aproxima la distància amb una projecció equirectangular local sobre l'el·lipsoide WGS-84.
+
+    Fa servir els radis de curvatura meridià i del primer vertical a la latitud mitjana de cada parell,
+    de manera que a escala de ciutat l'error respecte a la geodèsica és del mateix ordre que el mil·límetre.
+    L'error creix amb el quadrat de la distància, no s'ha de fer servir per a trajectes de centenars de quilòmetres.
+
+    Args:
+        latitud1 (np.ndarray): Latituds dels punts d'origen en graus.
+        longitud1 (np.ndarray): Longituds dels punts d'origen en graus.
+        latitud2 (np.ndarray): Latituds dels punts de destí en graus.
+        longitud2 (np.ndarray): Longituds dels punts de destí en graus.
+
+    Returns:
+        np.ndarray: Distàncies en metres.
+    """
+    phi1, phi2 = np.radians(latitud1), np.radians(latitud2)
+    phiMitja = (phi1 + phi2) / 2
+    w2 = 1 - EXCENTRICITAT2 * np.sin(phiMitja) ** 2
+    radiMeridia = RADI_EQUATORIAL * (1 - EXCENTRICITAT2) / w2 ** 1.5
+    radiVertical = RADI_EQUATORIAL / np.sqrt(w2)
+    return np.hypot(radiVertical * np.cos(phiMitja) * np.radians(longitud2 - longitud1), radiMeridia * (phi2 - phi1))
+
+# Mètriques disponibles per calcular la matriu de distàncies
+METRIQUES: Dict[str, Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]] = {
+    "geodesica": geodesica,
+    "haversine": haversine,
+    "equirectangular": equirectangular
+}
+
+class MatriuDistancies:
+    """
+    Matriu de distàncies entre tots els punts d'una simulació.
+
+    Cada coordenada rep un índex enter la primera vegada que apareix i la matriu completa es calcula
+    d'una sola vegada amb NumPy i la mètrica escollida. Les consultes posteriors són un accés a l'array per índex.
+    Les distàncies amb punts que no són a la matriu (per exemple comandes que arriben durant la simulació)
+    es calculen amb la mateixa mètrica en el moment de la consulta, sense guardar-les.
+
+    Amb una xarxa viària, la matriu és la taula de distàncies per carretera entre tots els punts
+    i les distàncies amb punts de fora de la matriu es calculen per la xarxa, que en guarda els camins.
+
+    Amb un magatzem de distàncies (domain/magatzemDistancies.py), la matriu es llegeix del disc
+    i només es calculen les distàncies dels punts que no hi són.
+    """
+
+    def __init__(self, coordenades: Iterable[Coordenada], metrica: str = "geodesica", xarxa: Optional["XarxaViaria"] = None,
+                 magatzem: Optional["MagatzemDistancies"] = None) -> None:
+        if metrica not in METRIQUES:
+            raise ValueError(f"La mètrica {metrica} no existeix. Les mètriques disponibles són: {', '.join(METRIQUES)}.")
+        self.metrica: str = metrica
+        self.xarxa: Optional["XarxaViaria"] = xarxa
+        self.index: Dict[Coordenada, int] = {}
+        for coordenada in coordenades:
+            if coordenada not in self.index:
+                self.index[coordenada] = len(self.index)
+
+        self.coordenades: List[Coordenada] = list(self.index)
+        self.latituds: np.ndarray = np.array([coordenada.latitud for coordenada in self.coordenades], dtype=np.float64)
+        self.longituds: np.ndarray = np.array([coordenada.longitud for coordenada in self.coordenades], dtype=np.float64)
+        self.matriu: np.ndarray = self.calcular() if magatzem is None else magatzem.matriu(self)
+
+    @classmethod
+    def dePunts(cls, inici: Coordenada, comandes: List, restaurants: List, metrica: str = "geodesica",
+                xarxa: Optional["XarxaViaria"] = None, magatzem: Optional["MagatzemDistancies"] = None) -> "MatriuDistancies":
+        """
+        Construeix la matriu amb el punt d'inici, totes les comandes i tots els restaurants.
+
+        Args:
+            inici (Coordenada): Coordenada inicial (l'oficina).
+            comandes (List[Comanda]): Llista de comandes.
+            restaurants (List[Restaurant]): Llista de restaurants.
+            metrica (str): Nom de la mètrica a METRIQUES.
+            xarxa (Optional[XarxaViaria]): Xarxa viària per calcular les distàncies per carretera.
+            magatzem (Optional[MagatzemDistancies]): Magatzem on es guarda i d'on es llegeix la matriu.
+
+        Returns:
+            MatriuDistancies: Matriu amb tots els punts indexats.
+        """
+        return cls([inici] + [comanda.coordenades for comanda in comandes] + [restaurant.coordenades for restaurant in restaurants], metrica, xarxa, magatzem)
+
+    def calcular(self) -> np.ndarray:
+        if self.xarxa is not None:
+            return self.xarxa.matriu(self.coordenades)
+        punts: np.ndarray = np.column_stack((self.latituds, self.longituds))
+        matriu: np.ndarray = np.empty((len(punts), len(punts)), dtype=np.float64)
+        self.calcularBloc(punts, punts, matriu)
+        return matriu
+
+    def familia(self) -> str:
+        """
+        Nom del conjunt de matrius comparables al magatzem: la mètrica i, si n'hi ha, l'empremta de la xarxa viària.
+        """
+        return self.metrica if self.xarxa is None else f"{self.metrica}-xarxa{self.xarxa.empremta}"
+
+    def calcularBloc(self, origens: np.ndarray, destins: np.ndarray, desti: np.ndarray) -> None:
+        """
+        Calcula les distàncies d'uns punts a uns altres i les escriu a desti (que pot ser una part d'un fitxer mapat a memòria).
+
+        Args:
+            origens (np.ndarray): Latitud i longitud dels punts d'origen (a x 2).
+            destins (np.ndarray): Latitud i longitud dels punts de destí (b x 2).
+            desti (np.ndarray): Array a x b on s'escriuen les distàncies.
+        """
+        if self.xarxa is not None:
+            # Les coordenades conegudes conserven els nodes de la xarxa que ja tenen a la memòria cau
+            conegudes: Dict[tuple, Coordenada] = {(coordenada.latitud, coordenada.longitud): coordenada for coordenada in self.coordenades}
+            desti[:] = self.xarxa.bloc([conegudes.get(punt) or Coordenada(*punt) for punt in map(tuple, origens.tolist())],
+                                       [conegudes.get(punt) or Coordenada(*punt) for punt in map(tuple, destins.tolist())])
+            return
+        funcio = METRIQUES[self.metrica]
+        files: int = max(1, MIDA_BLOC // max(len(destins), 1))
+        for inici in range(0, len(origens), files):
+            fi: int = min(inici + files, len(origens))
+            desti[inici:fi] = funcio(origens[inici:fi, 0, None], origens[inici:fi, 1, None], destins[None, :, 0], destins[None, :, 1])
+
+    def __len__(self) -> int:
+        return len(self.coordenades)
+
+    def __contains__(self, coordenada: Coordenada) -> bool:
+        return coordenada in self.index
+
+    def distancia(self, origen: Coordenada, desti: Coordenada) -> float:
+        i: Optional[int] = self.index.get(origen)
+        j: Optional[int] = self.index.get(desti)
+        if i is None or j is None:
+            if instrumentacio.actiu:
+                instrumentacio.comptar("distanciesCalculades")
+            if self.xarxa is not None:
+                return self.xarxa.distancia(origen, desti)
+            return float(METRIQUES[self.metrica](origen.latitud, origen.longitud, desti.latitud, desti.longitud))
+        if instrumentacio.actiu:
+            instrumentacio.comptar("distanciesMatriu")
+        return float(self.matriu[i, j])
+
+    def distancies(self, origen: Coordenada, destins: List[Coordenada]) -> np.ndarray:
+        """
+        Retorna les distàncies des d'un punt a una llista de punts en una sola consulta.
+
+        Args:
+            origen (Coordenada): Coordenada d'origen.
+            destins (List[Coordenada]): Coordenades de destí.
+
+        Returns:
+            np.ndarray: Distàncies en metres, en el mateix ordre que destins.
+        """
+        index: List[Optional[int]] = [self.index.get(desti) for desti in destins]
+        if origen in self.index and None not in index:
+            if instrumentacio.actiu:
+                instrumentacio.comptar("distanciesMatriu", len(destins))
+            return self.matriu[self.index[origen], index]
+        if instrumentacio.actiu:
+            instrumentacio.comptar("distanciesCalculades", len(destins))
+        if self.xarxa is not None:
+            return np.array([self.xarxa.distancia(origen, desti) for desti in destins], dtype=np.float64)
+        return METRIQUES[self.metrica](origen.latitud, origen.longitud,
+                                       np.array([desti.latitud for desti in destins]), np.array([desti.longitud for desti in destins]))
+
+    def distanciesFins(self, origens: List[Coordenada], desti: Coordenada) -> np.ndarray:
+        """
+        Retorna les distàncies des d'una llista de punts fins a un punt en una sola consulta.
+
+        Args:
+            origens (List[Coordenada]): Coordenades d'origen.
+            desti (Coordenada): Coordenada de destí.
+
+        Returns:
+            np.ndarray: Distàncies en metres, en el mateix ordre que origens.
+        """
+        index: List[Optional[int]] = [self.index.get(origen) for origen in origens]
+        if desti in self.index and None not in index:
+            if instrumentacio.actiu:
+                instrumentacio.comptar("distanciesMatriu", len(origens))
+            return self.matriu[index, self.index[desti]]
+        if instrumentacio.actiu:
+            instrumentacio.comptar("distanciesCalculades", len(origens))
+        if self.xarxa is not None:
+            return np.array([self.xarxa.distancia(origen, desti) for origen in origens], dtype=np.float64)
+        return METRIQUES[self.metrica](np.array([origen.latitud for origen in origens]), np.array([origen.longitud for origen in origens]),
+                                       desti.latitud, desti.longitud)
@@ -1,6 +1,13 @@
 class Especialitat:
+    __slots__ = ("especialitat", "compromis", "pes", "colorMarcador", "codi")
+
+    # Nombre d'especialitats creades, dona a cada especialitat un codi enter únic
+    numEspecialitats: int = 0
+
     def __init__(self, especialitat: str, compromis: int, pes: int, colorMarcador: str) -> None:
         self.especialitat: str = especialitat
         self.compromis: int = compromis
         self.pes: int = pes
-        self.colorMarcador: str = colorMarcador
\ No newline at end of file
+        self.colorMarcador: str = colorMarcador
+        self.codi: int = Especialitat.numEspecialitats
+        Especialitat.numEspecialitats += 1
\ No newline at end of file
@@ -0,0 +1,199 @@
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+import heapq, math
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+from domain.especialitat import Especialitat
+from domain.distancies import MatriuDistancies, RADI_MITJA
+from instrumentacio import instrumentacio
+
+Element = TypeVar("Element", Restaurant, Comanda)
+
+# Les distàncies reals (geodèsica, haversine o equirectangular) mai són inferiors al 99% de la corda
+# entre els punts projectats sobre l'esfera de radi RADI_MITJA. S'utilitza com a cota inferior per podar l'arbre.
+FACTOR_COTA: float = 0.99
+# Nombre màxim d'elements a cada fulla de l'arbre
+MIDA_FULLA: int = 8
+
+def puntCartesia(coordenada: Coordenada) -> Tuple[float, float, float]:
+    phi, lam = math.radians(coordenada.latitud), math.radians(coordenada.longitud)
+    return (RADI_MITJA * math.cos(phi) * math.cos(lam), RADI_MITJA * math.cos(phi) * math.sin(lam), RADI_MITJA * math.sin(phi))
+
+class ArbreKD(Generic[Element]):
+    """
+    Arbre k-d sobre les coordenades cartesianes dels elements amb eliminació en O(log n).
+
+    Els elements eliminats es marquen com a inactius i es descompten del recompte de tots els nodes
+    que els contenen, de manera que la cerca no entra mai a subarbres buits.
+    """
+
+    def __init__(self, elements: List[Element]) -> None:
+        self.elements: List[Element] = elements
+        self.punts: List[Tuple[float, float, float]] = [puntCartesia(element.coordenades) for element in elements]
+        self.actiu: List[bool] = [True] * len(elements)
+        self.fullaElement: List[int] = [0] * len(elements)
+        # Estructura dels nodes: rang d'elements (a ordre), fills, pare, caixa contenidora i nombre d'elements actius
+        self.ordre: List[int] = list(range(len(elements)))
+        self.rang: List[Tuple[int, int]] = []
+        self.fills: List[Optional[Tuple[int, int]]] = []
+        self.pare: List[int] = []
+        self.caixa: List[Tuple[Tuple[float, float, float], Tuple[float, float, float]]] = []
+        self.actius: List[int] = []
+        if elements:
+            self.construir(0, len(elements), -1)
+
+    def construir(self, inici: int, fi: int, pare: int) -> int:
+        node: int = len(self.rang)
+        punts = [self.punts[i] for i in self.ordre[inici:fi]]
+        minim = tuple(min(p[d] for p in punts) for d in range(3))
+        maxim = tuple(max(p[d] for p in punts) for d in range(3))
+        self.rang.append((inici, fi))
+        self.fills.append(None)
+        self.pare.append(pare)
+        self.caixa.append((minim, maxim))
+        self.actius.append(fi - inici)
+
+        if fi - inici <= MIDA_FULLA:
+            for i in self.ordre[inici:fi]:
+                self.fullaElement[i] = node
+            return node
+
+        # Es divideix per la dimensió amb més extensió, per la mediana
+        dimensio: int = max(range(3), key=lambda d: maxim[d] - minim[d])
+        self.ordre[inici:fi] = sorted(self.ordre[inici:fi], key=lambda i: self.punts[i][dimensio])
+        mig: int = (inici + fi) // 2
+        esquerre: int = self.construir(inici, mig, node)
+        dret: int = self.construir(mig, fi, node)
+        self.fills[node] = (esquerre, dret)
+        return node
+
+    def __len__(self) -> int:
+        return self.actius[0] if self.actius else 0
+
+    def cota(self, node: int, punt: Tuple[float, float, float]) -> float:
+        minim, maxim = self.caixa[node]
+        suma: float = 0
+        for d in range(3):
+            if punt[d] < minim[d]:
+                suma += (minim[d] - punt[d]) ** 2
+            elif punt[d] > maxim[d]:
+                suma += (punt[d] - maxim[d]) ** 2
+        return FACTOR_COTA * math.sqrt(suma)
+
+    def mesProper(self, origen: Coordenada, distancia: Callable[[Coordenada, Coordenada], float]) -> Tuple[Optional[Element], float]:
+        """
+        Busca l'element actiu més proper a l'origen segons la funció de distància donada.
+
+        L'arbre només s'utilitza per podar: les distàncies dels candidats es calculen amb la funció donada,
+        per tant el resultat és el mateix que el d'una cerca lineal. En cas d'empat es retorna el primer element.
+
+        Args:
+            origen (Coordenada): Coordenada d'origen.
+            distancia (Callable[[Coordenada, Coordenada], float]): Funció de distància entre dues coordenades.
+
+        Returns:
+            Tuple[Optional[Element], float]:
+                - Element més proper, o None si l'arbre és buit.
+                - Distància entre l'origen i l'element.
+        """
+        if len(self) == 0:
+            return None, 0.0
+
+        punt = puntCartesia(origen)
+        millor: Tuple[float, int] = (float("inf"), -1)
+        cua: List[Tuple[float, int]] = [(self.cota(0, punt), 0)]
+        insercions: int = 1
+        while cua:
+            cotaNode, node = heapq.heappop(cua)
+            if cotaNode > millor[0]:
+                break
+            if self.fills[node] is None:
+                inici, fi = self.rang[node]
+                for i in self.ordre[inici:fi]:
+                    if self.actiu[i]:
+                        millor = min(millor, (distancia(origen, self.elements[i].coordenades), i))
+            else:
+                for fill in self.fills[node]:
+                    if self.actius[fill] > 0:
+                        heapq.heappush(cua, (self.cota(fill, punt), fill))
+                        insercions += 1
+        if instrumentacio.actiu:
+            instrumentacio.comptar("consultesIndex")
+            instrumentacio.comptar("insercionsCua", insercions)
+        return self.elements[millor[1]], millor[0]
+
+    def eliminar(self, index: int) -> None:
+        if not self.actiu[index]:
+            return
+        self.actiu[index] = False
+        node: int = self.fullaElement[index]
+        while node != -1:
+            self.actius[node] -= 1
+            node = self.pare[node]
+
+class IndexEspacial(Generic[Element]):
+    """
+    Índex espacial de restaurants o comandes amb un arbre k-d per especialitat.
+
+    Substitueix l'escombrat lineal de best_first_search: cada consulta del més proper d'una especialitat
+    i cada eliminació costen O(log n).
+    """
+
+    def __init__(self, elements: List[Element], matriu: Optional[MatriuDistancies] = None) -> None:
+        self.matriu: Optional[MatriuDistancies] = matriu
+        perEspecialitat: Dict[int, List[Element]] = {}
+        for element in elements:
+            perEspecialitat.setdefault(element.codiEspecialitat, []).append(element)
+
+        # Un arbre per codi d'especialitat
+        self.arbres: Dict[int, ArbreKD[Element]] = {codi: ArbreKD(llista) for codi, llista in perEspecialitat.items()}
+        self.posicio: Dict[Element, Tuple[ArbreKD[Element], int]] = {}
+        for arbre in self.arbres.values():
+            for i, element in enumerate(arbre.elements):
+                self.posicio.setdefault(element, (arbre, i))
+
+    def __len__(self) -> int:
+        return sum(len(arbre) for arbre in self.arbres.values())
+
+    def __contains__(self, element: Element) -> bool:
+        if element not in self.posicio:
+            return False
+        arbre, i = self.posicio[element]
+        return arbre.actiu[i]
+
+    def distancia(self, origen: Coordenada, desti: Coordenada) -> float:
+        if self.matriu is not None:
+            return self.matriu.distancia(origen, desti)
+        return origen.distancia(desti)
+
+    def mesProper(self, origen: Coordenada, especialitat: Especialitat) -> Tuple[Optional[Element], float]:
+        """
+        Busca l'element més proper a l'origen que ofereixi l'especialitat.
+
+        Args:
+            origen (Coordenada): Coordenada d'origen.
+            especialitat (Especialitat): Especialitat que ha de tenir l'element.
+
+        Returns:
+            Tuple[Optional[Element], float]:
+                - Element més proper, o None si no n'hi ha cap d'aquesta especialitat.
+                - Distància entre l'origen i l'element.
+        """
+        arbre: Optional[ArbreKD[Element]] = self.arbres.get(especialitat.codi)
+        if arbre is None:
+            return None, 0.0
+        return arbre.mesProper(origen, self.distancia)
+
+    def actius(self, especialitat: Especialitat) -> List[Element]:
+        """
+        Elements de l'especialitat que encara són a l'índex.
+        """
+        arbre: Optional[ArbreKD[Element]] = self.arbres.get(especialitat.codi)
+        if arbre is None:
+            return []
+        return [element for element, actiu in zip(arbre.elements, arbre.actiu) if actiu]
+
+    def eliminar(self, element: Element) -> None:
+        arbre, i = self.posicio[element]
+        arbre.eliminar(i)
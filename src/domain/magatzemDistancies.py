@@ -0,0 +1,199 @@
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+import glob, hashlib, os, tempfile
+import numpy as np
+
+from instrumentacio import instrumentacio
+
+if TYPE_CHECKING:
+    from domain.distancies import MatriuDistancies
+
+# Caràcters de l'empremta del conjunt de punts al nom dels fitxers
+LLARGADA_EMPREMTA: int = 20
+PERMISOS: int = 0o644
+# Fracció mínima de punts en comú, respecte als punts demanats i als de l'entrada, per ampliar una entrada existent
+FRACCIO_COMUNA: float = 0.5
+# Punts màxims d'una entrada ampliada (una matriu de 5000 x 5000 ocupa 200 MB)
+MIDA_MAXIMA_ENTRADA: int = 5000
+# Entrades màximes per família, quan n'hi ha més s'eliminen les que fa més temps que no es fan servir
+ENTRADES_MAXIMES: int = 20
+
+class MagatzemDistancies:
+    """
+    Magatzem a disc de matrius de distàncies, compartit entre execucions i entre processos.
+
+    Cada entrada són dos fitxers .npy: les coordenades dels punts (n x 2) i la matriu n x n de distàncies,
+    amb el nom format per la família (mètrica i, si n'hi ha, empremta de la xarxa viària) i una empremta del contingut dels punts.
+    Les matrius es llegeixen amb np.load(mmap_mode="r"): els processos que obren la mateixa entrada comparteixen
+    les pàgines del sistema operatiu en lloc de tenir-ne cadascun una còpia, i només es llegeix del disc el que es consulta.
+
+    Si els punts demanats no són exactament els d'una entrada, es llegeixen d'una entrada que els contingui tots o es parteix
+    de l'entrada de la família que en té més en comú: només es calculen les files i columnes dels punts nous, que s'afegeixen
+    a l'entrada en una de nova que la substitueix. Només s'amplia una entrada si comparteix una fracció gran dels punts
+    demanats i dels seus (FRACCIO_COMUNA) i no supera MIDA_MAXIMA_ENTRADA, si no se n'escriu una de separada: dues ciutats
+    diferents només comparteixen l'oficina i no han d'acabar en una sola entrada que creix a cada execució.
+    Cada família guarda com a molt ENTRADES_MAXIMES entrades, i s'eliminen les que fa més temps que no es fan servir.
+    Els fitxers s'escriuen amb un nom temporal i es reanomenen, de manera que un lector mai veu una entrada a mig escriure.
+    """
+
+    def __init__(self, directori: str) -> None:
+        self.directori: str = os.path.abspath(directori)
+        os.makedirs(self.directori, exist_ok=True)
+
+    def cami(self, familia: str, empremta: str) -> str:
+        return os.path.join(self.directori, f"{familia}-{empremta}.npy")
+
+    def camiPunts(self, familia: str, empremta: str) -> str:
+        return os.path.join(self.directori, f"{familia}-{empremta}.punts.npy")
+
+    @staticmethod
+    def empremta(familia: str, punts: np.ndarray) -> str:
+        resum = hashlib.sha1(familia.encode())
+        resum.update(np.ascontiguousarray(punts, dtype=np.float64).tobytes())
+        return resum.hexdigest()[:LLARGADA_EMPREMTA]
+
+    def entrades(self, familia: str) -> List[str]:
+        """
+        Empremtes de les entrades guardades d'una família.
+        """
+        prefix: str = os.path.join(self.directori, f"{familia}-")
+        return [cami[len(prefix):-len(".punts.npy")] for cami in glob.glob(f"{glob.escape(prefix)}*.punts.npy")]
+
+    def guardar(self, familia: str, punts: np.ndarray, omplir: Callable[[np.ndarray], None]) -> Tuple[str, np.ndarray]:
+        """
+        Escriu una entrada nova. La matriu es crea directament al fitxer i la funció omplir l'escriu per blocs.
+
+        Returns:
+            Tuple[str, np.ndarray]: Empremta de l'entrada i la matriu, llegida del fitxer definitiu.
+        """
+        empremta: str = self.empremta(familia, punts)
+        descriptor, temporal = tempfile.mkstemp(suffix=".npy", dir=self.directori)
+        os.close(descriptor)
+        # mkstemp crea els fitxers només per al propietari, i el magatzem el poden llegir altres usuaris
+        os.chmod(temporal, PERMISOS)
+        matriu: np.memmap = np.lib.format.open_memmap(temporal, mode="w+", dtype=np.float64, shape=(len(punts), len(punts)))
+        omplir(matriu)
+        matriu.flush()
+        del matriu
+        descriptor, temporalPunts = tempfile.mkstemp(suffix=".npy", dir=self.directori)
+        os.close(descriptor)
+        os.chmod(temporalPunts, PERMISOS)
+        np.save(temporalPunts, punts)
+        # Primer la matriu i després els punts: una entrada només existeix quan hi ha el fitxer dels punts
+        os.replace(temporal, self.cami(familia, empremta))
+        os.replace(temporalPunts, self.camiPunts(familia, empremta))
+        return empremta, np.load(self.cami(familia, empremta), mmap_mode="r")
+
+    def utilitzar(self, familia: str, empremta: str) -> None:
+        """
+        Marca una entrada com a utilitzada ara, perquè sigui l'última a eliminar-se.
+        """
+        try:
+            os.utime(self.camiPunts(familia, empremta))
+        except OSError:
+            pass
+
+    def netejar(self, familia: str) -> None:
+        """
+        Elimina les entrades de la família que fa més temps que no es fan servir fins a deixar-ne ENTRADES_MAXIMES.
+        """
+        dates: List[Tuple[float, str]] = []
+        for empremta in self.entrades(familia):
+            try:
+                dates.append((os.path.getmtime(self.camiPunts(familia, empremta)), empremta))
+            except OSError:
+                continue
+        for _, empremta in sorted(dates)[:max(0, len(dates) - ENTRADES_MAXIMES)]:
+            self.eliminar(familia, empremta)
+
+    def eliminar(self, familia: str, empremta: str) -> None:
+        # Els processos que ja la tenen oberta la continuen llegint fins que la tanquen
+        for cami in (self.camiPunts(familia, empremta), self.cami(familia, empremta)):
+            try:
+                os.remove(cami)
+            except OSError:
+                pass
+
+    def matriu(self, matriu: "MatriuDistancies") -> np.ndarray:
+        """
+        Retorna la matriu de distàncies dels punts d'una MatriuDistancies, calculant només les distàncies que no són al magatzem.
+
+        Args:
+            matriu (MatriuDistancies): Matriu amb els punts indexats, la mètrica i la xarxa viària.
+
+        Returns:
+            np.ndarray: Matriu n x n de distàncies en l'ordre dels punts. Si els punts són els d'una entrada
+                (o els primers d'una entrada) és una vista de només lectura del fitxer, sense còpia.
+        """
+        familia: str = matriu.familia()
+        punts: np.ndarray = np.column_stack((matriu.latituds, matriu.longituds))
+        n: int = len(punts)
+        empremta: str = self.empremta(familia, punts)
+        if os.path.exists(self.camiPunts(familia, empremta)):
+            self.utilitzar(familia, empremta)
+            if instrumentacio.actiu:
+                instrumentacio.comptar("distanciesMagatzem", n * n)
+            return np.load(self.cami(familia, empremta), mmap_mode="r")
+
+        # Entrada de la família amb més punts en comú que es pot fer servir: o bé conté tots els punts demanats,
+        # o bé en comparteix una fracció gran (dels demanats i dels seus) i la unió no és massa gran
+        millor: Optional[Tuple[int, str, np.ndarray, Dict[Tuple[float, float], int]]] = None
+        for candidata in self.entrades(familia):
+            try:
+                puntsCandidata: np.ndarray = np.load(self.camiPunts(familia, candidata))
+            except OSError:
+                # Una altra execució l'acaba de substituir
+                continue
+            posicions: Dict[Tuple[float, float], int] = {}
+            for posicio, punt in enumerate(map(tuple, puntsCandidata.tolist())):
+                posicions.setdefault(punt, posicio)
+            comuns: int = sum(1 for punt in map(tuple, punts.tolist()) if punt in posicions)
+            if comuns < n and (comuns < FRACCIO_COMUNA * n or comuns < FRACCIO_COMUNA * len(posicions)
+                               or len(puntsCandidata) + n - comuns > MIDA_MAXIMA_ENTRADA):
+                continue
+            if comuns and (millor is None or comuns > millor[0]):
+                millor = (comuns, candidata, puntsCandidata, posicions)
+
+        if millor is None:
+            _, guardada = self.guardar(familia, punts, lambda desti: matriu.calcularBloc(punts, punts, desti))
+            self.netejar(familia)
+            if instrumentacio.actiu:
+                instrumentacio.comptar("distanciesNoves", n * n)
+            return guardada
+
+        _, anterior, puntsAnteriors, posicions = millor
+        m: int = len(puntsAnteriors)
+        # Els punts nous (sense repetir) s'afegeixen al final de l'entrada
+        files: List[int] = []
+        nous: List[int] = []
+        for posicio, punt in enumerate(map(tuple, punts.tolist())):
+            if punt not in posicions:
+                posicions[punt] = m + len(nous)
+                nous.append(posicio)
+            files.append(posicions[punt])
+
+        if nous:
+            try:
+                matriuAnterior: np.ndarray = np.load(self.cami(familia, anterior), mmap_mode="r")
+            except OSError:
+                # Una altra execució l'acaba de substituir, es torna a buscar
+                return self.matriu(matriu)
+            unio: np.ndarray = np.concatenate((puntsAnteriors, punts[nous]))
+            def omplir(desti: np.ndarray) -> None:
+                desti[:m, :m] = matriuAnterior
+                matriu.calcularBloc(unio[m:], unio, desti[m:])
+                matriu.calcularBloc(unio[:m], unio[m:], desti[:m, m:])
+            _, guardada = self.guardar(familia, unio, omplir)
+            self.eliminar(familia, anterior)
+            self.netejar(familia)
+            if instrumentacio.actiu:
+                instrumentacio.comptar("distanciesMagatzem", m * m)
+                instrumentacio.comptar("distanciesNoves", len(unio) ** 2 - m * m)
+        else:
+            guardada = np.load(self.cami(familia, anterior), mmap_mode="r")
+            self.utilitzar(familia, anterior)
+            if instrumentacio.actiu:
+                instrumentacio.comptar("distanciesMagatzem", n * n)
+
+        if files == list(range(n)):
+            return guardada[:n, :n]
+        return guardada[np.ix_(files, files)]
@@ -1,36 +1,70 @@
-from typing import Dict, List
-import pandas as pd
-import folium
-import folium.plugins as folium_plugins
-import os
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+import json, math, os, re
 
 from domain.coordenada import Coordenada
 from domain.comanda import Comanda
 from domain.restaurant import Restaurant
 from domain.especialitat import Especialitat
 
+# folium només es carrega quan es crea un mapa
+if TYPE_CHECKING:
+    import folium
+
+# A partir d'aquest nombre de comandes i restaurants el mapa es genera en mode compacte
+LLINDAR_COMPACTE: int = 500
+# Decimals de les coordenades en mode compacte (uns 10 cm)
+DECIMALS_COMPACTE: int = 6
+# Nom de la capa de rutes de cada color en mode compacte
+CAPES_RUTES: Dict[str, str] = {"blue": "Recollides", "red": "Lliuraments", "green": "Tornades a l'oficina"}
+# Marcador que genera cada fila [latitud, longitud, popup, esRestaurant] del mode compacte en el navegador
+CALLBACK_COMPACTE: str = """function (row) {
+    var icon = L.AwesomeMarkers.icon({markerColor: '%s', icon: row[3] ? 'cutlery' : 'home', prefix: 'glyphicon'});
+    return L.marker(new L.LatLng(row[0], row[1]), {icon: icon}).bindPopup(row[2]);
+}"""
+MARCA_DADES: re.Pattern = re.compile(r'"(__dadesMapa\d+__)"')
+
 class MapGenerator:
     def __init__(self, tecnocampus: Coordenada, comandes: List[Comanda], restaurants: List[Restaurant], especialitats: Dict[str, Especialitat],
-                  outputFolder: str) -> None:
+                  outputFolder: str, compacte: Optional[bool] = None) -> None:
+        """
+        Args:
+            compacte (Optional[bool]): Mode compacte per a execucions grans: els marcadors de cada especialitat s'agrupen en clústers
+                que es creen al navegador, les rutes de cada color formen una sola capa i les dades s'escriuen al fitxer a mesura que es guarda.
+                Per defecte, s'activa a partir de LLINDAR_COMPACTE comandes i restaurants.
+        """
         self.tecnocampus: Coordenada = tecnocampus
         self.comandes: List[Comanda] = comandes
         self.restaurants: List[Restaurant] = restaurants
         self.especialitats: Dict[str, Especialitat] = especialitats
+        self.compacte: bool = compacte if compacte is not None else len(comandes) + len(restaurants) >= LLINDAR_COMPACTE
+        # Dades del mode compacte que s'escriuen en guardar el mapa, per marca
+        self.dades: Dict[str, Callable[[], Iterable[Any]]] = {}
+        # Coordenades de les rutes del mode compacte, per color
+        self.rutes: Dict[str, List[List[List[float]]]] = {}
+        import folium
         self.mapa = folium.Map(location=self.puntMig(), zoom_start=14)
         self.outputFolder = outputFolder
         os.makedirs(outputFolder, exist_ok=True)
 
     def puntMig(self) -> List[float]:
         coordenades = [comanda.coordenades for comanda in self.comandes] + [restaurant.coordenades for restaurant in self.restaurants]
-        df = pd.DataFrame([(coordenada.latitud, coordenada.longitud) for coordenada in coordenades], columns=["latitud", "longitud"])
-        puntMig = df.mean()
-        return [puntMig["latitud"], puntMig["longitud"]]
+        if not coordenades:
+            return [self.tecnocampus.latitud, self.tecnocampus.longitud]
+        return [math.fsum(coordenada.latitud for coordenada in coordenades) / len(coordenades),
+                math.fsum(coordenada.longitud for coordenada in coordenades) / len(coordenades)]
 
-    def generateInitialMap(self) -> folium.Map:
+    def generateInitialMap(self) -> "folium.Map":
+        import folium
+        import folium.plugins as folium_plugins
         folium.Marker([self.tecnocampus.latitud, self.tecnocampus.longitud],
                       icon=folium.Icon(color='gray', icon='flag'),
                       popup="Tecnocampus").add_to(self.mapa)
 
+        if self.compacte:
+            self.afegirClusters()
+            folium.LayerControl().add_to(self.mapa)
+            return self.mapa
+
         allMarcadors = folium.FeatureGroup("Totes les parades").add_to(self.mapa)
 
         grupsEspecialitats = {}
@@ -51,11 +85,63 @@ class MapGenerator:
         folium.LayerControl().add_to(self.mapa)
 
         return self.mapa
-    
+
+    def reservarDades(self, element: Any, atribut: str, files: Callable[[], Iterable[Any]]) -> None:
+        """
+        Substitueix les dades d'un element del mapa per una marca que es reemplaça per les files en guardar el mapa.
+        """
+        marca: str = f"__dadesMapa{len(self.dades)}__"
+        setattr(element, atribut, marca)
+        self.dades[marca] = files
+
+    def afegirClusters(self) -> None:
+        """
+        Afegeix un clúster de marcadors per especialitat amb les comandes i els restaurants, sense crear cap marcador a Python.
+        """
+        import folium.plugins as folium_plugins
+
+        def files(especialitat: Especialitat) -> Iterable[List[Any]]:
+            for comanda in self.comandes:
+                if comanda.especialitat is especialitat:
+                    yield [round(comanda.coordenades.latitud, DECIMALS_COMPACTE), round(comanda.coordenades.longitud, DECIMALS_COMPACTE), f"Comanda {comanda.id}", 0]
+            for restaurant in self.restaurants:
+                if restaurant.especialitat is especialitat:
+                    yield [round(restaurant.coordenades.latitud, DECIMALS_COMPACTE), round(restaurant.coordenades.longitud, DECIMALS_COMPACTE), f"Restaurant {restaurant.nom}", 1]
+
+        for especialitat in self.especialitats.values():
+            cluster = folium_plugins.FastMarkerCluster([], callback=CALLBACK_COMPACTE % especialitat.colorMarcador, name=especialitat.especialitat).add_to(self.mapa)
+            self.reservarDades(cluster, "data", lambda especialitat=especialitat: files(especialitat))
+
     def afegirRuta(self, coordenades: List[Coordenada], nom: str , color: str) -> None:       
+        if self.compacte:
+            if color not in self.rutes:
+                import folium
+                self.rutes[color] = []
+                capa = folium.FeatureGroup(CAPES_RUTES.get(color, color)).add_to(self.mapa)
+                linia = folium.PolyLine([[0, 0], [0, 0]], color=color, weight=2.5, opacity=1).add_to(capa)
+                self.reservarDades(linia, "locations", lambda color=color: self.rutes[color])
+            self.rutes[color].append([[round(coordenada.latitud, DECIMALS_COMPACTE), round(coordenada.longitud, DECIMALS_COMPACTE)] for coordenada in coordenades])
+            return
+        import folium.plugins as folium_plugins
         folium_plugins.AntPath([[coordenada.latitud, coordenada.longitud] for coordenada in coordenades], color=color, weight=2.5, opacity=1, dash_array=[10, 20], delay=800, reverse= False, paused= False, show_popup= False, popup_options= None, tooltip_options= None, name=nom).add_to(self.mapa)
 
     def save(self, htmlFileName: str = "mapa.html") -> str:
         outputPath = os.path.join(self.outputFolder, htmlFileName)
-        self.mapa.save(outputPath)
-        return outputPath
\ No newline at end of file
+        if not self.compacte:
+            self.mapa.save(outputPath)
+            return outputPath
+        # La plantilla no conté les dades, que s'escriuen fila a fila sense construir tot l'HTML en memòria
+        parts: List[str] = MARCA_DADES.split(self.mapa.get_root().render())
+        with open(outputPath, "w", encoding="utf-8") as fitxer:
+            for posicio, part in enumerate(parts):
+                if posicio % 2 == 0:
+                    fitxer.write(part)
+                    continue
+                fitxer.write("[")
+                for numero, fila in enumerate(self.dades[part]()):
+                    if numero > 0:
+                        fitxer.write(",")
+                    # Sense "<" un nom no pot tancar l'etiqueta <script>
+                    fitxer.write(json.dumps(fila, ensure_ascii=False, separators=(",", ":")).replace("<", "\\u003c"))
+                fitxer.write("]")
+        return outputPath
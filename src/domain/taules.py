@@ -0,0 +1,194 @@
+from typing import Any, Dict, Iterable, Iterator, List
+import weakref
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.comanda import Comanda
+from domain.restaurant import Restaurant
+from domain.especialitat import Especialitat
+
+class Taula:
+    """
+    Punts (comandes o restaurants) guardats per columnes: un array de NumPy per atribut en lloc d'un objecte per punt.
+
+    L'especialitat es guarda com el seu codi enter, i el pes i el compromís es copien en arrays
+    per poder-los llegir sense passar per l'objecte Especialitat.
+
+    La taula reutilitza la vista de cada fila mentre algú la fa servir: la mateixa fila sempre és el mateix objecte,
+    amb la mateixa coordenada, perquè la MatriuDistancies i l'IndexEspacial identifiquen els punts per l'objecte.
+    Les vistes que ja no es fan servir s'alliberen, i recórrer la taula no les guarda totes en memòria.
+    Quan una vista es copia a un altre procés, s'hi copien els valors de la fila com a Comanda o Restaurant, sense la taula.
+    """
+    # Classe de les vistes de cada fila, la defineix cada subclasse
+    tipusVista: type
+
+    def __init__(self, especialitats: Iterable[Especialitat], codis: Iterable[int], carrers: Iterable[str],
+                 latituds: Iterable[float], longituds: Iterable[float]) -> None:
+        self.especialitats: Dict[int, Especialitat] = {especialitat.codi: especialitat for especialitat in especialitats}
+        self.codis: np.ndarray = np.asarray(codis, dtype=np.int16)
+        self.carrers: np.ndarray = np.asarray(carrers, dtype=object)
+        self.latituds: np.ndarray = np.asarray(latituds, dtype=np.float64)
+        self.longituds: np.ndarray = np.asarray(longituds, dtype=np.float64)
+
+        pesos: np.ndarray = np.zeros(max(self.especialitats, default=-1) + 1, dtype=np.int32)
+        compromisos: np.ndarray = np.zeros_like(pesos)
+        for codi, especialitat in self.especialitats.items():
+            pesos[codi], compromisos[codi] = especialitat.pes, especialitat.compromis
+        desconeguts: List[int] = sorted(set(np.unique(self.codis).tolist()) - set(self.especialitats))
+        if desconeguts:
+            raise ValueError(f"Els codis d'especialitat {desconeguts} no corresponen a cap especialitat de la taula.")
+        self.pesos: np.ndarray = pesos[self.codis]
+        self.compromisos: np.ndarray = compromisos[self.codis]
+        self.vistes: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self.codis)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Les referències febles no es poden copiar a un altre procés, allà les vistes es tornen a crear
+        estat: Dict[str, Any] = self.__dict__.copy()
+        del estat["vistes"]
+        return estat
+
+    def __setstate__(self, estat: Dict[str, Any]) -> None:
+        self.__dict__.update(estat)
+        self.vistes = weakref.WeakValueDictionary()
+
+    def vista(self, fila: int) -> Any:
+        """
+        Vista de la fila, la mateixa mentre algú la faci servir.
+        """
+        vista = self.vistes.get(fila)
+        if vista is None:
+            vista = self.tipusVista(self, fila)
+            self.vistes[fila] = vista
+        return vista
+
+    def coordenades(self, fila: int) -> Coordenada:
+        return Coordenada(float(self.latituds[fila]), float(self.longituds[fila]))
+
+class VistaComanda:
+    """
+    Comanda d'una TaulaComandes. Té els mateixos atributs que Comanda.
+
+    Els atributs que es consulten als bucles dels algorismes es llegeixen de la fila quan es crea la vista,
+    de manera que consultar-los no indexa els arrays de la taula. La resta es llegeixen de la taula a demanda.
+    """
+    __slots__ = ("taula", "fila", "id", "coordenades", "codiEspecialitat", "pes", "compromis", "__weakref__")
+
+    def __init__(self, taula: "TaulaComandes", fila: int) -> None:
+        self.taula: TaulaComandes = taula
+        self.fila: int = fila
+        self.id: int = int(taula.ids[fila])
+        self.coordenades: Coordenada = taula.coordenades(fila)
+        self.codiEspecialitat: int = int(taula.codis[fila])
+        self.pes: int = int(taula.pesos[fila])
+        self.compromis: int = int(taula.compromisos[fila])
+
+    @property
+    def especialitat(self) -> Especialitat:
+        return self.taula.especialitats[self.codiEspecialitat]
+
+    @property
+    def carrer(self) -> str:
+        return self.taula.carrers[self.fila]
+
+    def __reduce__(self) -> tuple:
+        # Copiar la taula amb cada vista enviaria tota la ciutat a cada procés del pool. Les vistes repetides
+        # dins de la mateixa còpia continuen sent el mateix objecte, perquè pickle les guarda una sola vegada
+        return (Comanda, (self.id, self.especialitat, self.carrer, self.coordenades))
+
+class TaulaComandes(Taula):
+    """
+    Comandes guardades per columnes. Cada fila es pot consultar com una VistaComanda.
+    """
+    tipusVista: type = VistaComanda
+
+    def __init__(self, especialitats: Iterable[Especialitat], ids: Iterable[int], codis: Iterable[int], carrers: Iterable[str],
+                 latituds: Iterable[float], longituds: Iterable[float]) -> None:
+        super().__init__(especialitats, codis, carrers, latituds, longituds)
+        self.ids: np.ndarray = np.asarray(ids, dtype=np.int64)
+
+    @classmethod
+    def deComandes(cls, comandes: List[Comanda]) -> "TaulaComandes":
+        """
+        Construeix la taula a partir d'una llista de comandes.
+
+        Args:
+            comandes (List[Comanda]): Llista de comandes.
+
+        Returns:
+            TaulaComandes: Taula amb una fila per comanda, en el mateix ordre.
+        """
+        return cls({comanda.especialitat for comanda in comandes}, [comanda.id for comanda in comandes], [comanda.codiEspecialitat for comanda in comandes],
+                   [comanda.carrer for comanda in comandes], [comanda.coordenades.latitud for comanda in comandes], [comanda.coordenades.longitud for comanda in comandes])
+
+    def __getitem__(self, fila: int) -> VistaComanda:
+        if not -len(self) <= fila < len(self):
+            raise IndexError(f"La fila {fila} no existeix a la taula de {len(self)} comandes.")
+        return self.vista(fila % len(self))
+
+    def __iter__(self) -> Iterator[VistaComanda]:
+        for fila in range(len(self)):
+            yield self.vista(fila)
+
+class VistaRestaurant:
+    """
+    Restaurant d'una TaulaRestaurants. Té els mateixos atributs que Restaurant, llegits com els de VistaComanda.
+    """
+    __slots__ = ("taula", "fila", "nom", "coordenades", "codiEspecialitat", "__weakref__")
+
+    def __init__(self, taula: "TaulaRestaurants", fila: int) -> None:
+        self.taula: TaulaRestaurants = taula
+        self.fila: int = fila
+        self.nom: str = taula.noms[fila]
+        self.coordenades: Coordenada = taula.coordenades(fila)
+        self.codiEspecialitat: int = int(taula.codis[fila])
+
+    @property
+    def especialitat(self) -> Especialitat:
+        return self.taula.especialitats[self.codiEspecialitat]
+
+    @property
+    def carrer(self) -> str:
+        return self.taula.carrers[self.fila]
+
+    def __reduce__(self) -> tuple:
+        return (Restaurant, (self.nom, self.carrer, self.especialitat, self.coordenades))
+
+    def __lt__(self, altre: "VistaRestaurant") -> bool:
+        return self.nom < altre.nom
+
+class TaulaRestaurants(Taula):
+    """
+    Restaurants guardats per columnes. Cada fila es pot consultar com una VistaRestaurant.
+    """
+    tipusVista: type = VistaRestaurant
+
+    def __init__(self, especialitats: Iterable[Especialitat], noms: Iterable[str], codis: Iterable[int], carrers: Iterable[str],
+                 latituds: Iterable[float], longituds: Iterable[float]) -> None:
+        super().__init__(especialitats, codis, carrers, latituds, longituds)
+        self.noms: np.ndarray = np.asarray(noms, dtype=object)
+
+    @classmethod
+    def deRestaurants(cls, restaurants: List[Restaurant]) -> "TaulaRestaurants":
+        """
+        Construeix la taula a partir d'una llista de restaurants.
+
+        Args:
+            restaurants (List[Restaurant]): Llista de restaurants.
+
+        Returns:
+            TaulaRestaurants: Taula amb una fila per restaurant, en el mateix ordre.
+        """
+        return cls({restaurant.especialitat for restaurant in restaurants}, [restaurant.nom for restaurant in restaurants], [restaurant.codiEspecialitat for restaurant in restaurants],
+                   [restaurant.carrer for restaurant in restaurants], [restaurant.coordenades.latitud for restaurant in restaurants], [restaurant.coordenades.longitud for restaurant in restaurants])
+
+    def __getitem__(self, fila: int) -> VistaRestaurant:
+        if not -len(self) <= fila < len(self):
+            raise IndexError(f"La fila {fila} no existeix a la taula de {len(self)} restaurants.")
+        return self.vista(fila % len(self))
+
+    def __iter__(self) -> Iterator[VistaRestaurant]:
+        for fila in range(len(self)):
+            yield self.vista(fila)
@@ -0,0 +1,229 @@
+from typing import Dict, List, Optional, Tuple
+import hashlib, heapq
+import numpy as np
+
+from domain.coordenada import Coordenada
+from domain.distancies import METRIQUES
+from instrumentacio import instrumentacio
+
+# La llargada d'un carrer mai és inferior al 99% de la distància en línia recta entre els seus extrems.
+# Fa que l'heurística de l'A* sigui admissible encara que la mètrica tingui un petit error.
+FACTOR_HEURISTICA: float = 0.99
+
+class XarxaViaria:
+    """
+    Graf dirigit de carrers per calcular distàncies per carretera.
+
+    Cada coordenada s'enganxa al node més proper i la distància entre dos punts és la del tram fins al node
+    d'origen, el camí més curt per la xarxa i el tram des del node de destí. Els camins més curts es guarden,
+    de manera que les consultes repetides durant una execució són un accés a un diccionari.
+    Els trams d'accés i l'heurística de l'A* es calculen amb una de les mètriques de domain/distancies.py.
+    """
+
+    def __init__(self, latituds: np.ndarray, longituds: np.ndarray, origens: np.ndarray, destins: np.ndarray, llargades: np.ndarray,
+                 metrica: str = "geodesica") -> None:
+        """
+        Args:
+            latituds (np.ndarray): Latitud de cada node.
+            longituds (np.ndarray): Longitud de cada node.
+            origens (np.ndarray): Node d'origen de cada aresta.
+            destins (np.ndarray): Node de destí de cada aresta.
+            llargades (np.ndarray): Llargada de cada aresta en metres.
+            metrica (str): Nom de la mètrica a METRIQUES per als trams d'accés i l'heurística.
+        """
+        if metrica not in METRIQUES:
+            raise ValueError(f"La mètrica {metrica} no existeix. Les mètriques disponibles són: {', '.join(METRIQUES)}.")
+        if len(latituds) == 0:
+            raise ValueError("La xarxa viària no té cap node.")
+        self.metrica: str = metrica
+        self.latituds: np.ndarray = np.asarray(latituds, dtype=np.float64)
+        self.longituds: np.ndarray = np.asarray(longituds, dtype=np.float64)
+        self.numArestes: int = len(origens)
+        # Identifica la xarxa al magatzem de distàncies: dues xarxes amb els mateixos nodes i arestes donen les mateixes distàncies
+        resum = hashlib.sha1(metrica.encode())
+        for array in (self.latituds, self.longituds, np.asarray(origens, dtype=np.int64), np.asarray(destins, dtype=np.int64), np.asarray(llargades, dtype=np.float64)):
+            resum.update(np.ascontiguousarray(array).tobytes())
+        self.empremta: str = resum.hexdigest()[:16]
+        # Llistes d'adjacència de Python: als bucles de Dijkstra són més ràpides que indexar arrays de NumPy
+        self.adjacencia: List[List[Tuple[int, float]]] = [[] for _ in range(len(self.latituds))]
+        for origen, desti, llargada in zip(np.asarray(origens).tolist(), np.asarray(destins).tolist(), np.asarray(llargades, dtype=np.float64).tolist()):
+            self.adjacencia[origen].append((desti, llargada))
+
+        # Memòries cau: node més proper de cada coordenada, distàncies des de cada origen ja explorat i camins de l'A*
+        self.nodes: Dict[Coordenada, Tuple[int, float]] = {}
+        self.arbres: Dict[int, Dict[int, float]] = {}
+        self.camins: Dict[Tuple[int, int], Tuple[float, List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.latituds)
+
+    def distanciaRecta(self, latitud1: np.ndarray, longitud1: np.ndarray, latitud2: np.ndarray, longitud2: np.ndarray) -> np.ndarray:
+        return METRIQUES[self.metrica](latitud1, longitud1, latitud2, longitud2)
+
+    def nodeMesProper(self, coordenada: Coordenada) -> Tuple[int, float]:
+        """
+        Retorna el node de la xarxa més proper a la coordenada i la distància fins a ell.
+        """
+        node: Optional[Tuple[int, float]] = self.nodes.get(coordenada)
+        if node is None:
+            distancies: np.ndarray = self.distanciaRecta(coordenada.latitud, coordenada.longitud, self.latituds, self.longituds)
+            posicio: int = int(np.argmin(distancies))
+            node = (posicio, float(distancies[posicio]))
+            self.nodes[coordenada] = node
+        return node
+
+    def dijkstra(self, origen: int, objectius: Optional[set] = None) -> Dict[int, float]:
+        """
+        Calcula les distàncies per la xarxa des d'un node amb l'algorisme de Dijkstra.
+
+        Args:
+            origen (int): Node d'origen.
+            objectius (Optional[set]): Nodes que interessen. La cerca s'atura quan s'han assentat tots.
+                Sense objectius s'exploren tots els nodes abastables.
+
+        Returns:
+            Dict[int, float]: Distància fins a cada node assentat. Es guarda per a les consultes posteriors des del mateix origen.
+        """
+        anterior: Optional[Dict[int, float]] = self.arbres.get(origen)
+        if anterior is not None and (objectius is None and len(anterior) == len(self) or objectius is not None and objectius.issubset(anterior)):
+            return anterior
+
+        assentats: Dict[int, float] = {}
+        pendents: set = set(objectius) if objectius is not None else set()
+        cua: List[Tuple[float, int]] = [(0.0, origen)]
+        millors: Dict[int, float] = {origen: 0.0}
+        while cua:
+            distancia, node = heapq.heappop(cua)
+            if node in assentats:
+                continue
+            assentats[node] = distancia
+            pendents.discard(node)
+            if objectius is not None and not pendents:
+                break
+            for vei, llargada in self.adjacencia[node]:
+                nova: float = distancia + llargada
+                if nova < millors.get(vei, float("inf")):
+                    millors[vei] = nova
+                    heapq.heappush(cua, (nova, vei))
+        if instrumentacio.actiu:
+            instrumentacio.comptar("nodesDijkstra", len(assentats))
+        self.arbres[origen] = assentats
+        return assentats
+
+    def cami(self, origen: int, desti: int) -> Tuple[float, List[int]]:
+        """
+        Calcula el camí més curt entre dos nodes amb l'algorisme A*, amb la distància en línia recta fins al destí com a heurística.
+
+        Args:
+            origen (int): Node d'origen.
+            desti (int): Node de destí.
+
+        Returns:
+            Tuple[float, List[int]]:
+                - Llargada del camí en metres, o infinit si el destí no és abastable.
+                - Nodes del camí, de l'origen al destí (buit si no és abastable).
+        """
+        guardat: Optional[Tuple[float, List[int]]] = self.camins.get((origen, desti))
+        if guardat is not None:
+            return guardat
+
+        latitudDesti, longitudDesti = self.latituds[desti], self.longituds[desti]
+        # L'heurística de tots els nodes es calcula d'una sola vegada amb NumPy
+        heuristica: List[float] = (FACTOR_HEURISTICA * self.distanciaRecta(self.latituds, self.longituds, latitudDesti, longitudDesti)).tolist()
+        cua: List[Tuple[float, float, int]] = [(heuristica[origen], 0.0, origen)]
+        millors: Dict[int, float] = {origen: 0.0}
+        pares: Dict[int, int] = {}
+        tancats: set = set()
+        resultat: Tuple[float, List[int]] = (float("inf"), [])
+        while cua:
+            _, distancia, node = heapq.heappop(cua)
+            if node in tancats:
+                continue
+            if node == desti:
+                cami: List[int] = [node]
+                while cami[-1] != origen:
+                    cami.append(pares[cami[-1]])
+                resultat = (distancia, cami[::-1])
+                break
+            tancats.add(node)
+            for vei, llargada in self.adjacencia[node]:
+                nova: float = distancia + llargada
+                if nova < millors.get(vei, float("inf")):
+                    millors[vei] = nova
+                    pares[vei] = node
+                    heapq.heappush(cua, (nova + heuristica[vei], nova, vei))
+        if instrumentacio.actiu:
+            instrumentacio.comptar("nodesAEstrella", len(tancats))
+        self.camins[(origen, desti)] = resultat
+        return resultat
+
+    def distanciaNodes(self, origen: int, desti: int) -> float:
+        arbre: Optional[Dict[int, float]] = self.arbres.get(origen)
+        if arbre is not None and desti in arbre:
+            return arbre[desti]
+        return self.cami(origen, desti)[0]
+
+    def distancia(self, origen: Coordenada, desti: Coordenada) -> float:
+        """
+        Distància per carretera entre dos punts, amb els trams d'accés a la xarxa.
+
+        Si els dos punts s'enganxen al mateix node, o el destí no és abastable des de l'origen,
+        es retorna la distància en línia recta.
+        """
+        if origen is desti:
+            return 0.0
+        nodeOrigen, accesOrigen = self.nodeMesProper(origen)
+        nodeDesti, accesDesti = self.nodeMesProper(desti)
+        carretera: float = self.distanciaNodes(nodeOrigen, nodeDesti) if nodeOrigen != nodeDesti else float("inf")
+        if carretera == float("inf"):
+            return float(self.distanciaRecta(origen.latitud, origen.longitud, desti.latitud, desti.longitud))
+        return accesOrigen + carretera + accesDesti
+
+    def bloc(self, origens: List[Coordenada], destins: List[Coordenada]) -> np.ndarray:
+        """
+        Taula de distàncies per carretera dels punts d'origen als de destí, amb un Dijkstra per cada node d'origen diferent
+        que s'atura quan ha arribat a tots els nodes de destí.
+
+        Args:
+            origens (List[Coordenada]): Punts d'origen (files).
+            destins (List[Coordenada]): Punts de destí (columnes).
+
+        Returns:
+            np.ndarray: Matriu de distàncies en metres (no necessàriament simètrica si hi ha carrers d'un sol sentit).
+        """
+        enganxatsOrigens: List[Tuple[int, float]] = [self.nodeMesProper(coordenada) for coordenada in origens]
+        enganxatsDestins: List[Tuple[int, float]] = [self.nodeMesProper(coordenada) for coordenada in destins]
+        nodesOrigens: np.ndarray = np.array([node for node, _ in enganxatsOrigens], dtype=np.int64)
+        nodesDestins: np.ndarray = np.array([node for node, _ in enganxatsDestins], dtype=np.int64)
+        accesOrigens: np.ndarray = np.array([distancia for _, distancia in enganxatsOrigens], dtype=np.float64)
+        accesDestins: np.ndarray = np.array([distancia for _, distancia in enganxatsDestins], dtype=np.float64)
+        objectius: set = set(nodesDestins.tolist())
+
+        carretera: np.ndarray = np.empty((len(origens), len(destins)), dtype=np.float64)
+        for node in set(nodesOrigens.tolist()):
+            arbre: Dict[int, float] = self.dijkstra(node, objectius)
+            fila: np.ndarray = np.array([arbre.get(desti, np.inf) for desti in nodesDestins.tolist()])
+            carretera[nodesOrigens == node] = fila
+
+        matriu: np.ndarray = accesOrigens[:, None] + carretera + accesDestins[None, :]
+        # Punts enganxats al mateix node o sense camí: distància en línia recta
+        recta: np.ndarray = (nodesOrigens[:, None] == nodesDestins[None, :]) | np.isinf(carretera)
+        if recta.any():
+            files, columnes = np.nonzero(recta)
+            matriu[files, columnes] = self.distanciaRecta(np.array([coordenada.latitud for coordenada in origens])[files], np.array([coordenada.longitud for coordenada in origens])[files],
+                                                          np.array([coordenada.latitud for coordenada in destins])[columnes], np.array([coordenada.longitud for coordenada in destins])[columnes])
+        return matriu
+
+    def matriu(self, coordenades: List[Coordenada]) -> np.ndarray:
+        """
+        Taula de distàncies per carretera entre tots els punts.
+
+        Args:
+            coordenades (List[Coordenada]): Punts de la taula.
+
+        Returns:
+            np.ndarray: Matriu n x n de distàncies en metres.
+        """
+        matriu: np.ndarray = self.bloc(coordenades, coordenades)
+        np.fill_diagonal(matriu, 0.0)
+        return matriu
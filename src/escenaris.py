@@ -0,0 +1,109 @@
+from typing import Any, Dict, List, Optional
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+import argparse, csv, itertools, os, time
+
+from domain.distancies import METRIQUES
+from delivery_simulation import SOLVERS, main
+from opcions import OpcionsPlanificacio
+
+COLUMNES: List[str] = ["escenari", "capacitatMaxima", "repetirRestaurants", "dades", "solver", "metrica",
+                       "comandes", "viatges", "distanciaKm", "temps", "error"]
+
+class Escenari:
+    """
+    Paràmetres d'una execució de la simulació en mode lot.
+    """
+
+    def __init__(self, numero: int, capacitatMaxima: int, repetirRestaurants: bool, directoriDades: Optional[str] = None,
+                 solver: str = "hillClimbing", metrica: str = "geodesica") -> None:
+        self.numero: int = numero
+        self.capacitatMaxima: int = capacitatMaxima
+        self.repetirRestaurants: bool = repetirRestaurants
+        # Sense directori es fan servir les dades de data/data.py
+        self.directoriDades: Optional[str] = directoriDades
+        self.solver: str = solver
+        self.metrica: str = metrica
+
+    def __repr__(self) -> str:
+        return f"Escenari(numero={self.numero}, capacitatMaxima={self.capacitatMaxima}, repetirRestaurants={self.repetirRestaurants}, directoriDades={self.directoriDades}, solver={self.solver}, metrica={self.metrica})"
+
+def generarEscenaris(capacitats: List[int], repetirRestaurants: List[bool], directoris: List[Optional[str]],
+                     solvers: List[str], metriques: List[str]) -> List[Escenari]:
+    """
+    Genera tots els escenaris de la graella de paràmetres (producte cartesià).
+    """
+    return [Escenari(numero, capacitat, repetir, directori, solver, metrica)
+            for numero, (directori, repetir, solver, metrica, capacitat) in enumerate(itertools.product(directoris, repetirRestaurants, solvers, metriques, capacitats))]
+
+def executarEscenari(escenari: Escenari) -> Dict[str, Any]:
+    """
+    Executa un escenari sense interacció, sense sortida per pantalla i sense mapa.
+
+    Args:
+        escenari (Escenari): Escenari a executar.
+
+    Returns:
+        Dict[str, Any]: Fila del resum amb les columnes de COLUMNES. Si la simulació falla, l'error es guarda a la fila.
+    """
+    fila: Dict[str, Any] = {"escenari": escenari.numero, "capacitatMaxima": escenari.capacitatMaxima, "repetirRestaurants": escenari.repetirRestaurants,
+                            "dades": escenari.directoriDades or "data.py", "solver": escenari.solver, "metrica": escenari.metrica,
+                            "comandes": None, "viatges": None, "distanciaKm": None, "temps": None, "error": ""}
+    tempsInici: float = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as buit, redirect_stdout(buit):
+            distancia, viatges, numComandes = main(escenari.capacitatMaxima, escenari.repetirRestaurants, "", "", OpcionsPlanificacio(escenari.metrica, escenari.solver),
+                                                   directoriDades=escenari.directoriDades, generarMapa=False)
+        fila.update(comandes=numComandes, viatges=viatges, distanciaKm=round(distancia / 10**3, 4))
+    except Exception as error:
+        fila["error"] = f"{type(error).__name__}: {error}"
+    fila["temps"] = round(time.perf_counter() - tempsInici, 4)
+    return fila
+
+def executarEscenaris(escenaris: List[Escenari], treballadors: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Executa els escenaris en paral·lel en un pool de processos.
+
+    Args:
+        escenaris (List[Escenari]): Escenaris a executar.
+        treballadors (Optional[int]): Nombre de processos (per defecte, tots els nuclis). Amb 1 s'executen en aquest procés.
+
+    Returns:
+        List[Dict[str, Any]]: Fila del resum de cada escenari, ordenades per número d'escenari.
+    """
+    if treballadors == 1:
+        return [executarEscenari(escenari) for escenari in escenaris]
+    with ProcessPoolExecutor(treballadors) as executor:
+        futurs: List[Future] = [executor.submit(executarEscenari, escenari) for escenari in escenaris]
+        files: List[Dict[str, Any]] = [futur.result() for futur in as_completed(futurs)]
+    return sorted(files, key=lambda fila: fila["escenari"])
+
+def guardarResum(files: List[Dict[str, Any]], cami: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(cami)), exist_ok=True)
+    with open(cami, "w", newline="") as fitxer:
+        escriptor = csv.DictWriter(fitxer, fieldnames=COLUMNES)
+        escriptor.writeheader()
+        escriptor.writerows(files)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa la simulació per a una graella d'escenaris en paral·lel i en guarda un resum en CSV.")
+    parser.add_argument("--capacitats", type=int, nargs="+", default=[12000], help="Capacitats màximes de la motxilla.")
+    parser.add_argument("--rangCapacitats", type=int, nargs=3, metavar=("INICI", "FI", "PAS"), default=None, help="Capacitats de INICI a FI (inclòs) cada PAS, en lloc de --capacitats.")
+    parser.add_argument("--repetirRestaurants", type=str, choices=["si", "no", "tots"], default="tots", help="Escenaris amb restaurants repetibles, sense, o tots dos.")
+    parser.add_argument("--data", dest="directoris", type=str, nargs="+", default=None, help="Directoris de dades (per defecte, les dades de data/data.py).")
+    parser.add_argument("--solvers", type=str, nargs="+", choices=list(SOLVERS), default=["hillClimbing"], help="Algorismes per escollir les comandes.")
+    parser.add_argument("--metriques", type=str, nargs="+", choices=list(METRIQUES), default=["geodesica"], help="Mètriques de distància.")
+    parser.add_argument("--treballadors", type=int, default=None, help="Nombre de processos (per defecte, tots els nuclis).")
+    parser.add_argument("--sortida", type=str, default=os.path.join(os.path.dirname(__file__), "out", "escenaris.csv"), help="Fitxer CSV del resum.")
+    args = parser.parse_args()
+
+    capacitats: List[int] = list(range(args.rangCapacitats[0], args.rangCapacitats[1] + 1, args.rangCapacitats[2])) if args.rangCapacitats else args.capacitats
+    repetir: List[bool] = {"si": [True], "no": [False], "tots": [True, False]}[args.repetirRestaurants]
+    escenaris: List[Escenari] = generarEscenaris(capacitats, repetir, args.directoris or [None], args.solvers, args.metriques)
+
+    tempsInici: float = time.perf_counter()
+    files: List[Dict[str, Any]] = executarEscenaris(escenaris, args.treballadors)
+    guardarResum(files, args.sortida)
+
+    errors: int = sum(1 for fila in files if fila["error"])
+    print(f"S'han executat {len(files)} escenaris en {round(time.perf_counter() - tempsInici, 2)} segons ({errors} amb error). Resum guardat a {args.sortida}")
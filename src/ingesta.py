@@ -0,0 +1,43 @@
+from typing import Iterable, Iterator, List
+import time
+
+from domain.comanda import Comanda
+
+def simularArribades(comandes: Iterable[Comanda], interval: float = 0.0) -> Iterator[Comanda]:
+    """
+    Generador que simula l'arribada contínua de comandes a partir d'una font qualsevol.
+
+    Args:
+        comandes (Iterable[Comanda]): Font de comandes (llista, fitxer, cua...).
+        interval (float): Temps d'espera en segons entre dues comandes.
+
+    Yields:
+        Comanda: Cada comanda en el moment que arriba.
+    """
+    for comanda in comandes:
+        if interval > 0:
+            time.sleep(interval)
+        yield comanda
+
+def microLots(comandes: Iterable[Comanda], midaLot: int) -> Iterator[List[Comanda]]:
+    """
+    Generador que agrupa un flux de comandes en micro-lots.
+
+    Només es llegeix la comanda següent de la font quan es demana el lot següent, de manera que
+    el consumidor controla el ritme i la memòria ocupada és com a molt la d'un lot.
+
+    Args:
+        comandes (Iterable[Comanda]): Flux de comandes.
+        midaLot (int): Nombre màxim de comandes de cada lot.
+
+    Yields:
+        List[Comanda]: Lots de com a molt midaLot comandes, en ordre d'arribada.
+    """
+    lot: List[Comanda] = []
+    for comanda in comandes:
+        lot.append(comanda)
+        if len(lot) >= midaLot:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
@@ -0,0 +1,84 @@
+from typing import Any, Dict, Iterator, Optional, TextIO
+from contextlib import contextmanager
+import json, time
+
+class Instrumentacio:
+    """
+    Comptadors i temporitzadors dels camins crítics de la simulació.
+
+    Està desactivada per defecte. Els punts instrumentats comproven l'atribut actiu abans de fer res,
+    de manera que quan està desactivada el cost és una sola comparació. Quan està activa, cada fase
+    escriu una línia JSON a la traça amb la seva durada i els comptadors que ha incrementat.
+    """
+
+    def __init__(self) -> None:
+        self.actiu: bool = False
+        self.comptadors: Dict[str, int] = {}
+        # Temps total i nombre d'execucions de cada fase
+        self.fases: Dict[str, float] = {}
+        self.execucions: Dict[str, int] = {}
+        self.traca: Optional[TextIO] = None
+        self.inici: float = time.perf_counter()
+
+    def activar(self, traca: Optional[TextIO] = None) -> None:
+        """
+        Activa la instrumentació i reinicia els comptadors.
+
+        Args:
+            traca (Optional[TextIO]): Fitxer on s'escriu la traça en format JSON lines. Si no n'hi ha, només es guarden els totals.
+        """
+        self.actiu = True
+        self.comptadors = {}
+        self.fases = {}
+        self.execucions = {}
+        self.traca = traca
+        self.inici = time.perf_counter()
+
+    def desactivar(self) -> None:
+        self.actiu = False
+        self.traca = None
+
+    def comptar(self, nom: str, quantitat: int = 1) -> None:
+        self.comptadors[nom] = self.comptadors.get(nom, 0) + quantitat
+
+    def esdeveniment(self, tipus: str, **dades: Any) -> None:
+        """
+        Escriu una línia a la traça amb el temps des de l'activació i les dades donades.
+        """
+        if self.traca is not None:
+            self.traca.write(json.dumps({"temps": round(time.perf_counter() - self.inici, 6), "tipus": tipus, **dades}) + "\n")
+
+    @contextmanager
+    def fase(self, nom: str, **context: Any) -> Iterator[None]:
+        """
+        Mesura la durada d'una fase i els comptadors que s'hi incrementen.
+
+        Args:
+            nom (str): Nom de la fase.
+            context (Any): Dades que s'afegeixen a l'esdeveniment de la traça (per exemple, el número de viatge).
+        """
+        if not self.actiu:
+            yield
+            return
+        comptadorsInici: Dict[str, int] = dict(self.comptadors)
+        tempsInici: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            durada: float = time.perf_counter() - tempsInici
+            self.fases[nom] = self.fases.get(nom, 0.0) + durada
+            self.execucions[nom] = self.execucions.get(nom, 0) + 1
+            increments: Dict[str, int] = {clau: valor - comptadorsInici.get(clau, 0) for clau, valor in self.comptadors.items() if valor != comptadorsInici.get(clau, 0)}
+            self.esdeveniment("fase", nom=nom, durada=round(durada, 6), comptadors=increments, **context)
+
+    def resum(self) -> Dict[str, Any]:
+        """
+        Retorna els comptadors i el temps total de cada fase, i l'escriu a la traça.
+        """
+        resum: Dict[str, Any] = {"comptadors": dict(self.comptadors),
+                                 "fases": {nom: {"temps": round(temps, 6), "execucions": self.execucions[nom]} for nom, temps in self.fases.items()}}
+        self.esdeveniment("resum", **resum)
+        return resum
+
+# Instància compartida per tots els mòduls
+instrumentacio: Instrumentacio = Instrumentacio()
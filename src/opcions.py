@@ -0,0 +1,59 @@
+from typing import Any, Dict, Optional
+import argparse
+
+from algorismes.cotes import TOLERANCIA_GAP
+from algorismes.cercaLocal import TEMPS_MAXIM
+
+class OpcionsPlanificacio:
+    """
+    Opcions de la planificació dels viatges comunes a tots els modes de la simulació.
+
+    Es construeixen una sola vegada a partir dels arguments de la línia d'ordres (deArguments) i es passen senceres
+    a les funcions de planificació i als processos del pool, en lloc de passar cada opció com un paràmetre més.
+    """
+
+    def __init__(self, metrica: str = "geodesica", solver: str = "hillClimbing", tempsSolver: float = TEMPS_MAXIM, assignacio: str = "sequencial",
+                 toleranciaGap: float = TOLERANCIA_GAP, informarGap: bool = False, millorarRutes: bool = False, tempsMillora: float = 0.05,
+                 mantenirPrioritat: bool = True, fitxerXarxa: Optional[str] = None, directoriMagatzem: Optional[str] = None,
+                 fitxerViatges: Optional[str] = None) -> None:
+        # Distàncies: mètrica, xarxa viària i magatzem de matrius
+        self.metrica: str = metrica
+        self.fitxerXarxa: Optional[str] = fitxerXarxa
+        self.directoriMagatzem: Optional[str] = directoriMagatzem
+        # Selecció de les comandes i assignació dels restaurants de cada motxilla
+        self.solver: str = solver
+        self.tempsSolver: float = tempsSolver
+        self.assignacio: str = assignacio
+        self.toleranciaGap: float = toleranciaGap
+        self.informarGap: bool = informarGap
+        # Millora de les rutes de lliurament
+        self.millorarRutes: bool = millorarRutes
+        self.tempsMillora: float = tempsMillora
+        self.mantenirPrioritat: bool = mantenirPrioritat
+        # Fitxer on s'afegeix cada viatge, en els modes que l'escriuen
+        self.fitxerViatges: Optional[str] = fitxerViatges
+
+    @classmethod
+    def deArguments(cls, args: argparse.Namespace) -> "OpcionsPlanificacio":
+        """
+        Construeix les opcions a partir dels arguments de delivery_simulation.py.
+        """
+        return cls(args.metrica, args.solver, args.tempsSolver, args.assignacio, args.toleranciaGap, args.informarGap, args.millorarRutes,
+                   args.tempsMillora, args.mantenirPrioritat, args.fitxerXarxa, args.directoriMagatzem, args.fitxerViatges)
+
+    def recollida(self) -> Dict[str, Any]:
+        """
+        Arguments de omplirMotxilla que depenen de les opcions.
+        """
+        return {"solver": self.solver, "informarGap": self.informarGap, "tempsSolver": self.tempsSolver, "assignacio": self.assignacio,
+                "toleranciaGap": self.toleranciaGap}
+
+    def lliurament(self) -> Dict[str, Any]:
+        """
+        Arguments de entregarComandes que depenen de les opcions.
+        """
+        return {"millorarRutes": self.millorarRutes, "tempsMillora": self.tempsMillora, "mantenirPrioritat": self.mantenirPrioritat,
+                "informarGap": self.informarGap, "toleranciaGap": self.toleranciaGap}
+
+    def __repr__(self) -> str:
+        return f"OpcionsPlanificacio(metrica={self.metrica}, solver={self.solver}, assignacio={self.assignacio}, toleranciaGap={self.toleranciaGap}, millorarRutes={self.millorarRutes})"
@@ -0,0 +1,49 @@
+import itertools, random, time
+
+from domain.distancies import MatriuDistancies
+from algorismes.cotes import cotaCompromis, cotaRuta, gap, longitudRuta, valorObjectiu
+from algorismes.motxillaExacta import fitnessSolucio, programacioDinamica
+from algorismes.veinatge import VeinatgeIntercanvi
+from algorismes.cercaLocal import cercaTabu
+from data.generador import generarCiutat
+
+oficina, comandes, restaurants = generarCiutat(500, llavor=1)
+generador = random.Random(1)
+
+# La cota del compromís no pot superar l'òptim exacte
+print()
+gaps = []
+for _ in range(300):
+    seleccio = generador.sample(comandes, generador.randint(1, 40))
+    capacitat = generador.choice([500, 1000, 3000, 6000, 12000])
+    optim = -fitnessSolucio(*programacioDinamica(seleccio, capacitat), capacitat)[0]
+    cota = cotaCompromis(seleccio, capacitat)
+    assert cota <= optim + 1e-9, f"La cota {cota} supera l'òptim {optim}."
+    gaps.append(gap(optim, cota))
+print(f"Gap de l'òptim respecte a la cota del compromís: mitjà {round(100 * sum(gaps) / len(gaps), 2)}%, màxim {round(100 * max(gaps), 2)}%, {sum(g == 0 for g in gaps)} de {len(gaps)} exactes")
+
+# La cota de les rutes no pot superar la ruta més curta (per força bruta) i és com a mínim la del veí més proper
+matriu = MatriuDistancies([comanda.coordenades for comanda in comandes])
+for _ in range(20):
+    punts = [comanda.coordenades for comanda in generador.sample(comandes, 7)]
+    inici, resta = punts[0], punts[1:]
+    millor = min(longitudRuta(inici, list(ordre), matriu.distancia) for ordre in itertools.permutations(resta))
+    cota = cotaRuta(inici, resta, matriu.distancia)
+    veiMesProper = sum(min(matriu.distancia(punt, altre) for altre in punts if altre is not punt) for punt in resta)
+    assert veiMesProper - 1e-6 <= cota <= millor + 1e-6, f"Cota de la ruta {cota} fora de [{veiMesProper}, {millor}]."
+print("Les cotes de les rutes són correctes.")
+
+# Iteracions i temps que s'estalvien aturant les cerques amb la cota
+seleccio = comandes[:300]
+for tolerancia in (None, 0.0, 0.01, 0.05):
+    veinatge = VeinatgeIntercanvi(seleccio, 12000)
+    cota = cotaCompromis(seleccio, 12000)
+    tempsInici = time.perf_counter()
+    iteracions = veinatge.pujar(1000, None if tolerancia is None else valorObjectiu(cota, tolerancia))
+    print(f"Hill Climbing amb tolerància {tolerancia}: {iteracions} iteracions en {round(time.perf_counter() - tempsInici, 4)} segons, gap del {round(100 * gap(-veinatge.fitness()[0], cota), 2)}%")
+
+seleccio = comandes[:10]
+tempsInici = time.perf_counter()
+cercaTabu(seleccio, 12000, 0.05, llavor=1)
+print(f"Cerca tabú de 10 comandes: {round(time.perf_counter() - tempsInici, 4)} segons de 0.05")
+print()
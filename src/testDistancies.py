@@ -0,0 +1,40 @@
+import time
+import numpy as np
+
+from domain.distancies import MatriuDistancies, METRIQUES
+from data.data import comandes, restaurants, tecnocampus
+
+# Error màxim acceptat per cada mètrica respecte a geopy.distance.geodesic (metres, relatiu)
+TOLERANCIES = {
+    "geodesica":       (1e-3, 1e-9),
+    "haversine":       (50.0, 5e-3),
+    "equirectangular": (1e-2, 1e-6)
+}
+
+punts = MatriuDistancies.dePunts(tecnocampus, comandes, restaurants).coordenades
+
+tempsInici = time.perf_counter()
+referencia = np.array([[origen.distancia(desti) for desti in punts] for origen in punts])
+tempsReferencia = time.perf_counter() - tempsInici
+
+print()
+print(f"Punts: {len(punts)} ({len(punts)**2} parells)")
+print(f"geopy.distance.geodesic: {round(tempsReferencia, 4)} segons")
+print()
+
+for metrica in METRIQUES:
+    tempsInici = time.perf_counter()
+    matriu = MatriuDistancies(punts, metrica)
+    temps = time.perf_counter() - tempsInici
+
+    errorAbsolut = np.abs(matriu.matriu - referencia)
+    errorRelatiu = errorAbsolut / np.where(referencia > 0, referencia, 1)
+    maximAbsolut, maximRelatiu = TOLERANCIES[metrica]
+
+    print(f"{metrica}:")
+    print(f"\tTemps: {round(temps, 4)} segons ({round(tempsReferencia / temps, 1)}x)")
+    print(f"\tError màxim: {errorAbsolut.max():.6f} metres ({errorRelatiu.max():.2e} relatiu)")
+
+    assert errorAbsolut.max() <= maximAbsolut, f"L'error absolut de {metrica} supera {maximAbsolut} metres."
+    assert errorRelatiu.max() <= maximRelatiu, f"L'error relatiu de {metrica} supera {maximRelatiu}."
+print()
@@ -0,0 +1,60 @@
+import os, tempfile, time
+import numpy as np
+
+from domain.distancies import MatriuDistancies
+from domain import magatzemDistancies
+from domain.magatzemDistancies import MagatzemDistancies
+from data.generador import generarCiutat
+
+# Ciutat sintètica: primer es guarden els restaurants i després s'hi afegeixen les comandes
+oficina, comandes, restaurants = generarCiutat(1500, llavor=1)
+punts = [oficina] + [restaurant.coordenades for restaurant in restaurants]
+tots = punts + [comanda.coordenades for comanda in comandes[:300]]
+
+with tempfile.TemporaryDirectory() as directori:
+    magatzem = MagatzemDistancies(directori)
+
+    print()
+    tempsInici = time.perf_counter()
+    MatriuDistancies(punts, "geodesica", None, magatzem)
+    calcul = time.perf_counter() - tempsInici
+    tempsInici = time.perf_counter()
+    guardada = MatriuDistancies(punts, "geodesica", None, magatzem)
+    lectura = time.perf_counter() - tempsInici
+    print(f"{len(punts)} punts: {round(calcul, 4)} segons calculant, {round(lectura, 4)} segons des del magatzem")
+    assert isinstance(guardada.matriu, np.memmap), "La matriu guardada no es llegeix mapada a memòria."
+    assert np.array_equal(guardada.matriu, MatriuDistancies(punts).matriu), "La matriu guardada no coincideix amb la calculada."
+
+    # Només es calculen les files i columnes dels punts nous
+    tempsInici = time.perf_counter()
+    ampliada = MatriuDistancies(tots, "geodesica", None, magatzem)
+    print(f"Afegir {len(tots) - len(punts)} punts: {round(time.perf_counter() - tempsInici, 4)} segons")
+    assert np.array_equal(ampliada.matriu, MatriuDistancies(tots).matriu), "La matriu ampliada no coincideix amb la calculada."
+    assert len(magatzem.entrades("geodesica")) == 1, "L'entrada ampliada no ha substituït l'anterior."
+
+    # Un subconjunt en un altre ordre es llegeix de l'entrada sense calcular res
+    subconjunt = tots[::-1][:500]
+    assert np.array_equal(MatriuDistancies(subconjunt, "geodesica", None, magatzem).matriu, MatriuDistancies(subconjunt).matriu), "El subconjunt no coincideix amb el calculat."
+
+    # Una altra ciutat només comparteix l'oficina: té una entrada separada i no amplia la de la primera
+    mida = os.path.getsize(magatzem.cami("geodesica", magatzem.entrades("geodesica")[0]))
+    _, altresComandes, altresRestaurants = generarCiutat(300, llavor=2)
+    altres = [oficina] + [restaurant.coordenades for restaurant in altresRestaurants]
+    assert np.array_equal(MatriuDistancies(altres, "geodesica", None, magatzem).matriu, MatriuDistancies(altres).matriu), "La matriu de l'altra ciutat no coincideix amb la calculada."
+    assert len(magatzem.entrades("geodesica")) == 2, "L'altra ciutat no té una entrada separada."
+    assert sorted(os.path.getsize(magatzem.cami("geodesica", entrada)) for entrada in magatzem.entrades("geodesica"))[-1] == mida, "L'altra ciutat ha ampliat l'entrada de la primera."
+
+    # Quan una família té massa entrades s'eliminen les que fa més temps que no es fan servir
+    magatzemDistancies.ENTRADES_MAXIMES = 2
+    MatriuDistancies(tots, "geodesica", None, magatzem)
+    MatriuDistancies([oficina] + [comanda.coordenades for comanda in altresComandes], "geodesica", None, magatzem)
+    assert len(magatzem.entrades("geodesica")) == 2, "No s'han eliminat les entrades antigues."
+    empremtes = [magatzem.empremta("geodesica", np.column_stack((calculada.latituds, calculada.longituds)))
+                 for calculada in (MatriuDistancies(tots), MatriuDistancies(altres))]
+    assert empremtes[0] in magatzem.entrades("geodesica") and empremtes[1] not in magatzem.entrades("geodesica"), "No s'ha eliminat l'entrada més antiga."
+
+    # Cada mètrica té les seves entrades
+    MatriuDistancies(punts, "haversine", None, magatzem)
+    print(f"Fitxers del magatzem: {', '.join(sorted(os.listdir(directori)))}")
+    assert len(magatzem.entrades("haversine")) == 1 and len(magatzem.entrades("geodesica")) == 2, "Les mètriques comparteixen entrades."
+print()
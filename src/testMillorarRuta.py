@@ -0,0 +1,32 @@
+import itertools, random
+
+from algorismes.cotes import longitudRuta
+from algorismes.millorarRuta import millorarRuta
+from data.generador import generarCiutat
+
+oficina, comandes, restaurants = generarCiutat(200, llavor=1)
+generador = random.Random(1)
+
+def funcioDistancia(punts, simetrica):
+    # Distàncies precalculades; les asimètriques afegeixen un recàrrec diferent per a cada sentit, com els carrers d'un sol sentit
+    distancies = {(id(origen), id(desti)): origen.distancia(desti) + (0 if simetrica else generador.uniform(0, 2000))
+                  for origen, desti in itertools.permutations(punts, 2)}
+    return lambda origen, desti: 0.0 if origen is desti else distancies[(id(origen), id(desti))]
+
+# La ruta millorada mai pot ser més llarga que la inicial, tant amb distàncies simètriques com asimètriques
+print()
+for nom, simetrica in (("simètriques", True), ("asimètriques", False)):
+    millores = []
+    for _ in range(300):
+        seleccio = generador.sample(comandes, 7)
+        punts = [oficina] + [comanda.coordenades for comanda in seleccio]
+        distancia = funcioDistancia(punts, simetrica)
+        inicial = longitudRuta(oficina, punts[1:], distancia)
+        ruta = millorarRuta(oficina, seleccio, distancia, tempsMaxim=1, mantenirPrioritat=False)
+        final = longitudRuta(oficina, [comanda.coordenades for comanda in ruta], distancia)
+        assert sorted(comanda.id for comanda in ruta) == sorted(comanda.id for comanda in seleccio), "La ruta millorada no té les mateixes comandes."
+        assert final <= inicial + 1e-6, f"Amb distàncies {nom} la ruta s'allarga de {inicial} a {final} m."
+        optim = min(longitudRuta(oficina, [comanda.coordenades for comanda in ordre], distancia) for ordre in itertools.permutations(seleccio))
+        millores.append((inicial - final) / (inicial - optim) if inicial > optim else 1.0)
+    print(f"Distàncies {nom}: la millora arriba de mitjana al {round(100 * sum(millores) / len(millores), 2)}% de la millora òptima")
+print()
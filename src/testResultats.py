@@ -0,0 +1,50 @@
+import json, os, tempfile, time
+
+from domain.coordenada import Coordenada
+from data.generador import generarCiutat
+from data.resultats import codificarPolilinia, descodificarPolilinia, obrirEscriptor
+
+# Exemple de la documentació de l'algorisme de polilínies de Google
+exemple = [Coordenada(38.5, -120.2), Coordenada(40.7, -120.95), Coordenada(43.252, -126.453)]
+assert codificarPolilinia(exemple) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@", "La polilínia no coincideix amb la de l'exemple."
+assert descodificarPolilinia(codificarPolilinia(exemple)) == [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)], "La polilínia no es descodifica correctament."
+
+oficina, comandes, restaurants = generarCiutat(1000, llavor=1)
+ruta = [oficina] + [comanda.coordenades for comanda in comandes]
+for precisio in (5, 6):
+    descodificada = descodificarPolilinia(codificarPolilinia(ruta, precisio), precisio)
+    assert all(abs(latitud - punt.latitud) <= 10 ** -precisio and abs(longitud - punt.longitud) <= 10 ** -precisio
+               for (latitud, longitud), punt in zip(descodificada, ruta)), f"La polilínia amb precisió {precisio} no recupera la ruta."
+
+with tempfile.TemporaryDirectory() as directori:
+    print()
+    for nom in ("viatges.geojson", "viatges.geojsonl"):
+        cami = os.path.join(directori, nom)
+        # Dues execucions sobre el mateix fitxer: la segona hi afegeix els seus viatges
+        tempsInici = time.perf_counter()
+        for execucio in range(2):
+            with obrirEscriptor(cami) as escriptor:
+                for numero in range(100):
+                    inici = (execucio * 100 + numero) * 5
+                    escriptor.escriure(numero + 1, [restaurant.nom for restaurant in restaurants[inici:inici + 5]], [comanda.id for comanda in comandes[inici:inici + 5]],
+                                       1000.0, ruta[inici:inici + 6])
+                if execucio == 0 and nom.endswith(".geojson"):
+                    # Entre dos viatges el fitxer ja és una FeatureCollection vàlida
+                    assert len(json.load(open(cami, encoding="utf-8"))["features"]) == 100, "La FeatureCollection no és vàlida abans de tancar-la."
+        print(f"{nom}: 200 viatges en {round(time.perf_counter() - tempsInici, 4)} segons, {os.path.getsize(cami)} bytes")
+        with open(cami, encoding="utf-8") as fitxer:
+            features = json.load(fitxer)["features"] if nom.endswith(".geojson") else [json.loads(linia) for linia in fitxer]
+        assert len(features) == 200, f"{nom} té {len(features)} viatges en lloc de 200."
+        assert [feature["properties"]["lliuraments"][0] for feature in features] == [comanda.id for comanda in comandes[:1000:5]], f"Els viatges de {nom} no estan en ordre."
+        assert features[0]["geometry"]["coordinates"][0] == [round(oficina.longitud, 7), round(oficina.latitud, 7)], "La geometria no comença a l'oficina."
+
+    try:
+        with obrirEscriptor(os.path.join(directori, "viatges.parquet")) as escriptor:
+            escriptor.escriure(1, [restaurants[0].nom], [comandes[0].id], 1000.0, ruta[:2])
+        import pyarrow.parquet as pq
+        taula = pq.read_table(os.path.join(directori, "viatges.parquet"))
+        assert taula.num_rows == 1 and taula.column("polilinia")[0].as_py() == codificarPolilinia(ruta[:2]), "El fitxer Parquet no té el viatge."
+        print("viatges.parquet: correcte")
+    except ImportError as error:
+        print(f"No es comprova el format Parquet: {error}")
+print()
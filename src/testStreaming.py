@@ -0,0 +1,27 @@
+import io
+from contextlib import redirect_stdout
+
+from domain.distancies import MatriuDistancies
+from data.generador import generarCiutat
+from delivery_simulation import despatxar
+
+oficina, comandes, restaurants = generarCiutat(200, llavor=1)
+matriu = MatriuDistancies.dePunts(oficina, comandes, restaurants)
+
+print()
+# Totes les comandes del flux es lliuren una sola vegada i mai hi ha més pendents de les permeses
+with redirect_stdout(io.StringIO()):
+    viatges = list(despatxar(iter(comandes), 12000, restaurants, True, matriu, midaLot=10, maxPendents=30, inici=oficina))
+lliurades = [comanda.id for _, motxilla, _, _ in viatges for comanda in motxilla]
+print(f"{len(comandes)} comandes en streaming: {len(viatges)} viatges")
+assert sorted(lliurades) == sorted(comanda.id for comanda in comandes), "El flux no ha lliurat totes les comandes una sola vegada."
+
+# Si cap comanda hi cap, el flux s'ha d'aturar amb un error en lloc de repetir viatges buits indefinidament
+try:
+    with redirect_stdout(io.StringIO()):
+        for _ in despatxar(iter(comandes), 100, restaurants, True, matriu, midaLot=10, maxPendents=30, inici=oficina):
+            pass
+    raise AssertionError("El flux amb comandes que no caben a la motxilla no s'ha aturat.")
+except ValueError as error:
+    print(f"Capacitat de 100 g: {error}")
+print()
@@ -0,0 +1,59 @@
+import os, tempfile, time
+import numpy as np
+
+from domain.distancies import MatriuDistancies
+from data.data import comandes, restaurants, tecnocampus
+from data.generador import generarXarxa
+from data.carregador import guardarGraphML, llegirGraphML
+from delivery_simulation import main
+from opcions import OpcionsPlanificacio
+
+# Xarxa sintètica en quadrícula sobre la capsa de les dades de Mataró
+xarxa = generarXarxa(llavor=0)
+punts = MatriuDistancies.dePunts(tecnocampus, comandes, restaurants).coordenades
+
+print()
+print(f"Xarxa: {len(xarxa)} nodes i {xarxa.numArestes} arestes. Punts: {len(punts)}")
+
+tempsInici = time.perf_counter()
+matriu = MatriuDistancies(punts, "geodesica", xarxa)
+print(f"Taula de distàncies per carretera: {round(time.perf_counter() - tempsInici, 4)} segons")
+
+# Les distàncies per carretera no poden ser inferiors a la línia recta
+recta = MatriuDistancies(punts).matriu
+assert np.all(matriu.matriu >= recta - 1e-6), "Hi ha distàncies per carretera inferiors a la línia recta."
+
+# L'A* (sense memòria cau) ha de donar el mateix que el Dijkstra de la taula
+generador = np.random.default_rng(0)
+copia = generarXarxa(llavor=0)
+diferencia = 0.0
+for i, j in generador.integers(0, len(punts), (200, 2)).tolist():
+    if i != j:
+        diferencia = max(diferencia, abs(copia.distancia(punts[i], punts[j]) - matriu.matriu[i, j]))
+print(f"Diferència màxima entre A* i Dijkstra: {diferencia:.6f} metres")
+assert diferencia <= 1e-6, "L'A* i el Dijkstra no coincideixen."
+
+# Amb els camins a la memòria cau, les consultes repetides són immediates
+parells = generador.integers(0, len(punts), (200, 2)).tolist()
+tempsInici = time.perf_counter()
+for i, j in parells:
+    copia.distancia(punts[i], punts[j])
+primera = time.perf_counter() - tempsInici
+tempsInici = time.perf_counter()
+for i, j in parells:
+    copia.distancia(punts[i], punts[j])
+print(f"200 consultes: {round(primera, 4)} segons la primera vegada, {round(time.perf_counter() - tempsInici, 4)} segons repetides")
+
+# El GraphML guardat es llegeix igual
+with tempfile.TemporaryDirectory() as directori:
+    cami = os.path.join(directori, "xarxa.graphml")
+    guardarGraphML(cami, xarxa)
+    llegida = llegirGraphML(cami)
+    assert len(llegida) == len(xarxa) and llegida.numArestes == xarxa.numArestes, "La xarxa llegida no té els mateixos nodes i arestes."
+    assert np.array_equal(MatriuDistancies(punts, "geodesica", llegida).matriu, matriu.matriu), "La xarxa llegida no dona les mateixes distàncies."
+
+    distancia, viatges, _ = main(12000, True, "", "", OpcionsPlanificacio(fitxerXarxa=cami), generarMapa=False)
+    distanciaRecta, _, _ = main(12000, True, "", "", generarMapa=False)
+print(f"Simulació: {round(distancia / 10**3, 2)} km per carretera en {viatges} viatges, {round(distanciaRecta / 10**3, 2)} km en línia recta")
+assert distancia >= distanciaRecta, "La simulació per carretera és més curta que en línia recta."
+print()
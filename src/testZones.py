@@ -0,0 +1,28 @@
+import io
+from collections import Counter
+from contextlib import redirect_stdout
+
+from data.generador import generarCiutat
+from delivery_simulation import planificarZones
+
+oficina, comandes, restaurants = generarCiutat(600, 40, llavor=3)
+
+print()
+# Sense repetir restaurants, cap restaurant es pot visitar en dues zones, tant si les zones es planifiquen al pool com en aquest procés
+costures = []
+for treballadors in (2, 1):
+    with redirect_stdout(io.StringIO()):
+        zones, resultats = planificarZones(oficina, comandes, restaurants, 12000, False, midaZona=100, treballadors=treballadors, llavor=1)
+    visites = Counter((punt.latitud, punt.longitud) for resultat in resultats for _, ruta, color in resultat.rutes if color == "blue" for punt in ruta[1:])
+    repetits = sum(1 for vegades in visites.values() if vegades > 1)
+    costura = zones[-1] if zones[-1].costura else None
+    costures.append(None if costura is None else len(costura.restaurants))
+    print(f"{treballadors} processos: {len(zones)} zones, {len(visites)} restaurants visitats, {repetits} repetits, {costures[-1]} restaurants a la costura")
+    assert repetits == 0, f"Amb {treballadors} processos s'han repetit {repetits} restaurants entre zones."
+    # Les comandes servides de cada zona són les parades de les rutes de lliurament, i les altres es compten com a no servides
+    for zona, resultat in zip(zones, resultats):
+        parades = sum(len(ruta) - 1 for _, ruta, color in resultat.rutes if color == "red")
+        assert resultat.numComandes == parades and resultat.numComandes + resultat.numNoServides == len(zona.comandes), \
+            f"La zona {zona.numero} diu que ha servit {resultat.numComandes} comandes amb {parades} parades de lliurament."
+assert costures[0] == costures[1], "La zona de costura no té els mateixos restaurants amb el pool que en aquest procés."
+print()